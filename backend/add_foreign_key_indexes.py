@@ -0,0 +1,60 @@
+from app.core.database import get_db, Base
+import app.models  # noqa: F401 - registers every table on Base.metadata
+from sqlalchemy import inspect, text
+
+
+# Indexes added by the index audit, defined on the models
+NEW_INDEXES = {
+    'products': ['ix_products_seller_created'],
+    'product_variants': ['ix_product_variants_product_id'],
+    'product_variant_attributes': ['ix_product_variant_attributes_variant_id'],
+    'product_images': ['ix_product_images_product_id'],
+    'orders': ['ix_orders_customer_created', 'ix_orders_status_created'],
+    'order_items': ['ix_order_items_order_id', 'ix_order_items_product_id'],
+    'product_reviews': ['ix_product_reviews_customer_created', 'ix_product_reviews_approved_product_created'],
+    'commission_settings': ['ix_commission_settings_active_type_entity'],
+    'categories': ['ix_categories_parent_id'],
+    'attribute_values': ['ix_attribute_values_attribute_id'],
+    'category_attributes': ['ix_category_attributes_category_id'],
+}
+
+# Indexes from earlier runs that the composite indexes now cover
+REDUNDANT_INDEXES = {
+    'products': ['ix_products_category_id'],
+}
+
+
+def add_foreign_key_indexes():
+    db = next(get_db())
+    try:
+        connection = db.connection()
+        inspector = inspect(connection)
+        for table_name, index_names in NEW_INDEXES.items():
+            existing = {index['name'] for index in inspector.get_indexes(table_name)}
+            indexes = {index.name: index for index in Base.metadata.tables[table_name].indexes}
+            for name in index_names:
+                if name in existing:
+                    print(f'INFO: {name} already exists')
+                    continue
+                indexes[name].create(bind=connection)
+                print(f'SUCCESS: Created {name}')
+
+        for table_name, index_names in REDUNDANT_INDEXES.items():
+            existing = {index['name'] for index in inspector.get_indexes(table_name)}
+            for name in index_names:
+                if name in existing:
+                    db.execute(text(f"DROP INDEX {name}"))
+                    print(f'SUCCESS: Dropped redundant {name}')
+
+        # Refresh planner statistics so the new indexes are chosen
+        db.execute(text("ANALYZE"))
+        db.commit()
+    except Exception as e:
+        print(f'ERROR: {e}')
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    add_foreign_key_indexes()
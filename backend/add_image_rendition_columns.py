@@ -0,0 +1,32 @@
+from app.core.database import get_db
+from sqlalchemy import text
+
+
+def column_exists(db, table: str, column: str) -> bool:
+    res = db.execute(text(f"PRAGMA table_info({table})"))
+    for row in res.fetchall():
+        if row[1] == column:
+            return True
+    return False
+
+
+def add_image_rendition_columns():
+    db = next(get_db())
+    try:
+        for column in ('thumbnail_url', 'medium_url', 'large_url'):
+            if not column_exists(db, 'product_images', column):
+                db.execute(text(f"ALTER TABLE product_images ADD COLUMN {column} VARCHAR(500)"))
+                print(f'SUCCESS: Added {column} column')
+            else:
+                print(f'INFO: {column} column already exists')
+
+        db.commit()
+    except Exception as e:
+        print(f'ERROR: {e}')
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    add_image_rendition_columns()
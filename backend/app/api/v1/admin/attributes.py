@@ -2,8 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from ....core.database import get_db
-from ....core.dependencies import get_admin_user
-from ....models.user import User
+from ....core.dependencies import get_admin_user, Principal
 from ....schemas.attribute import (
     AttributeCreate, AttributeUpdate, AttributeResponse,
     AttributeValueCreate, AttributeValueUpdate, AttributeValueResponse,
@@ -17,10 +16,10 @@ router = APIRouter()
 
 # Attributes
 @router.post("/", response_model=AttributeResponse, status_code=status.HTTP_201_CREATED)
-async def create_attribute(
+def create_attribute(
     attribute: AttributeCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Create a new attribute (Admin only)"""
     try:
@@ -31,11 +30,11 @@ async def create_attribute(
 
 
 @router.get("/", response_model=List[AttributeResponse])
-async def get_attributes(
+def get_attributes(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get all attributes (Admin only)"""
     attributes = attribute_service.get_attributes(db, skip=skip, limit=limit)
@@ -43,10 +42,10 @@ async def get_attributes(
 
 
 @router.get("/{attribute_id}", response_model=AttributeResponse)
-async def get_attribute(
+def get_attribute(
     attribute_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get attribute by ID (Admin only)"""
     attribute = attribute_service.get_attribute(db, attribute_id)
@@ -56,11 +55,11 @@ async def get_attribute(
 
 
 @router.put("/{attribute_id}", response_model=AttributeResponse)
-async def update_attribute(
+def update_attribute(
     attribute_id: str,
     attribute_update: AttributeUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Update attribute (Admin only)"""
     try:
@@ -73,10 +72,10 @@ async def update_attribute(
 
 
 @router.delete("/{attribute_id}")
-async def delete_attribute(
+def delete_attribute(
     attribute_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Delete attribute (Admin only)"""
     try:
@@ -90,10 +89,10 @@ async def delete_attribute(
 
 # Attribute Values
 @router.post("/values", response_model=AttributeValueResponse, status_code=status.HTTP_201_CREATED)
-async def create_attribute_value(
+def create_attribute_value(
     attribute_value: AttributeValueCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Create a new attribute value (Admin only)"""
     try:
@@ -104,10 +103,10 @@ async def create_attribute_value(
 
 
 @router.get("/{attribute_id}/values", response_model=List[AttributeValueResponse])
-async def get_attribute_values(
+def get_attribute_values(
     attribute_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get all values for an attribute (Admin only)"""
     values = attribute_service.get_attribute_values(db, attribute_id)
@@ -115,11 +114,11 @@ async def get_attribute_values(
 
 
 @router.put("/values/{value_id}", response_model=AttributeValueResponse)
-async def update_attribute_value(
+def update_attribute_value(
     value_id: str,
     value_update: AttributeValueUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Update attribute value (Admin only)"""
     try:
@@ -132,10 +131,10 @@ async def update_attribute_value(
 
 
 @router.delete("/values/{value_id}")
-async def delete_attribute_value(
+def delete_attribute_value(
     value_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Delete attribute value (Admin only)"""
     try:
@@ -149,10 +148,10 @@ async def delete_attribute_value(
 
 # Category Attributes
 @router.post("/category-attributes", response_model=CategoryAttributeResponse, status_code=status.HTTP_201_CREATED)
-async def create_category_attribute(
+def create_category_attribute(
     category_attribute: CategoryAttributeCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Link an attribute to a category (Admin only)"""
     try:
@@ -163,10 +162,10 @@ async def create_category_attribute(
 
 
 @router.get("/category-attributes/{category_id}", response_model=List[CategoryAttributeResponse])
-async def get_category_attributes(
+def get_category_attributes(
     category_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get all attributes for a category (Admin only)"""
     category_attributes = attribute_service.get_category_attributes(db, category_id)
@@ -174,11 +173,11 @@ async def get_category_attributes(
 
 
 @router.put("/category-attributes/{category_attribute_id}", response_model=CategoryAttributeResponse)
-async def update_category_attribute(
+def update_category_attribute(
     category_attribute_id: str,
     update: CategoryAttributeUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Update category attribute relationship (Admin only)"""
     try:
@@ -191,10 +190,10 @@ async def update_category_attribute(
 
 
 @router.delete("/category-attributes/{category_attribute_id}")
-async def delete_category_attribute(
+def delete_category_attribute(
     category_attribute_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Remove attribute link from category (Admin only)"""
     try:
@@ -1,9 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from ....core.database import get_db
-from ....core.dependencies import get_admin_user
-from ....models.user import User
+from ....core.database import get_async_db, get_read_db
+from ....core.dependencies import get_admin_user, Principal
 from ....schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse, CategoryWithChildren, CategoryTree
 from ....services import category_service
 
@@ -13,12 +12,12 @@ router = APIRouter()
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 async def create_category(
     category: CategoryCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Create a new category (Admin only)"""
     try:
-        db_category = category_service.create_category(db, category)
+        db_category = await category_service.create_category_async(db, category)
         return db_category
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -30,11 +29,11 @@ async def get_categories(
     limit: int = Query(100, ge=1, le=1000),
     parent_id: Optional[str] = Query(None),
     active_only: bool = Query(True),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get categories with optional filtering (Admin only)"""
-    categories = category_service.get_categories(
+    categories = await category_service.get_categories_async(
         db, skip=skip, limit=limit, parent_id=parent_id, active_only=active_only
     )
     return categories
@@ -43,22 +42,22 @@ async def get_categories(
 @router.get("/tree", response_model=List[CategoryWithChildren])
 async def get_category_tree(
     parent_id: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get hierarchical category tree (Admin only)"""
-    categories = category_service.get_category_tree(db, parent_id)
+    categories = await category_service.get_category_tree_async(db, parent_id)
     return categories
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
 async def get_category(
     category_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get category by ID (Admin only)"""
-    category = category_service.get_category(db, category_id)
+    category = await category_service.get_category_async(db, category_id)
     if not category:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
     return category
@@ -67,11 +66,11 @@ async def get_category(
 @router.get("/{category_id}/path", response_model=List[CategoryResponse])
 async def get_category_path(
     category_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get full path from root to category (Admin only)"""
-    path = category_service.get_category_path(db, category_id)
+    path = await category_service.get_category_path_async(db, category_id)
     if not path:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
     return path
@@ -81,12 +80,12 @@ async def get_category_path(
 async def update_category(
     category_id: str,
     category_update: CategoryUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Update category (Admin only)"""
     try:
-        updated_category = category_service.update_category(db, category_id, category_update)
+        updated_category = await category_service.update_category_async(db, category_id, category_update)
         if not updated_category:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
         return updated_category
@@ -97,12 +96,12 @@ async def update_category(
 @router.delete("/{category_id}")
 async def delete_category(
     category_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Delete category (Admin only)"""
     try:
-        deleted = category_service.delete_category(db, category_id)
+        deleted = await category_service.delete_category_async(db, category_id)
         if not deleted:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
         return {"message": "Category deleted successfully"}
@@ -113,11 +112,11 @@ async def delete_category(
 @router.get("/slug/{slug}", response_model=CategoryResponse)
 async def get_category_by_slug(
     slug: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get category by slug (Admin only)"""
-    category = category_service.get_category_by_slug(db, slug)
+    category = await category_service.get_category_by_slug_async(db, slug)
     if not category:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
     return category 
\ No newline at end of file
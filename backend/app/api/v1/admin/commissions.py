@@ -1,43 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from ....core.database import get_db
-from ....core.dependencies import get_admin_user
-from ....models.user import User
+from ....core.dependencies import get_admin_user, Principal
 from ....models.commission import CommissionType
 from ....schemas.commission import (
     CommissionSettingCreate, 
     CommissionSettingUpdate, 
     CommissionSettingResponse,
-    CommissionCalculation
+    CommissionCalculation,
+    CommissionRecalculationJob
 )
-from ....services import commission_service
+from ....services import commission_service, recalculation_service
 
 router = APIRouter()
 
 
+def schedule_recalculation(background_tasks: BackgroundTasks, reason: str) -> dict:
+    """Queue a recalculation of all stored product prices after the response is sent"""
+    job = recalculation_service.create_recalculation_job(reason)
+    background_tasks.add_task(recalculation_service.run_recalculation_job, job["id"])
+    return job
+
+
 @router.post("/", response_model=CommissionSettingResponse, status_code=status.HTTP_201_CREATED)
-async def create_commission_setting(
+def create_commission_setting(
     commission: CommissionSettingCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Create a new commission setting (Admin only)"""
     try:
         db_commission = commission_service.create_commission_setting(db, commission)
+        schedule_recalculation(background_tasks, "commission setting created")
         return db_commission
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.get("/", response_model=List[CommissionSettingResponse])
-async def get_commission_settings(
+def get_commission_settings(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     commission_type: Optional[CommissionType] = Query(None),
     active_only: bool = Query(True),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get commission settings with optional filtering (Admin only)"""
     commissions = commission_service.get_commission_settings(
@@ -46,11 +55,40 @@ async def get_commission_settings(
     return commissions
 
 
+@router.post("/recalculations", response_model=CommissionRecalculationJob, status_code=status.HTTP_202_ACCEPTED)
+async def start_commission_recalculation(
+    background_tasks: BackgroundTasks,
+    current_user: Principal = Depends(get_admin_user)
+):
+    """Recalculate stored prices of all products and variants in the background (Admin only)"""
+    return schedule_recalculation(background_tasks, "manual")
+
+
+@router.get("/recalculations", response_model=List[CommissionRecalculationJob])
+async def get_commission_recalculations(
+    current_user: Principal = Depends(get_admin_user)
+):
+    """Get recent commission recalculation jobs (Admin only)"""
+    return recalculation_service.get_recalculation_jobs()
+
+
+@router.get("/recalculations/{job_id}", response_model=CommissionRecalculationJob)
+async def get_commission_recalculation(
+    job_id: str,
+    current_user: Principal = Depends(get_admin_user)
+):
+    """Get commission recalculation job progress (Admin only)"""
+    job = recalculation_service.get_recalculation_job(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recalculation job not found")
+    return job
+
+
 @router.get("/{commission_id}", response_model=CommissionSettingResponse)
-async def get_commission_setting(
+def get_commission_setting(
     commission_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get commission setting by ID (Admin only)"""
     commission = commission_service.get_commission_setting(db, commission_id)
@@ -60,38 +98,42 @@ async def get_commission_setting(
 
 
 @router.put("/{commission_id}", response_model=CommissionSettingResponse)
-async def update_commission_setting(
+def update_commission_setting(
     commission_id: str,
     commission_update: CommissionSettingUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Update commission setting (Admin only)"""
     updated_commission = commission_service.update_commission_setting(db, commission_id, commission_update)
     if not updated_commission:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Commission setting not found")
+    schedule_recalculation(background_tasks, "commission setting updated")
     return updated_commission
 
 
 @router.delete("/{commission_id}")
-async def delete_commission_setting(
+def delete_commission_setting(
     commission_id: str,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Delete commission setting (Admin only)"""
     deleted = commission_service.delete_commission_setting(db, commission_id)
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Commission setting not found")
+    schedule_recalculation(background_tasks, "commission setting deleted")
     return {"message": "Commission setting deleted successfully"}
 
 
 @router.post("/calculate", response_model=CommissionCalculation)
-async def calculate_commission(
+def calculate_commission(
     seller_price: float = Query(..., gt=0),
     commission_rate: float = Query(..., ge=0, le=100),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Calculate commission for a given price and rate (Admin only)"""
     calculation = commission_service.calculate_commission(seller_price, commission_rate)
@@ -99,12 +141,12 @@ async def calculate_commission(
 
 
 @router.get("/rate/calculate", response_model=dict)
-async def get_applicable_commission_rate(
+def get_applicable_commission_rate(
     category_id: str = Query(...),
     product_id: Optional[str] = Query(None),
     seller_price: float = Query(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get applicable commission rate for a product/category (Admin only)"""
     commission_rate = commission_service.get_commission_rate(
@@ -119,9 +161,9 @@ async def get_applicable_commission_rate(
 
 
 @router.get("/global/rate")
-async def get_global_commission_rate(
+def get_global_commission_rate(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get current global commission rate (Admin only)"""
     rate = commission_service.get_global_commission_rate(db)
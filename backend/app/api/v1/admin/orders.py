@@ -1,24 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from ....core.database import get_db
-from ....core.dependencies import get_admin_user
-from ....models.user import User
+from ....core.database import get_db, get_async_db, get_read_db
+from ....core.dependencies import get_admin_user, Principal
 from ....models.order import OrderStatus, PaymentStatus
 from ....schemas.order import OrderResponse, OrderListResponse, OrderStatusUpdate, PaymentStatusUpdate, OrderStats
-from ....services import order_service
+from ....services import order_service, stats_service
 
 router = APIRouter()
 
 
 @router.get("/stats", response_model=OrderStats)
-async def get_order_stats(
+def get_order_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get order statistics (Admin only)"""
     try:
-        stats = order_service.get_order_stats(db)
+        stats = stats_service.get_order_stats(db)
         return OrderStats(**stats)
     except Exception as e:
         print(f"Error in admin orders stats endpoint: {e}")
@@ -42,11 +42,11 @@ async def get_all_orders(
     customer_id: Optional[str] = Query(None),
     status: Optional[OrderStatus] = Query(None),
     payment_status: Optional[PaymentStatus] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get all orders with filtering (Admin only)"""
-    orders = order_service.get_orders(
+    orders = await order_service.get_orders_async(
         db, skip=skip, limit=limit,
         customer_id=customer_id, status=status, payment_status=payment_status
     )
@@ -57,22 +57,22 @@ async def get_all_orders(
 async def get_pending_orders(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get pending orders (Admin only)"""
-    orders = order_service.get_pending_orders(db, skip=skip, limit=limit)
+    orders = await order_service.get_pending_orders_async(db, skip=skip, limit=limit)
     return orders
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get order by ID (Admin only)"""
-    order = order_service.get_order(db, order_id)
+    order = await order_service.get_order_async(db, order_id)
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
     return order
@@ -82,11 +82,11 @@ async def get_order(
 async def update_order_status(
     order_id: str,
     status_update: OrderStatusUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Update order status (Admin only)"""
-    updated_order = order_service.update_order_status(db, order_id, status_update)
+    updated_order = await order_service.update_order_status_async(db, order_id, status_update)
     if not updated_order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
     return updated_order
@@ -96,11 +96,11 @@ async def update_order_status(
 async def update_payment_status(
     order_id: str,
     payment_update: PaymentStatusUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Update payment status (Admin only)"""
-    updated_order = order_service.update_payment_status(db, order_id, payment_update)
+    updated_order = await order_service.update_payment_status_async(db, order_id, payment_update)
     if not updated_order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
     return updated_order
@@ -110,12 +110,12 @@ async def update_payment_status(
 async def cancel_order(
     order_id: str,
     admin_notes: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Cancel order and restore stock (Admin only)"""
     try:
-        cancelled_order = order_service.cancel_order(db, order_id, admin_notes)
+        cancelled_order = await order_service.cancel_order_async(db, order_id, admin_notes)
         if not cancelled_order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
         return cancelled_order
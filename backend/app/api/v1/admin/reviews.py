@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from ....core.database import get_db
+from ....core.dependencies import get_admin_user, Principal
+from ....schemas.review import ReviewModeration, ReviewResponse
+from ....services import review_service
+
+router = APIRouter()
+
+
+@router.put("/{review_id}/approval", response_model=ReviewResponse)
+def moderate_review(
+    review_id: str,
+    moderation: ReviewModeration,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_admin_user)
+):
+    """Approve or hide a review (Admin only)"""
+    review = review_service.set_review_approval(db, review_id, moderation.is_approved)
+    if not review:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
+    return review
@@ -5,6 +5,8 @@ from .products import router as products_router
 from .users import router as users_router
 from .orders import router as orders_router
 from .attributes import router as attributes_router
+from .reviews import router as reviews_router
+from .slow_queries import router as slow_queries_router
 
 router = APIRouter()
 
@@ -14,4 +16,6 @@ router.include_router(commissions_router, prefix="/commissions", tags=["Admin -
 router.include_router(products_router, prefix="/products", tags=["Admin - Products"])
 router.include_router(users_router, prefix="/users", tags=["Admin - Users"])
 router.include_router(orders_router, prefix="/orders", tags=["Admin - Orders"])
-router.include_router(attributes_router, prefix="/attributes", tags=["Admin - Attributes"]) 
\ No newline at end of file
+router.include_router(attributes_router, prefix="/attributes", tags=["Admin - Attributes"])
+router.include_router(reviews_router, prefix="/reviews", tags=["Admin - Reviews"])
+router.include_router(slow_queries_router, prefix="/slow-queries", tags=["Admin - Slow Queries"])
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.concurrency import run_in_threadpool
+from typing import List
+from ....core.dependencies import get_admin_user, Principal
+from ....core.slow_query import slow_query_log
+from ....schemas.monitoring import SlowQuerySummary
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[SlowQuerySummary])
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    current_user: Principal = Depends(get_admin_user)
+):
+    """Slow statements grouped by fingerprint, most total time first (Admin only)"""
+    return await run_in_threadpool(slow_query_log.summary, limit)
+
+
+@router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries(current_user: Principal = Depends(get_admin_user)):
+    """Empty the slow query log, e.g. after adding an index (Admin only)"""
+    await run_in_threadpool(slow_query_log.clear)
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from ....core.database import get_db
-from ....core.dependencies import get_admin_user
+from ....core.dependencies import get_admin_user, invalidate_principal, Principal
 from ....models.user import User, UserRole
 from ....models.seller import Seller
 from ....schemas.user_management import (
@@ -12,48 +12,22 @@ from ....schemas.user_management import (
     SellerStatusUpdate,
     UserStats
 )
+from ....services import stats_service
 
 router = APIRouter()
 
 
 @router.get("/stats", response_model=UserStats)
-async def get_user_stats(
+def get_user_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get user statistics (Admin only)"""
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    verified_users = db.query(User).filter(User.is_verified == True).count()
-    
-    total_sellers = db.query(User).filter(User.role == UserRole.SELLER).count()
-    active_sellers = db.query(User).filter(
-        User.role == UserRole.SELLER, User.is_active == True
-    ).count()
-    # Count sellers approved (mapped from Seller.is_approved)
-    verified_sellers = db.query(User).join(Seller).filter(
-        User.role == UserRole.SELLER, Seller.is_approved == True
-    ).count()
-    
-    total_customers = db.query(User).filter(User.role == UserRole.CUSTOMER).count()
-    active_customers = db.query(User).filter(
-        User.role == UserRole.CUSTOMER, User.is_active == True
-    ).count()
-    
-    return UserStats(
-        total_users=total_users,
-        active_users=active_users,
-        verified_users=verified_users,
-        total_sellers=total_sellers,
-        active_sellers=active_sellers,
-        verified_sellers=verified_sellers,
-        total_customers=total_customers,
-        active_customers=active_customers
-    )
+    return UserStats(**stats_service.get_user_stats(db))
 
 
 @router.get("/", response_model=List[UserListResponse])
-async def get_users(
+def get_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     role: Optional[UserRole] = Query(None),
@@ -61,7 +35,7 @@ async def get_users(
     is_verified: Optional[bool] = Query(None),
     search: Optional[str] = Query(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get users with filtering (Admin only)"""
     query = db.query(User)
@@ -87,14 +61,14 @@ async def get_users(
 
 
 @router.get("/sellers", response_model=List[SellerListResponse])
-async def get_sellers(
+def get_sellers(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     is_verified: Optional[bool] = Query(None),
     is_active: Optional[bool] = Query(None),
     search: Optional[str] = Query(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get sellers with filtering (Admin only)"""
     query = db.query(Seller).join(User)
@@ -119,10 +93,10 @@ async def get_sellers(
 
 
 @router.get("/{user_id}", response_model=UserListResponse)
-async def get_user(
+def get_user(
     user_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Get user by ID (Admin only)"""
     user = db.query(User).filter(User.id == user_id).first()
@@ -132,11 +106,11 @@ async def get_user(
 
 
 @router.put("/{user_id}/status", response_model=UserListResponse)
-async def update_user_status(
+def update_user_status(
     user_id: str,
     status_update: UserStatusUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Update user status (Admin only)"""
     user = db.query(User).filter(User.id == user_id).first()
@@ -153,15 +127,17 @@ async def update_user_status(
     
     db.commit()
     db.refresh(user)
+    invalidate_principal(user.id)
+    stats_service.invalidate_stats(stats_service.USER_STATS)
     return user
 
 
 @router.put("/sellers/{seller_id}/status", response_model=SellerListResponse)
-async def update_seller_status(
+def update_seller_status(
     seller_id: str,
     status_update: SellerStatusUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Update seller verification status (Admin only)"""
     seller = db.query(Seller).filter(Seller.id == seller_id).first()
@@ -175,14 +151,15 @@ async def update_seller_status(
     
     db.commit()
     db.refresh(seller)
+    stats_service.invalidate_stats(stats_service.USER_STATS)
     return seller
 
 
 @router.delete("/{user_id}")
-async def delete_user(
+def delete_user(
     user_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """Delete user (Admin only)"""
     user = db.query(User).filter(User.id == user_id).first()
@@ -196,5 +173,7 @@ async def delete_user(
     # Soft delete
     user.is_active = False
     db.commit()
+    invalidate_principal(user.id)
+    stats_service.invalidate_stats(stats_service.USER_STATS)
     
     return {"message": "User deleted successfully"} 
\ No newline at end of file
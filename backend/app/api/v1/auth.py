@@ -1,31 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import List
-from ...core.database import get_db
-from ...core.security import create_access_token, create_refresh_token, verify_password, get_password_hash
+from ...core.database import get_db, get_async_db
+from ...core.security import create_access_token, create_refresh_token, verify_password_async, hash_password_async
 from ...models import User, Seller, UserRole
 from ...schemas.auth import UserLogin, UserCreate, SellerRegister, Token, UserResponse
 from ...core.config import settings
+from ...core.cache import cached_response, cache_response, CATEGORIES_TAG
+from ...core.dependencies import cache_principal, principal_for_user
+from ...services.stats_service import invalidate_stats, USER_STATS
 
 router = APIRouter()
 security = HTTPBearer()
 
 
-def authenticate_user(db: Session, email: str, password: str) -> User:
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> User:
     """Authenticate user with email and password"""
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).options(selectinload(User.seller)).where(User.email == email))
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    valid, new_hash = await verify_password_async(password, user.password_hash)
+    if not valid:
         return None
+    # Upgrade hashes from deprecated schemes (bcrypt) while we have the password
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
     return user
 
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Login endpoint for all user types"""
-    user = authenticate_user(db, user_credentials.email, user_credentials.password)
+    user = await authenticate_user(db, user_credentials.email, user_credentials.password)
     
     if not user:
         raise HTTPException(
@@ -40,9 +50,15 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
             detail="Inactive user"
         )
     
+    # Warm the principal cache so the first authenticated request skips the lookup
+    principal = cache_principal(principal_for_user(user))
+    
     # Create tokens
-    access_token = create_access_token(data={"sub": user.id, "role": user.role})
-    refresh_token = create_refresh_token(data={"sub": user.id, "role": user.role})
+    claims = {"sub": user.id, "role": user.role}
+    if principal.seller_id:
+        claims["seller_id"] = principal.seller_id
+    access_token = create_access_token(data=claims)
+    refresh_token = create_refresh_token(data=claims)
     
     return {
         "access_token": access_token,
@@ -53,10 +69,10 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.post("/register/customer", response_model=UserResponse)
-async def register_customer(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_customer(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new customer"""
     # Check if user already exists
-    if db.query(User).filter(User.email == user_data.email).first():
+    if await db.scalar(select(User.id).where(User.email == user_data.email)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -67,7 +83,7 @@ async def register_customer(user_data: UserCreate, db: Session = Depends(get_db)
     # Create user
     db_user = User(
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await hash_password_async(user_data.password),
         first_name=user_data.first_name,
         last_name=user_data.last_name,
         phone=user_data.phone,
@@ -76,17 +92,18 @@ async def register_customer(user_data: UserCreate, db: Session = Depends(get_db)
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    invalidate_stats(USER_STATS)
     
     return db_user
 
 
 @router.post("/register/seller", response_model=UserResponse)
-async def register_seller(seller_data: SellerRegister, db: Session = Depends(get_db)):
+async def register_seller(seller_data: SellerRegister, db: AsyncSession = Depends(get_async_db)):
     """Register a new seller"""
     # Check if user already exists
-    if db.query(User).filter(User.email == seller_data.email).first():
+    if await db.scalar(select(User.id).where(User.email == seller_data.email)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -97,7 +114,7 @@ async def register_seller(seller_data: SellerRegister, db: Session = Depends(get
     # Create user
     db_user = User(
         email=seller_data.email,
-        password_hash=get_password_hash(seller_data.password),
+        password_hash=await hash_password_async(seller_data.password),
         first_name=seller_data.first_name,
         last_name=seller_data.last_name,
         phone=seller_data.phone,
@@ -106,8 +123,8 @@ async def register_seller(seller_data: SellerRegister, db: Session = Depends(get
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     # Create seller profile
     db_seller = Seller(
@@ -122,16 +139,17 @@ async def register_seller(seller_data: SellerRegister, db: Session = Depends(get
     )
     
     db.add(db_seller)
-    db.commit()
+    await db.commit()
+    invalidate_stats(USER_STATS)
     
     return db_user
 
 
 @router.post("/register/admin", response_model=UserResponse)
-async def register_admin(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_admin(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register admin (for development only - should be protected in production)"""
     # Check if user already exists
-    if db.query(User).filter(User.email == user_data.email).first():
+    if await db.scalar(select(User.id).where(User.email == user_data.email)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -142,7 +160,7 @@ async def register_admin(user_data: UserCreate, db: Session = Depends(get_db)):
     # Create admin user
     db_user = User(
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await hash_password_async(user_data.password),
         first_name=user_data.first_name,
         last_name=user_data.last_name,
         phone=user_data.phone,
@@ -151,8 +169,9 @@ async def register_admin(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    invalidate_stats(USER_STATS)
     
     return db_user
 
@@ -167,8 +186,13 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 
 @router.get("/categories", response_model=List[dict])
-async def get_public_categories(db: Session = Depends(get_db)):
+def get_public_categories(request: Request, db: Session = Depends(get_db)):
     """Get all active categories (public endpoint for product creation)"""
+    cached = cached_response(request)
+    if cached:
+        return cached
+    
     from ...models.category import Category
     categories = db.query(Category).filter(Category.is_active == True).order_by(Category.name).all()
-    return [{"id": cat.id, "name": cat.name, "parent_id": cat.parent_id} for cat in categories] 
\ No newline at end of file
+    result = [{"id": cat.id, "name": cat.name, "parent_id": cat.parent_id} for cat in categories]
+    return cache_response(request, result, [CATEGORIES_TAG]) 
\ No newline at end of file
@@ -1,199 +1,146 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from ....core.database import get_db
-from ....core.dependencies import get_customer_user
-from ....models.user import User
-from ....models.product import Product, ProductStatus
+from ....core.cache import cached_response, cache_response, listing_tags, product_tag
+from ....core.database import get_read_db
+from ....core.dependencies import get_customer_user, Principal
+from ....core.instrumentation import query_budget
+from ....models.product import ProductStatus
 from ....schemas.product import ProductResponse, ProductListResponse
 from ....services import product_service
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[ProductListResponse])
+@router.get("/", response_model=List[ProductListResponse], dependencies=[query_budget(3)])
 async def get_all_products(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     category_id: Optional[str] = Query(None),
+    include_descendants: bool = Query(False),
     min_price: Optional[float] = Query(None, ge=0),
     max_price: Optional[float] = Query(None, ge=0),
     search: Optional[str] = Query(None),
-    sort_by: Optional[str] = Query("created_at", regex="^(created_at|price|name)$"),
+    sort_by: Optional[str] = Query(None, regex="^(relevance|created_at|price|name)$"),
     sort_order: Optional[str] = Query("desc", regex="^(asc|desc)$"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_customer_user)
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_customer_user)
 ):
     """Get all approved products for customers (Customer only)"""
-    products = product_service.get_products(
-        db, skip=skip, limit=limit,
-        category_id=category_id, status=ProductStatus.APPROVED,
-        min_price=min_price, max_price=max_price, search=search
-    )
+    cached = cached_response(request)
+    if cached:
+        return cached
     
-    # Add seller information to each product
-    result = []
-    for product in products:
-        # Get seller information
-        seller_name = "Unknown Seller"
-        seller_email = "unknown@example.com"
-        
-        if product.seller:
-            seller_name = f"{product.seller.user.first_name} {product.seller.user.last_name}"
-            seller_email = product.seller.user.email
-        
-        product_dict = {
-            "id": product.id,
-            "name": product.name,
-            "slug": product.slug,
-            "seller_id": product.seller_id,
-            "category_id": product.category_id,
-            "seller_price": float(product.seller_price),
-            "customer_price": float(product.customer_price),
-            "commission_rate": float(product.commission_rate),
-            "stock_quantity": product.stock_quantity,
-            "status": product.status,
-            "created_at": product.created_at,
-            "images": product.images,
-            "seller_name": seller_name,
-            "seller_email": seller_email
-        }
-        result.append(product_dict)
+    # Searches default to best match first
+    sort_by = product_service.resolve_sort(sort_by, search)
+    try:
+        result = await product_service.get_product_listing_async(
+            db, skip=skip, limit=limit,
+            category_id=category_id, include_descendants=include_descendants,
+            status=ProductStatus.APPROVED,
+            min_price=min_price, max_price=max_price, search=search,
+            sort_by=sort_by, sort_order=sort_order, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    # Apply sorting
-    if sort_by == "price":
-        result.sort(key=lambda x: x["customer_price"], reverse=(sort_order == "desc"))
-    elif sort_by == "name":
-        result.sort(key=lambda x: x["name"], reverse=(sort_order == "desc"))
-    else:  # created_at
-        result.sort(key=lambda x: x["created_at"], reverse=(sort_order == "desc"))
+    # Full pages carry a keyset cursor for the next page; relevance pages use skip
+    headers = {}
+    if len(result) == limit and sort_by != product_service.RELEVANCE_SORT:
+        headers["X-Next-Cursor"] = product_service.encode_product_cursor(result[-1], sort_by)
     
-    return result
+    return cache_response(request, result, listing_tags(result), headers)
 
 
-@router.get("/newly-arrived", response_model=List[ProductListResponse])
+@router.get("/newly-arrived", response_model=List[ProductListResponse], dependencies=[query_budget(3)])
 async def get_newly_arrived_products(
+    request: Request,
     days: int = Query(7, ge=1, le=30),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_customer_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_customer_user)
 ):
     """Get newly arrived products (Customer only)"""
     from datetime import datetime, timedelta
     
+    cached = cached_response(request)
+    if cached:
+        return cached
+    
     # Calculate date threshold
     threshold_date = datetime.utcnow() - timedelta(days=days)
     
-    products = db.query(Product).filter(
-        Product.status == ProductStatus.APPROVED,
-        Product.created_at >= threshold_date
-    ).order_by(Product.created_at.desc()).limit(limit).all()
-    
-    # Add seller information to each product
-    result = []
-    for product in products:
-        seller_name = "Unknown Seller"
-        seller_email = "unknown@example.com"
-        
-        if product.seller:
-            seller_name = f"{product.seller.user.first_name} {product.seller.user.last_name}"
-            seller_email = product.seller.user.email
-        
-        product_dict = {
-            "id": product.id,
-            "name": product.name,
-            "slug": product.slug,
-            "seller_id": product.seller_id,
-            "category_id": product.category_id,
-            "seller_price": float(product.seller_price),
-            "customer_price": float(product.customer_price),
-            "commission_rate": float(product.commission_rate),
-            "stock_quantity": product.stock_quantity,
-            "status": product.status,
-            "created_at": product.created_at,
-            "images": product.images,
-            "seller_name": seller_name,
-            "seller_email": seller_email
-        }
-        result.append(product_dict)
-    
-    return result
+    result = await product_service.get_product_listing_async(
+        db, limit=limit,
+        status=ProductStatus.APPROVED, created_after=threshold_date
+    )
+    return cache_response(request, result, listing_tags(result))
 
 
-@router.get("/category/{category_id}", response_model=List[ProductListResponse])
+@router.get("/category/{category_id}", response_model=List[ProductListResponse], dependencies=[query_budget(3)])
 async def get_products_by_category(
     category_id: str,
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     min_price: Optional[float] = Query(None, ge=0),
     max_price: Optional[float] = Query(None, ge=0),
     search: Optional[str] = Query(None),
-    sort_by: Optional[str] = Query("created_at", regex="^(created_at|price|name)$"),
+    sort_by: Optional[str] = Query(None, regex="^(relevance|created_at|price|name)$"),
     sort_order: Optional[str] = Query("desc", regex="^(asc|desc)$"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_customer_user)
+    cursor: Optional[str] = Query(None),
+    include_descendants: bool = Query(False),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_customer_user)
 ):
-    """Get products by category (Customer only)"""
-    products = product_service.get_products(
-        db, skip=skip, limit=limit,
-        category_id=category_id, status=ProductStatus.APPROVED,
-        min_price=min_price, max_price=max_price, search=search
-    )
+    """Get products by category, optionally including its subcategories (Customer only)"""
+    cached = cached_response(request)
+    if cached:
+        return cached
     
-    # Add seller information to each product
-    result = []
-    for product in products:
-        seller_name = "Unknown Seller"
-        seller_email = "unknown@example.com"
-        
-        if product.seller:
-            seller_name = f"{product.seller.user.first_name} {product.seller.user.last_name}"
-            seller_email = product.seller.user.email
-        
-        product_dict = {
-            "id": product.id,
-            "name": product.name,
-            "slug": product.slug,
-            "seller_id": product.seller_id,
-            "category_id": product.category_id,
-            "seller_price": float(product.seller_price),
-            "customer_price": float(product.customer_price),
-            "commission_rate": float(product.commission_rate),
-            "stock_quantity": product.stock_quantity,
-            "status": product.status,
-            "created_at": product.created_at,
-            "images": product.images,
-            "seller_name": seller_name,
-            "seller_email": seller_email
-        }
-        result.append(product_dict)
+    # Searches default to best match first
+    sort_by = product_service.resolve_sort(sort_by, search)
+    try:
+        result = await product_service.get_product_listing_async(
+            db, skip=skip, limit=limit,
+            category_id=category_id, include_descendants=include_descendants,
+            status=ProductStatus.APPROVED,
+            min_price=min_price, max_price=max_price, search=search,
+            sort_by=sort_by, sort_order=sort_order, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    # Apply sorting
-    if sort_by == "price":
-        result.sort(key=lambda x: x["customer_price"], reverse=(sort_order == "desc"))
-    elif sort_by == "name":
-        result.sort(key=lambda x: x["name"], reverse=(sort_order == "desc"))
-    else:  # created_at
-        result.sort(key=lambda x: x["created_at"], reverse=(sort_order == "desc"))
+    # Full pages carry a keyset cursor for the next page; relevance pages use skip
+    headers = {}
+    if len(result) == limit and sort_by != product_service.RELEVANCE_SORT:
+        headers["X-Next-Cursor"] = product_service.encode_product_cursor(result[-1], sort_by)
     
-    return result
+    return cache_response(request, result, listing_tags(result), headers)
 
 
-@router.get("/{product_id}", response_model=ProductResponse)
+@router.get("/{product_id}", response_model=ProductResponse, dependencies=[query_budget(5)])
 async def get_product_details(
     product_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_customer_user)
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_customer_user)
 ):
     """Get product details (Customer only)"""
-    product = product_service.get_product(db, product_id)
+    cached = cached_response(request)
+    if cached:
+        return cached
+    
+    product = await product_service.get_product_async(db, product_id)
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
     
     if product.status != ProductStatus.APPROVED:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not available")
     
-    return product
+    return cache_response(request, product, [product_tag(product_id)])
 
 
 
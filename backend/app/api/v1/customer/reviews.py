@@ -1,22 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import and_
 from typing import List, Optional
 from ....core.database import get_db
-from ....core.dependencies import get_customer_user
+from ....core.dependencies import get_customer_user, get_customer_account, Principal
+from ....core.instrumentation import query_budget
 from ....models.user import User
 from ....models.review import ProductReview
 from ....models.product import Product
 from ....schemas.review import ReviewCreate, ReviewUpdate, ReviewResponse, ReviewStats
+from ....services import review_service
 
 router = APIRouter()
 
 
 @router.post("/", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
-async def create_review(
+def create_review(
     review: ReviewCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_customer_user)
+    current_user: User = Depends(get_customer_account)
 ):
     """Create a product review (Customer only)"""
     # Check if product exists and is approved
@@ -38,17 +40,8 @@ async def create_review(
             detail="You have already reviewed this product"
         )
     
-    # Create review
-    db_review = ProductReview(
-        product_id=review.product_id,
-        customer_id=current_user.id,
-        rating=review.rating,
-        comment=review.comment
-    )
-    
-    db.add(db_review)
-    db.commit()
-    db.refresh(db_review)
+    # Create review and count it towards the product's rating
+    db_review = review_service.create_review(db, review, current_user.id)
     
     # Add customer name to response
     review_response = ReviewResponse(
@@ -66,19 +59,16 @@ async def create_review(
     return review_response
 
 
-@router.get("/product/{product_id}", response_model=List[ReviewResponse])
-async def get_product_reviews(
+@router.get("/product/{product_id}", response_model=List[ReviewResponse], dependencies=[query_budget(2)])
+def get_product_reviews(
     product_id: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_customer_user)
+    current_user: Principal = Depends(get_customer_user)
 ):
     """Get reviews for a specific product (Customer only)"""
-    reviews = db.query(ProductReview).filter(
-        ProductReview.product_id == product_id,
-        ProductReview.is_approved == True
-    ).order_by(ProductReview.created_at.desc()).offset(skip).limit(limit).all()
+    reviews = review_service.get_product_reviews(db, product_id, skip, limit)
     
     # Add customer names to responses
     result = []
@@ -100,57 +90,28 @@ async def get_product_reviews(
 
 
 @router.get("/product/{product_id}/stats", response_model=ReviewStats)
-async def get_product_review_stats(
+def get_product_review_stats(
     product_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_customer_user)
+    current_user: Principal = Depends(get_customer_user)
 ):
     """Get review statistics for a product (Customer only)"""
-    # Check if product exists
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+    stats = review_service.get_rating_stats(db, product_id)
+    if stats is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
     
-    # Get approved reviews
-    reviews = db.query(ProductReview).filter(
-        ProductReview.product_id == product_id,
-        ProductReview.is_approved == True
-    ).all()
-    
-    if not reviews:
-        return ReviewStats(
-            average_rating=0.0,
-            total_reviews=0,
-            rating_breakdown={1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-        )
-    
-    # Calculate statistics
-    total_reviews = len(reviews)
-    average_rating = sum(review.rating for review in reviews) / total_reviews
-    
-    # Rating breakdown
-    rating_breakdown = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-    for review in reviews:
-        rating_breakdown[review.rating] += 1
-    
-    return ReviewStats(
-        average_rating=round(average_rating, 1),
-        total_reviews=total_reviews,
-        rating_breakdown=rating_breakdown
-    )
+    return ReviewStats(**stats)
 
 
 @router.get("/my-reviews", response_model=List[ReviewResponse])
-async def get_my_reviews(
+def get_my_reviews(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_customer_user)
+    current_user: User = Depends(get_customer_account)
 ):
     """Get current customer's reviews (Customer only)"""
-    reviews = db.query(ProductReview).filter(
-        ProductReview.customer_id == current_user.id
-    ).order_by(ProductReview.created_at.desc()).offset(skip).limit(limit).all()
+    reviews = review_service.get_customer_reviews(db, current_user.id, skip, limit)
     
     # Add customer names to responses
     result = []
@@ -172,11 +133,11 @@ async def get_my_reviews(
 
 
 @router.put("/{review_id}", response_model=ReviewResponse)
-async def update_review(
+def update_review(
     review_id: str,
     review_update: ReviewUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_customer_user)
+    current_user: User = Depends(get_customer_account)
 ):
     """Update a review (Customer only)"""
     review = db.query(ProductReview).filter(
@@ -187,14 +148,7 @@ async def update_review(
     if not review:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
     
-    # Update review fields
-    if review_update.rating is not None:
-        review.rating = review_update.rating
-    if review_update.comment is not None:
-        review.comment = review_update.comment
-    
-    db.commit()
-    db.refresh(review)
+    review = review_service.update_review(db, review, review_update)
     
     # Add customer name to response
     review_response = ReviewResponse(
@@ -213,10 +167,10 @@ async def update_review(
 
 
 @router.delete("/{review_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_review(
+def delete_review(
     review_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_customer_user)
+    current_user: Principal = Depends(get_customer_user)
 ):
     """Delete a review (Customer only)"""
     review = db.query(ProductReview).filter(
@@ -227,8 +181,7 @@ async def delete_review(
     if not review:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
     
-    db.delete(review)
-    db.commit()
+    review_service.delete_review(db, review)
     
     return None
 
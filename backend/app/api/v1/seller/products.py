@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ....core.database import get_db
-from ....core.dependencies import get_seller_user
-from ....models.user import User
+from ....core.database import get_db, get_async_db, get_read_db
+from ....core.dependencies import get_seller_user, Principal
+from ....core.instrumentation import expect_repeated_queries
 from ....models.product import ProductStatus
-from ....schemas.product import ProductCreate, ProductUpdate, ProductResponse, ProductListResponse
-from ....services import product_service
+from ....schemas.product import (
+    ProductCreate, ProductUpdate, ProductResponse, ProductListResponse, ProductImportReport, ProductImageResponse
+)
+from ....services import product_service, import_service, image_service
+import io
 
 router = APIRouter()
 
@@ -14,85 +19,120 @@ router = APIRouter()
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product: ProductCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_seller_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_seller_user)
 ):
     """Create a new product (Seller only)"""
     try:
-        db_product = product_service.create_product(db, product, current_user.seller.id)
+        db_product = await product_service.create_product_async(db, product, current_user.seller_id)
         return db_product
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post("/import", response_model=ProductImportReport, dependencies=[expect_repeated_queries()])
+async def import_products(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, regex="^(csv|jsonl)$"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_seller_user)
+):
+    """Bulk import products from a CSV or JSONL file (Seller only)"""
+    fmt = format or import_service.detect_format(file.filename)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not tell the file format; pass format=csv or format=jsonl"
+        )
+    
+    # The upload is read line by line off the spooled file in a worker thread
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return await run_in_threadpool(
+            import_service.import_products, db, lines, fmt, current_user.seller_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.get("/", response_model=List[ProductListResponse])
 async def get_my_products(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     status: Optional[ProductStatus] = Query(None),
     search: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_seller_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_seller_user)
 ):
     """Get seller's own products (Seller only)"""
-    products = product_service.get_products(
+    return await product_service.get_product_listing_async(
         db, skip=skip, limit=limit,
-        seller_id=current_user.seller.id,
+        seller_id=current_user.seller_id,
         status=status, search=search
     )
-    
-    # Add seller information to each product
-    result = []
-    for product in products:
-        product_dict = {
-            "id": product.id,
-            "name": product.name,
-            "slug": product.slug,
-            "seller_id": product.seller_id,
-            "category_id": product.category_id,
-            "seller_price": float(product.seller_price),
-            "customer_price": float(product.customer_price),
-            "commission_rate": float(product.commission_rate),
-            "stock_quantity": product.stock_quantity,
-            "status": product.status,
-            "created_at": product.created_at,
-            "images": product.images,
-            "seller_name": f"{current_user.first_name} {current_user.last_name}",
-            "seller_email": current_user.email
-        }
-        result.append(product_dict)
-    
-    return result
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_my_product(
     product_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_seller_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_seller_user)
 ):
     """Get seller's own product by ID (Seller only)"""
-    product = product_service.get_product(db, product_id)
+    product = await product_service.get_product_async(db, product_id)
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
     
     # Check if seller owns the product
-    if product.seller_id != current_user.seller.id:
+    if product.seller_id != current_user.seller_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this product")
     
     return product
 
 
+@router.post("/{product_id}/images", response_model=ProductImageResponse, status_code=status.HTTP_201_CREATED)
+async def upload_product_image(
+    product_id: str,
+    image: UploadFile = File(...),
+    alt_text: Optional[str] = Form(None),
+    sort_order: int = Form(0),
+    is_primary: bool = Form(False),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_seller_user)
+):
+    """Upload a product image with thumbnail, medium and large WebP renditions (Seller only)"""
+    try:
+        urls = await image_service.store_product_image(image)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    try:
+        db_image = await product_service.add_product_image_async(
+            db, product_id, urls,
+            alt_text=alt_text, sort_order=sort_order, is_primary=is_primary,
+            seller_id=current_user.seller_id
+        )
+    except ValueError as e:
+        await image_service.remove_files(*(image_service.stored_path(url) for url in urls.values()))
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    
+    if not db_image:
+        await image_service.remove_files(*(image_service.stored_path(url) for url in urls.values()))
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    
+    return db_image
+
+
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_my_product(
     product_id: str,
     product_update: ProductUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_seller_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_seller_user)
 ):
     """Update seller's own product (Seller only)"""
     try:
-        updated_product = product_service.update_product(db, product_id, product_update, current_user.seller.id)
+        updated_product = await product_service.update_product_async(db, product_id, product_update, current_user.seller_id)
         if not updated_product:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
         return updated_product
@@ -103,12 +143,12 @@ async def update_my_product(
 @router.delete("/{product_id}")
 async def delete_my_product(
     product_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_seller_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_seller_user)
 ):
     """Delete seller's own product (Seller only)"""
     try:
-        deleted = product_service.delete_product(db, product_id, current_user.seller.id)
+        deleted = await product_service.delete_product_async(db, product_id, current_user.seller_id)
         if not deleted:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
         return {"message": "Product deleted successfully"}
@@ -118,23 +158,23 @@ async def delete_my_product(
 
 @router.get("/pending/count")
 async def get_pending_products_count(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_seller_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_seller_user)
 ):
     """Get count of seller's pending products (Seller only)"""
-    products = product_service.get_products(
-        db, seller_id=current_user.seller.id, status=ProductStatus.PENDING, limit=1000
+    count = await product_service.count_products_async(
+        db, seller_id=current_user.seller_id, status=ProductStatus.PENDING
     )
-    return {"count": len(products)}
+    return {"count": count}
 
 
 @router.get("/approved/count")
 async def get_approved_products_count(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_seller_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_seller_user)
 ):
     """Get count of seller's approved products (Seller only)"""
-    products = product_service.get_products(
-        db, seller_id=current_user.seller.id, status=ProductStatus.APPROVED, limit=1000
+    count = await product_service.count_products_async(
+        db, seller_id=current_user.seller_id, status=ProductStatus.APPROVED
     )
-    return {"count": len(products)} 
\ No newline at end of file
+    return {"count": count} 
\ No newline at end of file
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
-from ....core.database import get_db
-from ....core.dependencies import get_seller_user
+from ....core.database import get_db, get_async_db
+from ....core.security import HashingBusyError
+from ....core.dependencies import get_seller_user, get_seller_account, invalidate_principal, Principal
 from ....models.user import User
 from ....schemas.profile import ProfileUpdate, PasswordUpdate, ProfileResponse
 from ....services import profile_service
@@ -12,7 +15,7 @@ router = APIRouter()
 
 @router.get("/", response_model=ProfileResponse)
 async def get_profile(
-    current_user: User = Depends(get_seller_user)
+    current_user: User = Depends(get_seller_account)
 ):
     """Get current seller's profile information"""
     return current_user
@@ -26,7 +29,7 @@ async def update_profile(
     pincode: Optional[str] = Form(None),
     profile_picture: Optional[UploadFile] = File(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_seller_user)
+    current_user: User = Depends(get_seller_account)
 ):
     """Update seller's profile information"""
     try:
@@ -47,19 +50,8 @@ async def update_profile(
                     detail="Only image files are allowed"
                 )
             
-            # Validate file size (2MB limit)
-            file_content = await profile_picture.read()
-            if len(file_content) > 2 * 1024 * 1024:  # 2MB
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="File size must be less than 2MB"
-                )
-            
-            # Save the image
-            file_path = profile_service.save_profile_image(
-                file_content, 
-                profile_picture.filename
-            )
+            # Stream the image to disk, stopping at the 2MB limit
+            file_path = await profile_service.save_profile_image(profile_picture)
             profile_data.profile_picture = file_path
             
             # Delete old profile picture if exists
@@ -67,13 +59,14 @@ async def update_profile(
                 profile_service.delete_profile_image(current_user.profile_picture)
         
         # Update profile
-        updated_user = profile_service.update_profile(db, current_user.id, profile_data)
+        updated_user = await run_in_threadpool(profile_service.update_profile, db, current_user.id, profile_data)
         if not updated_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
+        invalidate_principal(current_user.id)
         return updated_user
         
     except ValueError as e:
@@ -91,12 +84,12 @@ async def update_profile(
 @router.put("/password")
 async def update_password(
     password_data: PasswordUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_seller_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_seller_user)
 ):
     """Update seller's password"""
     try:
-        success = profile_service.update_password(db, current_user.id, password_data)
+        success = await profile_service.update_password(db, current_user.id, password_data)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -105,6 +98,8 @@ async def update_password(
         
         return {"message": "Password updated successfully"}
         
+    except HashingBusyError:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -118,9 +113,9 @@ async def update_password(
 
 
 @router.delete("/profile-picture")
-async def delete_profile_picture(
+def delete_profile_picture(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_seller_user)
+    current_user: User = Depends(get_seller_account)
 ):
     """Delete seller's profile picture"""
     try:
@@ -0,0 +1,197 @@
+from abc import ABC, abstractmethod
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+from collections import OrderedDict
+from urllib.parse import urlencode
+from .config import settings
+from .database import replica_router
+import hashlib
+import threading
+import time
+
+
+class CachedResponse(NamedTuple):
+    """A serialized JSON response body with its validator and extra headers"""
+    body: bytes
+    etag: str
+    headers: Dict[str, str]
+
+
+class CacheBackend(ABC):
+    """Storage for cached responses, indexed by key and by tag.
+
+    The in-process backend is the default; a shared store (for example
+    Redis) can be plugged in with set_cache_backend by implementing these
+    methods.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CachedResponse]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: CachedResponse, tags: Iterable[str], ttl: int) -> None:
+        ...
+
+    @abstractmethod
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def metrics(self) -> dict:
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Size-bounded LRU cache with per-entry expiry and a tag index"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: CachedResponse, tags: Iterable[str], ttl: int) -> None:
+        tags = tuple(tags)
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_backend: CacheBackend = MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+def set_cache_backend(backend: CacheBackend) -> None:
+    """Replace the response cache store"""
+    global _backend
+    _backend = backend
+
+
+def get_cache_backend() -> CacheBackend:
+    return _backend
+
+
+def cache_key(request: Request) -> str:
+    """Route path plus query parameters in a canonical order"""
+    params = sorted((key, value) for key, value in request.query_params.multi_items() if value != "")
+    return f"{request.url.path}?{urlencode(params)}"
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _respond(request: Request, entry: CachedResponse) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", **entry.headers}
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def cached_response(request: Request) -> Optional[Response]:
+    """Serve a request from the cache, or None on a miss"""
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    entry = _backend.get(cache_key(request))
+    if entry is None:
+        return None
+    return _respond(request, entry)
+
+
+def cache_response(
+    request: Request,
+    content,
+    tags: List[str],
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Serialize a response body, store it under the request's key and tags,
+    and answer the request (with 304 when the client's ETag still matches)"""
+    body = JSONResponse(content=jsonable_encoder(content)).body
+    entry = CachedResponse(
+        body=body,
+        etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+        headers=headers or {}
+    )
+    # A replica may still serve rows from before a recent invalidation
+    replica_read = getattr(request.state, "replica_read", False)
+    if settings.RESPONSE_CACHE_ENABLED and (not replica_read or replica_router.replica_reads_cacheable()):
+        _backend.set(cache_key(request), entry, tags, settings.RESPONSE_CACHE_TTL_SECONDS)
+    return _respond(request, entry)
+
+
+def invalidate_tags(*tags: str) -> None:
+    """Purge cached responses carrying any of the given tags"""
+    _backend.invalidate_tags(tags)
+    replica_router.mark_invalidation()
+
+
+# Tags shared by the catalogue endpoints and the services that write to them
+PRODUCTS_TAG = "products"
+CATEGORIES_TAG = "categories"
+ATTRIBUTES_TAG = "attributes"
+
+
+def product_tag(product_id: str) -> str:
+    return f"product:{product_id}"
+
+
+def listing_tags(rows: Iterable[dict]) -> List[str]:
+    """Tags for a cached product listing page: the catalogue plus each product on it.
+
+    Changes to one product (such as its stock after an order) purge only the
+    pages that show it; other pages expire on their TTL.
+    """
+    return [PRODUCTS_TAG, *(product_tag(row["id"]) for row in rows)]
@@ -11,6 +11,41 @@ class Settings(BaseSettings):
     
     # Database Configuration
     DATABASE_URL: str = "sqlite:///./marketplace.db"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a free connection
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    
+    # Read replicas for read-only endpoints, comma-separated
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_SELECTION: str = "round_robin"  # or "least_connections"
+    REPLICA_STICKY_SECONDS: int = 5  # Reads go to the primary this long after a user's write
+    REPLICA_RETRY_SECONDS: int = 30  # Skip a replica this long after it fails to connect
+    
+    # SQLite connection tuning (ignored on other databases)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    
+    # Per-request SQL instrumentation (Server-Timing header and N+1 warnings)
+    SQL_INSTRUMENTATION_ENABLED: bool = True
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5  # Identical statements per request before warning
+    SQL_QUERY_BUDGET: int = 0  # Default statements allowed per request; 0 = no budget
+    SQL_STRICT_MODE: bool = False  # Record query budget overruns for tests to assert on
+    
+    # Slow query log (statements past the threshold, with their query plan)
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: int = 200
+    SLOW_QUERY_LOG_PATH: str = "logs/slow_queries.jsonl"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS: int = 5
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: int = 300  # Re-capture a fingerprint's plan at most this often
+    
+    # Metrics and health checks
+    METRICS_ENABLED: bool = True  # Prometheus text exposition on /metrics
+    HEALTH_DB_MAX_LATENCY_MS: int = 250  # /health/ready reports not ready above this
+    HEALTH_DB_TIMEOUT_SECONDS: float = 2.0
     
     # JWT Configuration
     JWT_SECRET_KEY: str = "your-super-secret-jwt-key-change-this-in-production"
@@ -18,6 +53,17 @@ class Settings(BaseSettings):
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Password hashing pool
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Further logins/registrations get 503 until the queue drains
+    
+    # Authenticated principal cache
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    # Trust role claims in access tokens instead of looking users up; a
+    # deactivated user keeps access until their token expires
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+    
     # CORS Configuration
     BACKEND_CORS_ORIGINS: list = [
         "http://localhost:3000", 
@@ -36,6 +82,8 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 5 * 1024 * 1024  # 5MB
     ALLOWED_IMAGE_TYPES: list = [".jpg", ".jpeg", ".png", ".gif", ".webp"]
+    PROFILE_IMAGE_MAX_SIZE: int = 2 * 1024 * 1024  # 2MB
+    IMAGE_PROCESS_WORKERS: int = 2  # Processes resizing uploads into WebP renditions
     
     # Pagination
     DEFAULT_PAGE_SIZE: int = 20
@@ -45,6 +93,19 @@ class Settings(BaseSettings):
     DEFAULT_COMMISSION_RATE: float = 8.0  # 8%
     MIN_COMMISSION_RATE: float = 0.0
     MAX_COMMISSION_RATE: float = 30.0
+    COMMISSION_RULES_TTL_SECONDS: int = 300  # Rebuild cached rule table at least this often
+    
+    # Category tree and attribute schema caches
+    CATEGORY_TREE_TTL_SECONDS: int = 300
+    ATTRIBUTE_SCHEMA_TTL_SECONDS: int = 300
+    
+    # Public catalogue response cache
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 5000
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+    
+    # Dashboard statistics cache
+    STATS_CACHE_TTL_SECONDS: int = 30
     
     # Admin Configuration
     ADMIN_EMAIL: str = "admin@marketplace.com"
@@ -1,17 +1,248 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from typing import Callable, Optional, Dict, List
 from .config import settings
+from .instrumentation import instrument_engine, add_statement_observer
+from .slow_query import slow_query_log
+from .security import request_token_payload
+import functools
+import itertools
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """Checkout counts and time spent waiting for a pooled connection"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+    
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+    
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            metrics = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "average_wait_seconds": self.total_wait_seconds / self.checkouts if self.checkouts else 0.0,
+                "max_wait_seconds": self.max_wait_seconds
+            }
+        # Live occupancy, for queue pools
+        if hasattr(pool, "checkedout"):
+            metrics.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "idle": pool.checkedin()
+            })
+        return metrics
+
+
+class _MeteredPoolMixin:
+    """Times every connection checkout, including waits for a free slot.
+    
+    Metrics live on the pool class so they survive the pool being recreated
+    by engine.dispose(); each engine uses its own pool class.
+    """
+    metrics: PoolMetrics
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    metrics = PoolMetrics()
+
+
+class MeteredAsyncQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+
+def _engine_options(database_url: str, pool_class) -> dict:
+    """Pool and driver options for an engine, from Settings"""
+    url = make_url(database_url)
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        # In-memory databases need a single shared connection, not a queue
+        if url.database in (None, "", ":memory:"):
+            return options
+    options.update({
+        "poolclass": pool_class,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE
+    })
+    return options
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Tune each new SQLite connection for concurrent readers and one writer"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    # Negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cursor.close()
+
+
+def _configure(sync_engine: Engine) -> None:
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", _apply_sqlite_pragmas)
+    if settings.SQL_INSTRUMENTATION_ENABLED or settings.SLOW_QUERY_LOG_ENABLED:
+        instrument_engine(sync_engine)
+
+
+if settings.SLOW_QUERY_LOG_ENABLED:
+    add_statement_observer(slow_query_log.observe)
+
 
 # Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL, MeteredQueuePool))
+_configure(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers used for each sync database URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(database_url: str) -> str:
+    """Swap a database URL's driver for its async counterpart"""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        return database_url
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# Async engine and session factory for routers; objects stay loaded after
+# commit because expired attributes cannot be refreshed outside an await
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    **_engine_options(settings.DATABASE_URL, MeteredAsyncQueuePool)
+)
+_configure(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+
+class Replica:
+    """An async engine for one read replica and its live usage"""
+    
+    def __init__(self, database_url: str):
+        self.engine = create_async_engine(
+            async_database_url(database_url),
+            **_engine_options(database_url, AsyncAdaptedQueuePool)
+        )
+        _configure(self.engine.sync_engine)
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False, autoflush=False)
+        self.in_use = 0
+        self.down_until = 0.0
+    
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+
+class ReplicaRouter:
+    """Picks the database for read-only requests.
+    
+    Reads go to a replica chosen round-robin or by fewest sessions in use.
+    A user's reads stick to the primary for REPLICA_STICKY_SECONDS after they
+    write, so they always see their own changes, and replicas that fail to
+    connect are skipped for REPLICA_RETRY_SECONDS. For the same window after
+    a process-wide cache is invalidated, replica reads are not cached, so a
+    lagging replica cannot refill it with the rows the invalidation dropped.
+    """
+    
+    def __init__(self, replica_urls: List[str]):
+        self.replicas = [Replica(url) for url in replica_urls]
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._sticky: Dict[str, float] = {}
+        self._invalidated_until = 0.0
+    
+    def mark_write(self, user_key: str) -> None:
+        """Route a user's reads to the primary for the stickiness window"""
+        now = time.monotonic()
+        with self._lock:
+            self._sticky[user_key] = now + settings.REPLICA_STICKY_SECONDS
+            if len(self._sticky) > 10000:
+                self._sticky = {key: until for key, until in self._sticky.items() if until > now}
+    
+    def is_sticky(self, user_key: Optional[str]) -> bool:
+        return user_key is not None and self._sticky.get(user_key, 0.0) > time.monotonic()
+    
+    def mark_invalidation(self) -> None:
+        """Keep replica reads out of shared caches until replicas have caught up with a write"""
+        if self.replicas:
+            self._invalidated_until = time.monotonic() + settings.REPLICA_STICKY_SECONDS
+    
+    def replica_reads_cacheable(self) -> bool:
+        return time.monotonic() >= self._invalidated_until
+    
+    def choose(self) -> Optional[Replica]:
+        """Pick an available replica, or None to use the primary"""
+        candidates = [replica for replica in self.replicas if replica.available]
+        if not candidates:
+            return None
+        if settings.REPLICA_SELECTION == "least_connections":
+            return min(candidates, key=lambda replica: replica.in_use)
+        return candidates[next(self._next) % len(candidates)]
+    
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+replica_router = ReplicaRouter([url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()])
+
+
+def get_pool_metrics() -> Dict[str, dict]:
+    """Connection pool checkout, wait and occupancy metrics per engine"""
+    metrics = {}
+    for name, pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+        # In-memory SQLite uses an unmetered single-connection pool
+        if isinstance(pool, _MeteredPoolMixin):
+            metrics[name] = pool.metrics.snapshot(pool)
+    return metrics
+
+
 # Create base class for models
 Base = declarative_base()
 
@@ -25,7 +256,86 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Async database dependency for FastAPI"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def request_user_key(request: Request) -> Optional[str]:
+    """The authenticated user ID behind a request, if it carries a valid token"""
+    payload = request_token_payload(request)
+    return payload.get("sub") if payload else None
+
+
+def reads_cacheable(db) -> bool:
+    """Whether rows read through a session may be stored in process-wide caches"""
+    return not db.info.get("replica") or replica_router.replica_reads_cacheable()
+
+
+async def get_read_db(request: Request):
+    """Async database dependency for read-only endpoints, served from a replica when possible"""
+    replica = None
+    if not replica_router.is_sticky(request_user_key(request)):
+        replica = replica_router.choose()
+    
+    if replica is not None:
+        db = replica.sessionmaker()
+        try:
+            # Connect now so an unreachable replica falls back to the primary
+            await db.connection()
+        except (OperationalError, OSError) as e:
+            await db.close()
+            replica.down_until = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+            logger.warning("Read replica unavailable, using primary: %s", e)
+            replica = None
+        else:
+            db.info["replica"] = True
+            request.state.replica_read = True
+            replica.in_use += 1
+            try:
+                yield db
+            finally:
+                replica.in_use -= 1
+                await db.close()
+            return
+    
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def async_service(func: Callable, response_model: Optional[type] = None) -> Callable:
+    """Build an async variant of a sync service function for AsyncSession callers.
+    
+    The function runs on the session's connection through SQLAlchemy's
+    greenlet bridge, so the event loop keeps serving other requests while the
+    driver waits on the database. ORM results are converted to
+    `response_model` before returning, because relationships cannot be lazy
+    loaded once control is back on the event loop.
+    """
+    def convert(result):
+        if response_model is None:
+            return result
+        if isinstance(result, list):
+            return [convert(item) for item in result]
+        if isinstance(result, Base):
+            return response_model.model_validate(result)
+        return result
+    
+    @functools.wraps(func)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(lambda session: convert(func(session, *args, **kwargs)))
+    
+    return wrapper
+
+
 def create_database():
     """Create all database tables"""
     Base.metadata.create_all(bind=engine)
+    
+    # create_all skips tables that already exist, so add any indexes
+    # introduced after those tables were first created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
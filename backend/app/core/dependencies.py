@@ -1,52 +1,171 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Optional
-from .database import get_db
-from .security import verify_token
+from typing import Optional, NamedTuple
+from collections import OrderedDict
+from .config import settings
+from .database import get_db, get_async_db
+from .security import request_token_payload
 from ..models.user import User
+from ..models.seller import Seller
+import threading
+import time
 
 # HTTP Bearer token security
 security = HTTPBearer()
 
 
-async def get_current_user(
+class Principal(NamedTuple):
+    """The slice of a user that authorization checks need"""
+    id: str
+    role: str
+    is_active: bool
+    seller_id: Optional[str] = None
+
+
+# user_id -> (expires_at, principal), least recently used first
+_principals: "OrderedDict[str, tuple]" = OrderedDict()
+_principals_lock = threading.Lock()
+
+
+def cache_principal(principal: Principal) -> Principal:
+    """Store a principal, evicting the least recently used entries when full"""
+    with _principals_lock:
+        _principals[principal.id] = (time.monotonic() + settings.PRINCIPAL_CACHE_TTL_SECONDS, principal)
+        _principals.move_to_end(principal.id)
+        while len(_principals) > settings.PRINCIPAL_CACHE_SIZE:
+            _principals.popitem(last=False)
+    return principal
+
+
+def invalidate_principal(user_id: Optional[str] = None) -> None:
+    """Drop a user's cached principal after it changes (all when no ID is given)"""
+    with _principals_lock:
+        if user_id is None:
+            _principals.clear()
+        else:
+            _principals.pop(user_id, None)
+
+
+def principal_for_user(user: User) -> Principal:
+    """Build a principal from a loaded user"""
+    return Principal(
+        id=user.id,
+        role=getattr(user.role, "value", user.role),
+        is_active=user.is_active,
+        seller_id=user.seller.id if user.seller else None
+    )
+
+
+def load_principal(db: Session, user_id: str) -> Optional[Principal]:
+    """Get a user's principal, from the cache or with one query"""
+    with _principals_lock:
+        entry = _principals.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            _principals.move_to_end(user_id)
+            return entry[1]
+
+    row = (
+        db.query(User.id, User.role, User.is_active, Seller.id.label("seller_id"))
+        .outerjoin(Seller, Seller.user_id == User.id)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if row is None:
+        return None
+
+    return cache_principal(Principal(
+        id=row.id,
+        role=getattr(row.role, "value", row.role),
+        is_active=row.is_active,
+        seller_id=row.seller_id
+    ))
+
+
+def _principal_from_claims(payload: dict) -> Optional[Principal]:
+    """Build a principal from signed access-token claims, if they carry a role.
+
+    Seller tokens must also carry seller_id; without it the principal is
+    loaded from the database instead.
+    """
+    if payload.get("type") != "access" or not payload.get("role"):
+        return None
+    if payload["role"] == "seller" and not payload.get("seller_id"):
+        return None
+    return Principal(
+        id=payload["sub"],
+        role=payload["role"],
+        is_active=True,
+        seller_id=payload.get("seller_id")
+    )
+
+
+async def get_current_principal(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Get the authenticated principal without loading the full user.
+
+    Principals come from the in-process cache, falling back to one query on a
+    miss. With AUTH_TRUST_TOKEN_CLAIMS the signed role claims in the access
+    token are used as-is and the database is not consulted at all.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
-    token = credentials.credentials
-    payload = verify_token(token)
-    
+
+    # Decoded once per request and shared with the replica router
+    payload = request_token_payload(request)
+
     if payload is None:
         raise credentials_exception
-    
+
     user_id: str = payload.get("sub")
     if user_id is None:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+
+    principal = _principal_from_claims(payload) if settings.AUTH_TRUST_TOKEN_CLAIMS else None
+    if principal is None:
+        principal = await db.run_sync(load_principal, user_id)
+    if principal is None:
         raise credentials_exception
-    
-    if not user.is_active:
+
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
         )
-    
+
+    return principal
+
+
+def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user with the full user row.
+
+    Sync so FastAPI runs it in the threadpool, and on the same session as
+    the routes that modify the returned user.
+    """
+    user = db.query(User).filter(User.id == principal.id).first()
+    if user is None or not user.is_active:
+        invalidate_principal(principal.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_principal)
+) -> Principal:
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(
@@ -57,8 +176,8 @@ async def get_current_active_user(
 
 
 async def get_admin_user(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    current_user: Principal = Depends(get_current_active_user)
+) -> Principal:
     """Ensure current user is admin"""
     if current_user.role != "admin":
         raise HTTPException(
@@ -69,20 +188,26 @@ async def get_admin_user(
 
 
 async def get_seller_user(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
-    """Ensure current user is seller"""
+    current_user: Principal = Depends(get_current_active_user)
+) -> Principal:
+    """Ensure current user is seller with a seller profile"""
     if current_user.role != "seller":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
+    # Seller routes scope every query by seller_id, so it must never be missing
+    if current_user.seller_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Seller profile not found"
+        )
     return current_user
 
 
 async def get_customer_user(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    current_user: Principal = Depends(get_current_active_user)
+) -> Principal:
     """Ensure current user is customer"""
     if current_user.role != "customer":
         raise HTTPException(
@@ -93,8 +218,8 @@ async def get_customer_user(
 
 
 def get_admin_or_seller_user(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    current_user: Principal = Depends(get_current_active_user)
+) -> Principal:
     """Ensure current user is admin or seller"""
     if current_user.role not in ["admin", "seller"]:
         raise HTTPException(
@@ -103,3 +228,18 @@ def get_admin_or_seller_user(
         )
     return current_user
 
+
+def get_seller_account(
+    current_user: Principal = Depends(get_seller_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """Ensure current user is seller and load the full user row"""
+    return get_current_user(current_user, db)
+
+
+def get_customer_account(
+    current_user: Principal = Depends(get_customer_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """Ensure current user is customer and load the full user row"""
+    return get_current_user(current_user, db)
@@ -0,0 +1,162 @@
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typing import Callable, Dict, List, Optional
+from collections import Counter
+from contextvars import ContextVar
+from .config import settings
+import logging
+import re
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestQueryStats:
+    """Statements run and database time spent while serving one request"""
+
+    def __init__(self, budget: Optional[int] = None):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.budget = budget
+        self.expect_repeats = False
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[tuple]:
+        """Statement shapes run at least `threshold` times, most frequent first"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+# Callbacks run after every timed statement (e.g. the slow query log)
+_statement_observers: List[Callable] = []
+
+# Budget overruns recorded under SQL_STRICT_MODE, for tests to assert on
+_strict_violations: List[dict] = []
+_strict_lock = threading.Lock()
+
+
+# A parenthesised list of bind placeholders, as rendered for IN (...)
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """Collapse whitespace and IN-list expansions so repeats of one query compare equal"""
+    return _PLACEHOLDER_LIST.sub("(?)", re.sub(r"\s+", " ", statement).strip())
+
+
+def start_request() -> RequestQueryStats:
+    """Begin collecting statements for the current request"""
+    stats = RequestQueryStats(settings.SQL_QUERY_BUDGET or None)
+    _current.set(stats)
+    return stats
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+
+def query_budget(limit: int) -> Callable:
+    """Route dependency capping the statements a route may run per request.
+
+    Exceeding it is logged, and recorded for take_strict_violations() when
+    SQL_STRICT_MODE is on.
+    """
+    def apply_budget():
+        stats = _current.get()
+        if stats is not None:
+            stats.budget = limit
+    return Depends(apply_budget)
+
+
+def expect_repeated_queries() -> Callable:
+    """Route dependency for batch endpoints whose per-chunk statements repeat by design"""
+    def mark_batch():
+        stats = _current.get()
+        if stats is not None:
+            stats.expect_repeats = True
+    return Depends(mark_batch)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    for observer in _statement_observers:
+        observer(conn, cursor, statement, parameters, executemany, elapsed)
+
+
+def _handle_error(exception_context):
+    # Keep the timing stack balanced when a statement fails
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def add_statement_observer(observer: Callable) -> None:
+    """Call `observer(conn, cursor, statement, parameters, executemany, seconds)` after each statement"""
+    if observer not in _statement_observers:
+        _statement_observers.append(observer)
+
+
+def instrument_engine(sync_engine: Engine) -> None:
+    """Time every statement an engine runs"""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def server_timing(stats: RequestQueryStats, total_seconds: float) -> str:
+    """Server-Timing header value for a finished request"""
+    return (
+        f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", '
+        f"app;dur={total_seconds * 1000:.1f}"
+    )
+
+
+def report(method: str, path: str, stats: RequestQueryStats) -> Dict[str, object]:
+    """Log suspected N+1 patterns and budget overruns for a request.
+
+    The response itself is never changed: by now the route may have
+    committed, so failing it would only invite a duplicate retry. In strict
+    mode budget overruns are recorded for tests instead.
+    """
+    problems: Dict[str, object] = {}
+    repeated = [] if stats.expect_repeats else stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD)
+    if repeated:
+        problems["repeated_statements"] = repeated
+        for shape, count in repeated:
+            logger.warning("Suspected N+1 in %s %s: %dx %s", method, path, count, shape[:200])
+    if stats.over_budget():
+        problems["query_budget"] = {"budget": stats.budget, "queries": stats.count}
+        logger.warning("Query budget exceeded in %s %s: %d queries (budget %d)", method, path, stats.count, stats.budget)
+        if settings.SQL_STRICT_MODE:
+            with _strict_lock:
+                _strict_violations.append({"method": method, "path": path, **problems["query_budget"]})
+    return problems
+
+
+def take_strict_violations() -> List[dict]:
+    """Return and forget the budget overruns recorded in strict mode"""
+    with _strict_lock:
+        violations = list(_strict_violations)
+        _strict_violations.clear()
+    return violations
@@ -0,0 +1,243 @@
+from starlette.routing import Match
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+from .cache import get_cache_backend
+from .database import get_pool_metrics
+from .security import password_hasher
+import bisect
+import math
+import threading
+
+
+# Request latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _family(name: str, kind: str, help_text: str, samples: Iterable[Tuple[str, Dict[str, str], float]]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{sample}{_format_labels(labels)} {_format_value(value)}" for sample, labels, value in samples)
+    return lines
+
+
+class Metric:
+    """A labelled metric family kept in process memory"""
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _labels(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.label_names, values))
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        super().__init__(name, help_text, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return _family(self.name, self.kind, self.help_text, (
+            (self.name, self._labels(labels), value) for labels, value in values
+        ))
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((labels, [list(entry[0]), entry[1], entry[2]]) for labels, entry in self._values.items())
+        samples = []
+        for label_values, (counts, total, count) in values:
+            labels = self._labels(label_values)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return _family(self.name, self.kind, self.help_text, samples)
+
+
+class MetricsRegistry:
+    """Metrics owned by the app plus collectors that read other subsystems at scrape time"""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests served, by route template and status.",
+    ("method", "route", "status")
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency, by route template and status.",
+    ("method", "route", "status")
+))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."
+))
+
+
+# Pool snapshot key -> (metric name, type, help)
+POOL_METRICS = {
+    "checkouts": ("db_pool_checkouts_total", "counter", "Connections checked out of the pool."),
+    "timeouts": ("db_pool_checkout_timeouts_total", "counter", "Checkouts that timed out waiting for a connection."),
+    "max_wait_seconds": ("db_pool_checkout_wait_seconds_max", "gauge", "Longest wait for a pooled connection."),
+    "size": ("db_pool_size", "gauge", "Configured pool size."),
+    "checked_out": ("db_pool_checked_out", "gauge", "Connections currently checked out."),
+    "overflow": ("db_pool_overflow", "gauge", "Connections open beyond the pool size (negative while below it)."),
+    "idle": ("db_pool_idle", "gauge", "Idle connections held by the pool."),
+}
+
+
+def _collect_pools() -> List[str]:
+    pools = get_pool_metrics()
+    lines: List[str] = []
+    for key, (name, kind, help_text) in POOL_METRICS.items():
+        lines.extend(_family(name, kind, help_text, (
+            (name, {"engine": engine}, metrics[key]) for engine, metrics in pools.items()
+        )))
+    name = "db_pool_checkout_wait_seconds_total"
+    lines.extend(_family(name, "counter", "Total time spent waiting for pooled connections.", (
+        (name, {"engine": engine}, metrics["average_wait_seconds"] * metrics["checkouts"])
+        for engine, metrics in pools.items()
+    )))
+    return lines
+
+
+def _collect_cache() -> List[str]:
+    metrics = get_cache_backend().metrics()
+    lines: List[str] = []
+    for key, kind, help_text in (
+        ("hits", "counter", "Response cache lookups served from the cache."),
+        ("misses", "counter", "Response cache lookups that missed."),
+        ("entries", "gauge", "Responses currently cached."),
+    ):
+        if key in metrics:
+            name = f"response_cache_{key}_total" if kind == "counter" else f"response_cache_{key}"
+            lines.extend(_family(name, kind, help_text, [(name, {}, metrics[key])]))
+    return lines
+
+
+def _collect_password_hashing() -> List[str]:
+    metrics = password_hasher.metrics()
+    return (
+        _family("password_hash_seconds", "summary", "Time spent hashing or verifying passwords.", [
+            ("password_hash_seconds_sum", {}, metrics["average_seconds"] * metrics["completed"]),
+            ("password_hash_seconds_count", {}, metrics["completed"]),
+        ])
+        + _family("password_hash_seconds_max", "gauge", "Slowest password hash so far.", [
+            ("password_hash_seconds_max", {}, metrics["max_seconds"])
+        ])
+        + _family("password_hash_pending", "gauge", "Password hashes queued or running.", [
+            ("password_hash_pending", {}, metrics["pending"])
+        ])
+        + _family("password_hash_rejected_total", "counter", "Password hashes refused because the queue was full.", [
+            ("password_hash_rejected_total", {}, metrics["rejected"])
+        ])
+    )
+
+
+registry.add_collector(_collect_pools)
+registry.add_collector(_collect_cache)
+registry.add_collector(_collect_password_hashing)
+
+
+def route_label(app, scope: dict) -> str:
+    """Route template that served a request, so IDs in paths do not explode label sets"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Older Starlette only records the endpoint (a mount's app for mounts)
+    endpoint = scope.get("endpoint")
+    candidates = [
+        route for route in app.router.routes
+        if endpoint is None or getattr(route, "endpoint", getattr(route, "app", None)) is endpoint
+    ]
+    if endpoint is not None and len(candidates) == 1:
+        return candidates[0].path
+    for route in candidates:
+        if route.matches(scope)[0] == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    labels = (method, route, str(status))
+    http_requests.inc(*labels)
+    http_request_duration.observe(seconds, *labels)
@@ -1,8 +1,12 @@
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Optional, Union, Tuple, Callable
+from concurrent.futures import ThreadPoolExecutor
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from .config import settings
+import asyncio
+import threading
+import time
 
 # Password hashing context - use argon2 for new passwords, but support bcrypt for existing ones
 pwd_context = CryptContext(
@@ -42,18 +46,111 @@ def verify_token(token: str) -> Optional[dict]:
         return None
 
 
-def get_password_hash(password: str) -> str:
-    """Hash password using bcrypt"""
+def request_token_payload(request) -> Optional[dict]:
+    """Verified claims of a request's bearer token, decoded once and kept on request.state"""
+    state = request.state
+    if not hasattr(state, "token_payload"):
+        authorization = request.headers.get("authorization", "")
+        token = authorization[7:] if authorization.lower().startswith("bearer ") else None
+        state.token_payload = verify_token(token) if token else None
+    return state.token_payload
+
+
+def _truncate(password: str) -> str:
     # bcrypt has a 72-byte limit, so truncate if necessary
     if len(password.encode('utf-8')) > 72:
         password = password[:72]
-    return pwd_context.hash(password)
+    return password
+
+
+def get_password_hash(password: str) -> str:
+    """Hash password using bcrypt"""
+    return pwd_context.hash(_truncate(password))
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
-    # bcrypt has a 72-byte limit, so truncate if necessary
-    if len(plain_password.encode('utf-8')) > 72:
-        plain_password = plain_password[:72]
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context.verify(_truncate(plain_password), hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify password, returning a replacement hash if the stored one uses a deprecated scheme"""
+    return pwd_context.verify_and_update(_truncate(plain_password), hashed_password)
+
+
+class HashingBusyError(Exception):
+    """Raised when the password hashing queue is full"""
+
+
+class PasswordHasher:
+    """Runs password hashing on a small thread pool so it never blocks the event loop.
+    
+    argon2 and bcrypt release the GIL while hashing, so worker threads run in
+    parallel with request handling. At most `max_pending` jobs may be queued
+    or running; beyond that callers get HashingBusyError instead of waiting.
+    """
+    
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+    
+    def _timed(self, func: Callable, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.completed += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+    
+    async def run(self, func: Callable, *args):
+        """Run a hashing function on the pool and await its result"""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingBusyError("Too many password operations in progress, please retry")
+            self.pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, func, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+    
+    def metrics(self) -> dict:
+        """Queue depth and hash latency counters"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "average_seconds": self.total_seconds / self.completed if self.completed else 0.0,
+                "max_seconds": self.max_seconds
+            }
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the hashing pool"""
+    return await password_hasher.run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password on the hashing pool, returning (valid, replacement hash or None)"""
+    return await password_hasher.run(verify_and_update_password, plain_password, hashed_password)
 
@@ -0,0 +1,245 @@
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+from collections import Counter
+from datetime import datetime
+from .config import settings
+from .instrumentation import statement_shape
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+
+# Modules whose frames name the caller of a slow statement, most specific first
+_PACKAGE = __name__.rsplit(".core.", 1)[0]
+CALLER_PACKAGES = (f"{_PACKAGE}.services.", f"{_PACKAGE}.api.", f"{_PACKAGE}.utils.")
+
+# Statements worth asking the planner about
+EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE|INSERT)\b", re.IGNORECASE)
+
+# Named parameters whose values are never written out, whatever their type
+SENSITIVE_PARAMETER = re.compile(r"pass|token|secret|hash|email|phone", re.IGNORECASE)
+
+# Savepoint wrapping each EXPLAIN so a failure leaves the caller's transaction intact
+EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def fingerprint(statement: str) -> str:
+    """Stable ID for a statement shape, ignoring whitespace, IN-list lengths and literals"""
+    normalized = _LITERAL.sub("?", statement_shape(statement))
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def _redact_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return f"<{type(value).__name__} len={len(str(value))}>"
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Bound parameters with strings and bytes reduced to their type and length.
+
+    Numbers and NULLs are kept since they are what usually explains a plan,
+    except under parameter names that look like credentials or contact details.
+    """
+    if isinstance(parameters, dict):
+        return {
+            key: "<redacted>" if SENSITIVE_PARAMETER.search(str(key)) else _redact_value(value)
+            for key, value in parameters.items()
+        }
+    if isinstance(parameters, (list, tuple)):
+        return [_redact_value(value) for value in parameters]
+    return _redact_value(parameters)
+
+
+def calling_function() -> str:
+    """The innermost service (or else router/utility) function on the stack, as "module.function".
+
+    Statements issued by a relationship lazy load are marked as such.
+    """
+    frame = sys._getframe(1)
+    found: Dict[str, str] = {}
+    lazy_load = False
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        lazy_load = lazy_load or module == "sqlalchemy.orm.strategies"
+        for package in CALLER_PACKAGES:
+            if package not in found and module.startswith(package):
+                name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name).replace("<locals>.", "")
+                found[package] = f"{module.rsplit('.', 1)[-1]}.{name}"
+        if CALLER_PACKAGES[0] in found:
+            break
+        frame = frame.f_back
+    caller = next((found[package] for package in CALLER_PACKAGES if package in found), None)
+    if caller is None:
+        # Relationships loaded while a response is serialized have no app frame
+        return "lazy load" if lazy_load else "unknown"
+    return f"{caller} (lazy load)" if lazy_load else caller
+
+
+def explain(conn, statement: str, parameters: Any) -> Optional[List[str]]:
+    """The plan for a statement, run on the connection that executed it.
+
+    Uses EXPLAIN QUERY PLAN on SQLite and EXPLAIN elsewhere; neither executes
+    the statement. The raw DBAPI cursor keeps the EXPLAIN out of the engine
+    events, so it is not itself timed or logged. It runs inside a savepoint:
+    a failed EXPLAIN is rolled back to it rather than aborting the caller's
+    transaction, as it otherwise would on Postgres.
+    """
+    if not EXPLAINABLE.match(statement):
+        return None
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return [str(row[-1]) for row in cursor.fetchall()]
+        except Exception:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            raise
+        finally:
+            cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """Writes statements slower than SLOW_QUERY_THRESHOLD_MS to a rotating JSON-lines file.
+
+    Each entry carries the statement fingerprint, redacted parameters, the
+    calling function and the query plan. Plans are captured at most once per
+    fingerprint every SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS so a hot slow query
+    does not pay for an EXPLAIN on every run.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._logger: Optional[logging.Logger] = None
+        self._explained: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _get_logger(self) -> logging.Logger:
+        with self._lock:
+            if self._logger is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes, backupCount=self.backups)
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger = logging.getLogger(f"{_PACKAGE}.slow_queries")
+                logger.handlers = [handler]
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                self._logger = logger
+            return self._logger
+
+    def _plan_due(self, key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained.get(key)
+            if last is not None and now - last < settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS:
+                return False
+            self._explained[key] = now
+            return True
+
+    def observe(self, conn, cursor, statement: str, parameters: Any, executemany: bool, seconds: float) -> None:
+        """Statement observer: record the statement if it ran past the threshold"""
+        if seconds * 1000 < settings.SLOW_QUERY_THRESHOLD_MS:
+            return
+        try:
+            key = fingerprint(statement)
+            sample = parameters[0] if executemany and parameters else parameters
+            plan = None
+            if self._plan_due(key):
+                try:
+                    plan = explain(conn, statement, sample)
+                except Exception as e:
+                    plan = [f"EXPLAIN failed: {e.__class__.__name__}: {e}"]
+            entry = {
+                "timestamp": datetime.utcnow().isoformat(),
+                "fingerprint": key,
+                "duration_ms": round(seconds * 1000, 2),
+                "caller": calling_function(),
+                "statement": statement_shape(statement),
+                "parameters": redact_parameters(sample),
+                "executemany": bool(executemany),
+                "plan": plan,
+            }
+            self._get_logger().info(json.dumps(entry, default=str))
+        except Exception as e:
+            # Never let the log break the query that triggered it
+            print(f"⚠️ Slow query log failed: {e}")
+
+    def _files(self) -> List[str]:
+        backups = [f"{self.path}.{number}" for number in range(self.backups, 0, -1)]
+        return [path for path in backups + [self.path] if os.path.exists(path)]
+
+    def summary(self, limit: int = 50) -> List[dict]:
+        """Logged slow statements grouped by fingerprint, most total time first"""
+        groups: Dict[str, dict] = {}
+        for path in self._files():
+            with open(path, encoding="utf-8") as log_file:
+                for line in log_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    group = groups.get(entry["fingerprint"])
+                    if group is None:
+                        group = groups[entry["fingerprint"]] = {
+                            "fingerprint": entry["fingerprint"],
+                            "statement": entry["statement"],
+                            "count": 0,
+                            "total_ms": 0.0,
+                            "max_ms": 0.0,
+                            "callers": Counter(),
+                            "plan": None,
+                            "sample_parameters": None,
+                            "last_seen": None,
+                        }
+                    group["count"] += 1
+                    group["total_ms"] += entry["duration_ms"]
+                    group["max_ms"] = max(group["max_ms"], entry["duration_ms"])
+                    group["callers"][entry["caller"]] += 1
+                    group["sample_parameters"] = entry["parameters"]
+                    group["last_seen"] = entry["timestamp"]
+                    if entry.get("plan"):
+                        group["plan"] = entry["plan"]
+
+        ranked = sorted(groups.values(), key=lambda group: group["total_ms"], reverse=True)[:limit]
+        for group in ranked:
+            group["total_ms"] = round(group["total_ms"], 2)
+            group["mean_ms"] = round(group["total_ms"] / group["count"], 2)
+            group["callers"] = dict(group["callers"].most_common())
+        return ranked
+
+    def clear(self) -> None:
+        """Delete the log and its rotated backups"""
+        with self._lock:
+            if self._logger is not None:
+                for handler in self._logger.handlers:
+                    handler.close()
+                self._logger = None
+            self._explained.clear()
+        for path in self._files():
+            os.remove(path)
+
+
+slow_query_log = SlowQueryLog(
+    settings.SLOW_QUERY_LOG_PATH,
+    settings.SLOW_QUERY_LOG_MAX_BYTES,
+    settings.SLOW_QUERY_LOG_BACKUPS
+)
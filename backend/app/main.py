@@ -1,10 +1,17 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from .core.config import settings
-from .core.database import create_database
+from .core.security import HashingBusyError
+from .core import instrumentation, metrics
+from .core.database import create_database, engine, async_engine, SessionLocal, replica_router, request_user_key
 from .api.v1 import auth
+from .services import search_service, category_service, review_service, image_service
+from sqlalchemy import text
+import asyncio
 import os
+import time
 
 # Create FastAPI app
 app = FastAPI(
@@ -24,6 +31,54 @@ app.add_middleware(
     max_age=3600  # Cache preflight requests for 1 hour
 )
 
+@app.exception_handler(HashingBusyError)
+async def hashing_busy_handler(request: Request, exc: HashingBusyError):
+    """Shed load when the password hashing queue is full"""
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.middleware("http")
+async def replica_stickiness(request: Request, call_next):
+    """Pin a user's reads to the primary right after they write"""
+    response = await call_next(request)
+    if replica_router.replicas and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        user_key = request_user_key(request)
+        if user_key:
+            replica_router.mark_write(user_key)
+    return response
+
+@app.middleware("http")
+async def sql_instrumentation(request: Request, call_next):
+    """Report per-request query counts and DB time, and flag suspected N+1s"""
+    if not settings.SQL_INSTRUMENTATION_ENABLED:
+        return await call_next(request)
+    
+    started = time.perf_counter()
+    stats = instrumentation.start_request()
+    response = await call_next(request)
+    
+    instrumentation.report(request.method, request.url.path, stats)
+    response.headers["Server-Timing"] = instrumentation.server_timing(stats, time.perf_counter() - started)
+    return response
+
+@app.middleware("http")
+async def request_metrics(request: Request, call_next):
+    """Count requests and time them per route template and status"""
+    if not settings.METRICS_ENABLED:
+        return await call_next(request)
+    
+    started = time.perf_counter()
+    metrics.http_in_flight.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.http_in_flight.dec()
+        metrics.observe_request(
+            request.method, metrics.route_label(app, request.scope), status, time.perf_counter() - started
+        )
+
 # Create upload directory
 if not os.path.exists(settings.UPLOAD_DIR):
     os.makedirs(settings.UPLOAD_DIR)
@@ -52,10 +107,26 @@ async def startup_event():
     try:
         create_database()
         print("✅ Database initialized successfully")
+        db = SessionLocal()
+        try:
+            category_service.ensure_category_closure(db)
+            review_service.ensure_rating_summaries(db)
+        finally:
+            db.close()
+        backend = search_service.ensure_index(engine)
+        print(f"✅ Product search index ready ({backend.name})")
     except Exception as e:
         print(f"❌ Database initialization failed: {e}")
         # Don't fail the startup if database already exists
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled database connections and worker pools"""
+    await async_engine.dispose()
+    await replica_router.dispose()
+    engine.dispose()
+    image_service.image_processor.shutdown()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -70,6 +141,32 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness check: the primary database answers a query within HEALTH_DB_MAX_LATENCY_MS"""
+    async def ping():
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(ping(), timeout=settings.HEALTH_DB_TIMEOUT_SECONDS)
+    except Exception as e:
+        error = "timed out" if isinstance(e, asyncio.TimeoutError) else e.__class__.__name__
+        return JSONResponse(status_code=503, content={"status": "unavailable", "database": {"error": error}})
+    
+    latency_ms = round((time.perf_counter() - started) * 1000, 2)
+    ready = latency_ms <= settings.HEALTH_DB_MAX_LATENCY_MS
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "degraded", "database": {"latency_ms": latency_ms}}
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition of request, pool, cache and hashing metrics"""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
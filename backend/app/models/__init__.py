@@ -1,20 +1,20 @@
 from .user import User, UserRole
-from .category import Category
+from .category import Category, CategoryClosure
 from .attribute import Attribute, AttributeValue, CategoryAttribute, AttributeType
 from .seller import Seller
 from .product import Product, ProductVariant, ProductVariantAttribute, ProductImage, ProductStatus
 from .order import Order, OrderItem, OrderStatus
 from .commission import CommissionSetting, CommissionType
-from .review import ProductReview
+from .review import ProductReview, ProductRatingSummary
 
 __all__ = [
     "User", "UserRole",
-    "Category",
+    "Category", "CategoryClosure",
     "Attribute", "AttributeValue", "CategoryAttribute", "AttributeType",
     "Seller",
     "Product", "ProductVariant", "ProductVariantAttribute", "ProductImage", "ProductStatus",
     "Order", "OrderItem", "OrderStatus",
     "CommissionSetting", "CommissionType",
-    "ProductReview"
+    "ProductReview", "ProductRatingSummary"
 ]
 
@@ -36,7 +36,7 @@ class AttributeValue(Base):
     __tablename__ = "attribute_values"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    attribute_id = Column(String, ForeignKey("attributes.id"), nullable=False)
+    attribute_id = Column(String, ForeignKey("attributes.id"), nullable=False, index=True)
     value = Column(String(255), nullable=False)  # Red, Large, 128GB, Samsung
     sort_order = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -53,7 +53,7 @@ class CategoryAttribute(Base):
     __tablename__ = "category_attributes"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    category_id = Column(String, ForeignKey("categories.id"), nullable=False)
+    category_id = Column(String, ForeignKey("categories.id"), nullable=False, index=True)
     attribute_id = Column(String, ForeignKey("attributes.id"), nullable=False)
     is_required = Column(Boolean, default=False)
     is_variant = Column(Boolean, default=False)  # affects pricing/inventory
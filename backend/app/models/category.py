@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -12,7 +12,7 @@ class Category(Base):
     name = Column(String(100), nullable=False)
     slug = Column(String(100), unique=True, index=True)
     description = Column(Text)
-    parent_id = Column(String, ForeignKey("categories.id"))
+    parent_id = Column(String, ForeignKey("categories.id"), index=True)
     level = Column(Integer, default=1)
     sort_order = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
@@ -28,4 +28,21 @@ class Category(Base):
     # commission_settings handled in application logic
     
     def __repr__(self):
-        return f"<Category {self.name}>" 
\ No newline at end of file
+        return f"<Category {self.name}>"
+
+
+class CategoryClosure(Base):
+    """Ancestor/descendant pairs for every category, including itself at depth 0"""
+    __tablename__ = "category_closure"
+    
+    ancestor_id = Column(String, ForeignKey("categories.id"), primary_key=True)
+    descendant_id = Column(String, ForeignKey("categories.id"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+    
+    # The primary key serves subtree lookups; this one serves ancestor paths
+    __table_args__ = (
+        Index("ix_category_closure_descendant", "descendant_id", "depth"),
+    )
+    
+    def __repr__(self):
+        return f"<CategoryClosure {self.ancestor_id}-{self.descendant_id}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DECIMAL, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, String, DECIMAL, Boolean, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -28,5 +28,14 @@ class CommissionSetting(Base):
     
     # Note: Relationships will be handled in application logic due to flexible entity_id
     
+    # Rule lookups by type and category/product; partial, since only active rules are applied
+    __table_args__ = (
+        Index(
+            "ix_commission_settings_active_type_entity", "type", "entity_id",
+            sqlite_where=is_active == True,
+            postgresql_where=is_active == True
+        ),
+    )
+    
     def __repr__(self):
         return f"<CommissionSetting {self.type}-{self.commission_rate}%>" 
\ No newline at end of file
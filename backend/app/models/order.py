@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DECIMAL, Boolean, DateTime, Integer, ForeignKey, Enum
+from sqlalchemy import Column, String, Text, DECIMAL, Boolean, DateTime, Integer, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -46,6 +46,12 @@ class Order(Base):
     customer = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order")
     
+    # Order history per customer and the admin status queues, newest/oldest first
+    __table_args__ = (
+        Index("ix_orders_customer_created", "customer_id", "created_at"),
+        Index("ix_orders_status_created", "status", "created_at"),
+    )
+    
     def __repr__(self):
         return f"<Order {self.order_number}>"
 
@@ -54,8 +60,8 @@ class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    order_id = Column(String, ForeignKey("orders.id"), nullable=False)
-    product_id = Column(String, ForeignKey("products.id"), nullable=False)
+    order_id = Column(String, ForeignKey("orders.id"), nullable=False, index=True)
+    product_id = Column(String, ForeignKey("products.id"), nullable=False, index=True)
     product_variant_id = Column(String, ForeignKey("product_variants.id"))
     product_name = Column(String(255), nullable=False)
     quantity = Column(Integer, nullable=False)
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, Text, DECIMAL, Boolean, DateTime, Integer, ForeignKey, Enum
+from sqlalchemy import Column, String, Text, DECIMAL, Boolean, DateTime, Integer, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Dict, Optional
 import uuid
 import enum
 from ..core.database import Base
@@ -48,6 +49,36 @@ class Product(Base):
     images = relationship("ProductImage", back_populates="product")
     order_items = relationship("OrderItem", back_populates="product")
     reviews = relationship("ProductReview", back_populates="product")
+    rating_summary = relationship("ProductRatingSummary", back_populates="product", uselist=False)
+    
+    # Listing indexes: status/category filters followed by each sortable column
+    # (id breaks ties for keyset pagination)
+    __table_args__ = (
+        Index("ix_products_status_category_price", "status", "category_id", "customer_price", "id"),
+        Index("ix_products_status_category_created", "status", "category_id", "created_at", "id"),
+        Index("ix_products_status_category_name", "status", "category_id", "name", "id"),
+        Index("ix_products_status_price", "status", "customer_price", "id"),
+        Index("ix_products_status_created", "status", "created_at", "id"),
+        Index("ix_products_status_name", "status", "name", "id"),
+        # Seller dashboards list their own products newest first
+        Index("ix_products_seller_created", "seller_id", "created_at", "id"),
+    )
+    
+    @property
+    def average_rating(self) -> Optional[float]:
+        """Mean approved rating, or None before the first review"""
+        summary = self.rating_summary
+        return summary.average_rating if summary and summary.review_count else None
+
+    @property
+    def total_reviews(self) -> int:
+        return self.rating_summary.review_count if self.rating_summary else 0
+
+    @property
+    def rating_breakdown(self) -> Dict[int, int]:
+        if self.rating_summary:
+            return self.rating_summary.rating_breakdown
+        return {star: 0 for star in range(1, 6)}
     
     def __repr__(self):
         return f"<Product {self.name}>"
@@ -57,7 +88,7 @@ class ProductVariant(Base):
     __tablename__ = "product_variants"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    product_id = Column(String, ForeignKey("products.id"), nullable=False)
+    product_id = Column(String, ForeignKey("products.id"), nullable=False, index=True)
     variant_name = Column(String(255))  # "Red Large", "128GB Black"
     sku = Column(String(100), unique=True, index=True)
     seller_price = Column(DECIMAL(10, 2), nullable=False)  # Price seller gets for this variant
@@ -83,7 +114,7 @@ class ProductVariantAttribute(Base):
     __tablename__ = "product_variant_attributes"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    variant_id = Column(String, ForeignKey("product_variants.id"), nullable=False)
+    variant_id = Column(String, ForeignKey("product_variants.id"), nullable=False, index=True)
     attribute_id = Column(String, ForeignKey("attributes.id"), nullable=False)
     attribute_value_id = Column(String, ForeignKey("attribute_values.id"))
     custom_value = Column(String(255))  # For text inputs
@@ -102,9 +133,13 @@ class ProductImage(Base):
     __tablename__ = "product_images"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    product_id = Column(String, ForeignKey("products.id"), nullable=False)
+    product_id = Column(String, ForeignKey("products.id"), nullable=False, index=True)
     variant_id = Column(String, ForeignKey("product_variants.id"))
     image_url = Column(String(500), nullable=False)
+    # WebP renditions of uploaded images (None for images given by URL)
+    thumbnail_url = Column(String(500))
+    medium_url = Column(String(500))
+    large_url = Column(String(500))
     alt_text = Column(String(255))
     is_primary = Column(Boolean, default=False)
     sort_order = Column(Integer, default=0)
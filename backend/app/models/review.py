@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.database import Base
@@ -20,5 +20,45 @@ class ProductReview(Base):
     product = relationship("Product", back_populates="reviews")
     customer = relationship("User", foreign_keys=[customer_id])
 
+    __table_args__ = (
+        # A customer's reviews newest first, also used by the one-review-per-product check
+        Index("ix_product_reviews_customer_created", "customer_id", "created_at"),
+        # Approved reviews of a product, newest first; partial, since hidden reviews are never listed
+        Index(
+            "ix_product_reviews_approved_product_created", "product_id", "created_at",
+            sqlite_where=is_approved == True,
+            postgresql_where=is_approved == True
+        ),
+    )
+
     def __repr__(self):
         return f"<ProductReview {self.rating} stars>"
+
+
+class ProductRatingSummary(Base):
+    """Running totals of a product's approved review ratings"""
+    __tablename__ = "product_rating_summaries"
+
+    product_id = Column(String, ForeignKey("products.id"), primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_1 = Column(Integer, nullable=False, default=0)
+    rating_2 = Column(Integer, nullable=False, default=0)
+    rating_3 = Column(Integer, nullable=False, default=0)
+    rating_4 = Column(Integer, nullable=False, default=0)
+    rating_5 = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    # Relationships
+    product = relationship("Product", back_populates="rating_summary")
+
+    @property
+    def average_rating(self) -> float:
+        return round(self.rating_sum / self.review_count, 1) if self.review_count else 0.0
+
+    @property
+    def rating_breakdown(self) -> dict:
+        return {star: getattr(self, f"rating_{star}") or 0 for star in range(1, 6)}
+
+    def __repr__(self):
+        return f"<ProductRatingSummary {self.product_id} {self.review_count} reviews>"
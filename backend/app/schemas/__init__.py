@@ -1,5 +1,5 @@
-from .review import ReviewCreate, ReviewUpdate, ReviewResponse, ReviewStats
+from .review import ReviewCreate, ReviewUpdate, ReviewResponse, ReviewStats, ReviewModeration
 
 __all__ = [
-    "ReviewCreate", "ReviewUpdate", "ReviewResponse", "ReviewStats"
+    "ReviewCreate", "ReviewUpdate", "ReviewResponse", "ReviewStats", "ReviewModeration"
 ]
@@ -67,4 +67,18 @@ class CommissionCalculation(BaseModel):
     seller_price: float
     commission_rate: float
     commission_amount: float
-    customer_price: float 
\ No newline at end of file
+    customer_price: float 
+
+
+class CommissionRecalculationJob(BaseModel):
+    id: str
+    status: str  # queued, running, completed, failed
+    reason: str
+    total_products: int
+    processed_products: int
+    updated_products: int
+    updated_variants: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
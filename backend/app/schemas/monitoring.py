@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+class SlowQuerySummary(BaseModel):
+    fingerprint: str
+    statement: str
+    count: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    callers: Dict[str, int]
+    plan: Optional[List[str]] = None
+    sample_parameters: Optional[Any] = None
+    last_seen: Optional[str] = None
@@ -17,6 +17,9 @@ class ProductImageCreate(ProductImageBase):
 
 class ProductImageResponse(ProductImageBase):
     id: str
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
+    large_url: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -146,9 +149,9 @@ class ProductResponse(ProductBase):
     updated_at: datetime
     images: List[ProductImageResponse] = []
     variants: List[ProductVariantResponse] = []
-    reviews: List[dict] = []  # Will contain review stats
     average_rating: Optional[float] = None
     total_reviews: int = 0
+    rating_breakdown: Dict[int, int] = {}
     
     class Config:
         from_attributes = True
@@ -169,6 +172,8 @@ class ProductListResponse(BaseModel):
     images: List[ProductImageResponse] = []
     seller_name: Optional[str] = None
     seller_email: Optional[str] = None
+    average_rating: Optional[float] = None
+    total_reviews: int = 0
     
     class Config:
         from_attributes = True
@@ -180,6 +185,18 @@ class ProductApprovalUpdate(BaseModel):
     commission_rate: Optional[float] = None
 
 
+class ProductImportError(BaseModel):
+    row: int
+    error: str
+
+
+class ProductImportReport(BaseModel):
+    total_rows: int
+    imported: int
+    failed: int
+    errors: List[ProductImportError] = []
+
+
 class ProductFilters(BaseModel):
     category_id: Optional[str] = None
     seller_id: Optional[str] = None
@@ -42,5 +42,5 @@ class ReviewStats(BaseModel):
     total_reviews: int
     rating_breakdown: dict  # {1: count, 2: count, 3: count, 4: count, 5: count}
 
-
-
+class ReviewModeration(BaseModel):
+    is_approved: bool
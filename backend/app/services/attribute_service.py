@@ -1,10 +1,25 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Dict, Any
+from ..core.cache import invalidate_tags, ATTRIBUTES_TAG
+from ..core.config import settings
+from ..core.database import reads_cacheable
 from ..models.attribute import Attribute, AttributeValue, CategoryAttribute
+from ..models.category import CategoryClosure
 from ..schemas.attribute import (
     AttributeCreate, AttributeUpdate, AttributeValueCreate, 
     AttributeValueUpdate, CategoryAttributeCreate, CategoryAttributeUpdate
 )
+import time
+
+
+# Compiled attribute schemas keyed by category_id: (expires_at, schema)
+_schemas: Dict[str, tuple] = {}
+
+
+def invalidate_attribute_schemas() -> None:
+    """Drop compiled schemas and cached attribute responses after attribute writes"""
+    _schemas.clear()
+    invalidate_tags(ATTRIBUTES_TAG)
 
 
 def create_attribute(db: Session, attribute: AttributeCreate) -> Attribute:
@@ -12,6 +27,7 @@ def create_attribute(db: Session, attribute: AttributeCreate) -> Attribute:
     db_attribute = Attribute(**attribute.dict())
     db.add(db_attribute)
     db.commit()
+    invalidate_attribute_schemas()
     db.refresh(db_attribute)
     return db_attribute
 
@@ -37,6 +53,7 @@ def update_attribute(db: Session, attribute_id: str, attribute_update: Attribute
         setattr(db_attribute, key, value)
     
     db.commit()
+    invalidate_attribute_schemas()
     db.refresh(db_attribute)
     return db_attribute
 
@@ -49,6 +66,7 @@ def delete_attribute(db: Session, attribute_id: str) -> bool:
     
     db.delete(db_attribute)
     db.commit()
+    invalidate_attribute_schemas()
     return True
 
 
@@ -58,6 +76,7 @@ def create_attribute_value(db: Session, attribute_value: AttributeValueCreate) -
     db_attribute_value = AttributeValue(**attribute_value.dict())
     db.add(db_attribute_value)
     db.commit()
+    invalidate_attribute_schemas()
     db.refresh(db_attribute_value)
     return db_attribute_value
 
@@ -85,6 +104,7 @@ def update_attribute_value(db: Session, value_id: str, value_update: AttributeVa
         setattr(db_value, key, value)
     
     db.commit()
+    invalidate_attribute_schemas()
     db.refresh(db_value)
     return db_value
 
@@ -97,6 +117,7 @@ def delete_attribute_value(db: Session, value_id: str) -> bool:
     
     db.delete(db_value)
     db.commit()
+    invalidate_attribute_schemas()
     return True
 
 
@@ -115,6 +136,7 @@ def create_category_attribute(db: Session, category_attribute: CategoryAttribute
     db_category_attribute = CategoryAttribute(**category_attribute.dict())
     db.add(db_category_attribute)
     db.commit()
+    invalidate_attribute_schemas()
     db.refresh(db_category_attribute)
     return db_category_attribute
 
@@ -142,6 +164,7 @@ def update_category_attribute(db: Session, category_attribute_id: str, update: C
         setattr(db_category_attribute, key, value)
     
     db.commit()
+    invalidate_attribute_schemas()
     db.refresh(db_category_attribute)
     return db_category_attribute
 
@@ -154,5 +177,59 @@ def delete_category_attribute(db: Session, category_attribute_id: str) -> bool:
     
     db.delete(db_category_attribute)
     db.commit()
+    invalidate_attribute_schemas()
     return True
 
+
+def compile_category_attribute_schema(db: Session, category_id: str) -> Optional[Dict[str, Any]]:
+    """Build a category's attribute schema, including attributes inherited from ancestors.
+    
+    Links from the category and every ancestor come back in one query joined
+    through the category closure table, with attributes joined in and their
+    values loaded by a single selectin query. When an attribute is linked at
+    several levels, the link nearest the category wins. Returns None if the
+    category does not exist.
+    """
+    rows = (
+        db.query(CategoryClosure.depth, CategoryAttribute)
+        .outerjoin(CategoryAttribute, CategoryAttribute.category_id == CategoryClosure.ancestor_id)
+        .filter(CategoryClosure.descendant_id == category_id)
+        .options(joinedload(CategoryAttribute.attribute).selectinload(Attribute.attribute_values))
+        .order_by(CategoryClosure.depth)
+        .all()
+    )
+    if not rows:
+        return None
+    
+    links: Dict[str, tuple] = {}
+    for depth, link in rows:
+        if link is not None and link.attribute is not None and link.attribute_id not in links:
+            links[link.attribute_id] = (depth, link)
+    
+    attributes = []
+    for depth, link in sorted(links.values(), key=lambda item: (item[1].attribute.sort_order or 0, item[1].attribute.name)):
+        attr = link.attribute
+        values = sorted(attr.attribute_values, key=lambda value: value.sort_order or 0)
+        attributes.append({
+            "attribute_id": attr.id,
+            "name": attr.name,
+            "type": attr.type,
+            "is_required": link.is_required or attr.is_required,
+            "is_variant": link.is_variant,
+            "inherited_from": link.category_id if depth > 0 else None,
+            "values": [{"id": v.id, "value": v.value} for v in values],
+        })
+    
+    return {"category_id": category_id, "attributes": attributes}
+
+
+def get_category_attribute_schema(db: Session, category_id: str) -> Optional[Dict[str, Any]]:
+    """Get a category's compiled attribute schema, cached until attributes change"""
+    entry = _schemas.get(category_id)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    
+    schema = compile_category_attribute_schema(db, category_id)
+    if schema is not None and reads_cacheable(db):
+        _schemas[category_id] = (time.monotonic() + settings.ATTRIBUTE_SCHEMA_TTL_SECONDS, schema)
+    return schema
@@ -1,16 +1,16 @@
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from ..models.category import Category
-from ..schemas.category import CategoryCreate, CategoryUpdate
+from typing import List, Optional, Dict, Any
+from ..core.config import settings
+from ..models.category import Category, CategoryClosure
+from ..core.cache import invalidate_tags, CATEGORIES_TAG, PRODUCTS_TAG
+from ..core.database import async_service, reads_cacheable, replica_router
+from ..schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
+from .commission_service import invalidate_commission_rules
+from .attribute_service import invalidate_attribute_schemas
+from .slug_service import generate_slug, save_with_unique_slug
 import uuid
-import re
-
-
-def generate_slug(name: str) -> str:
-    """Generate URL-friendly slug from category name"""
-    slug = re.sub(r'[^a-zA-Z0-9\s-]', '', name.lower())
-    slug = re.sub(r'[-\s]+', '-', slug)
-    return slug.strip('-')
+import time
 
 
 def calculate_level(db: Session, parent_id: Optional[str]) -> int:
@@ -30,15 +30,6 @@ def create_category(db: Session, category: CategoryCreate) -> Category:
     # Normalize empty string parent_id to None
     if hasattr(category, 'parent_id') and category.parent_id == "":
         category.parent_id = None
-    # Generate unique slug
-    base_slug = generate_slug(category.name)
-    slug = base_slug
-    counter = 1
-    
-    while db.query(Category).filter(Category.slug == slug).first():
-        slug = f"{base_slug}-{counter}"
-        counter += 1
-    
     # Calculate level
     level = calculate_level(db, category.parent_id)
     
@@ -51,7 +42,6 @@ def create_category(db: Session, category: CategoryCreate) -> Category:
     db_category = Category(
         id=str(uuid.uuid4()),
         name=category.name,
-        slug=slug,
         description=category.description,
         parent_id=category.parent_id,
         level=level,
@@ -59,9 +49,18 @@ def create_category(db: Session, category: CategoryCreate) -> Category:
         is_active=category.is_active
     )
     
-    db.add(db_category)
+    # Claim a unique slug with the insert itself, retrying if another writer takes it
+    def claim_slug(slug: str):
+        db_category.slug = slug
+        db.add(db_category)
+    
+    save_with_unique_slug(db, Category.slug, generate_slug(category.name), claim_slug)
+    _add_closure_rows(db, db_category.id, category.parent_id)
     db.commit()
     db.refresh(db_category)
+    invalidate_commission_rules()
+    invalidate_category_tree()
+    invalidate_tags(CATEGORIES_TAG)
     
     return db_category
 
@@ -89,34 +88,163 @@ def get_categories(db: Session, skip: int = 0, limit: int = 100, parent_id: Opti
     return query.order_by(Category.sort_order, Category.name).offset(skip).limit(limit).all()
 
 
-def get_category_tree(db: Session, parent_id: Optional[str] = None) -> List[Category]:
-    """Get hierarchical category tree without duplicates"""
-    if parent_id is None:
-        # Start from root categories only
-        roots = (
+class CategoryHierarchy:
+    """Snapshot of the active category forest built from a single query.
+    
+    Children are grouped by parent_id (active categories only, in
+    sort_order/name order) and serialized subtrees are memoized per parent,
+    so repeated tree requests do no database work until invalidated.
+    """
+    
+    def __init__(self, categories: List[Category]):
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.children: Dict[Optional[str], List[str]] = {}
+        for category in categories:
+            self.nodes[category.id] = {
+                "id": category.id,
+                "name": category.name,
+                "slug": category.slug,
+                "description": category.description,
+                "parent_id": category.parent_id,
+                "level": category.level,
+                "sort_order": category.sort_order,
+                "is_active": category.is_active,
+                "created_at": category.created_at
+            }
+            self.children.setdefault(category.parent_id, []).append(category.id)
+        self._subtrees: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        self.built_at = time.monotonic()
+    
+    @classmethod
+    def load(cls, db: Session) -> "CategoryHierarchy":
+        categories = (
             db.query(Category)
             .filter(Category.is_active == True)
-            .filter(Category.parent_id == None)
             .order_by(Category.sort_order, Category.name)
             .all()
         )
-    else:
-        roots = get_categories(db, parent_id=parent_id, limit=1000)
+        return cls(categories)
+    
+    def _build(self, category_id: str, visiting: set) -> Dict[str, Any]:
+        visiting.add(category_id)
+        node = dict(self.nodes[category_id])
+        node["children"] = [
+            self._build(child_id, visiting)
+            for child_id in self.children.get(category_id, [])
+            if child_id not in visiting
+        ]
+        return node
+    
+    def tree(self, parent_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Nested children of a parent (roots when parent_id is None)"""
+        if parent_id not in self._subtrees:
+            self._subtrees[parent_id] = [
+                self._build(child_id, set()) for child_id in self.children.get(parent_id, [])
+            ]
+        return self._subtrees[parent_id]
 
-    for root in roots:
-        root.children = []
-        _build_tree_recursive(db, root)
 
-    return roots
+_hierarchy: Optional[CategoryHierarchy] = None
 
 
-def _build_tree_recursive(db: Session, category: Category):
-    """Recursively build category tree"""
-    children = get_categories(db, parent_id=category.id, limit=1000)
-    for child in children:
-        child.children = []
-        category.children.append(child)
-        _build_tree_recursive(db, child)
+def get_category_hierarchy(db: Session) -> CategoryHierarchy:
+    """Get the cached hierarchy, rebuilding it when invalidated or expired"""
+    global _hierarchy
+    hierarchy = _hierarchy
+    if hierarchy is None or time.monotonic() - hierarchy.built_at > settings.CATEGORY_TREE_TTL_SECONDS:
+        hierarchy = CategoryHierarchy.load(db)
+        if reads_cacheable(db):
+            _hierarchy = hierarchy
+    return hierarchy
+
+
+def invalidate_category_tree() -> None:
+    """Drop the cached hierarchy after category writes"""
+    global _hierarchy
+    _hierarchy = None
+    replica_router.mark_invalidation()
+
+
+def get_category_tree(db: Session, parent_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Get hierarchical category tree without duplicates"""
+    return get_category_hierarchy(db).tree(parent_id)
+
+
+def _add_closure_rows(db: Session, category_id: str, parent_id: Optional[str]) -> None:
+    """Link a new category to itself and to every ancestor of its parent"""
+    rows = [{"ancestor_id": category_id, "descendant_id": category_id, "depth": 0}]
+    if parent_id:
+        rows.extend(
+            {"ancestor_id": ancestor_id, "descendant_id": category_id, "depth": depth + 1}
+            for ancestor_id, depth in db.query(CategoryClosure.ancestor_id, CategoryClosure.depth)
+            .filter(CategoryClosure.descendant_id == parent_id)
+        )
+    db.execute(insert(CategoryClosure), rows)
+
+
+def _move_closure_rows(db: Session, category_id: str, parent_id: Optional[str]) -> None:
+    """Re-link a category's subtree under a new parent and fix subtree levels"""
+    subtree = db.query(CategoryClosure.descendant_id, CategoryClosure.depth).filter(
+        CategoryClosure.ancestor_id == category_id
+    ).all()
+    subtree_ids = [descendant_id for descendant_id, _ in subtree]
+    
+    # Detach the subtree from its old ancestors
+    db.query(CategoryClosure).filter(
+        CategoryClosure.descendant_id.in_(subtree_ids),
+        ~CategoryClosure.ancestor_id.in_(subtree_ids)
+    ).delete(synchronize_session=False)
+    
+    base_level = 1
+    if parent_id:
+        ancestors = db.query(CategoryClosure.ancestor_id, CategoryClosure.depth).filter(
+            CategoryClosure.descendant_id == parent_id
+        ).all()
+        db.execute(insert(CategoryClosure), [
+            {"ancestor_id": ancestor_id, "descendant_id": descendant_id, "depth": ancestor_depth + depth + 1}
+            for ancestor_id, ancestor_depth in ancestors
+            for descendant_id, depth in subtree
+        ])
+        base_level = len(ancestors) + 1
+    
+    db.execute(update(Category), [
+        {"id": descendant_id, "level": base_level + depth}
+        for descendant_id, depth in subtree
+    ])
+
+
+def rebuild_category_closure(db: Session) -> int:
+    """Rebuild the closure table from parent_id links, returning the row count"""
+    parents = dict(db.query(Category.id, Category.parent_id).all())
+    rows = []
+    for category_id in parents:
+        ancestor_id, depth, seen = category_id, 0, set()
+        while ancestor_id and ancestor_id not in seen:
+            rows.append({"ancestor_id": ancestor_id, "descendant_id": category_id, "depth": depth})
+            seen.add(ancestor_id)
+            ancestor_id = parents.get(ancestor_id)
+            depth += 1
+    
+    db.query(CategoryClosure).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(CategoryClosure), rows)
+    db.commit()
+    return len(rows)
+
+
+def ensure_category_closure(db: Session) -> None:
+    """Backfill the closure table for categories created before it existed"""
+    self_rows = db.query(CategoryClosure).filter(CategoryClosure.depth == 0).count()
+    if self_rows != db.query(Category).count():
+        rebuild_category_closure(db)
+
+
+def get_descendant_ids(db: Session, category_id: str, include_self: bool = True) -> List[str]:
+    """Get IDs of every category in a subtree with one indexed query"""
+    query = db.query(CategoryClosure.descendant_id).filter(CategoryClosure.ancestor_id == category_id)
+    if not include_self:
+        query = query.filter(CategoryClosure.depth > 0)
+    return [descendant_id for descendant_id, in query]
 
 
 def update_category(db: Session, category_id: str, category_update: CategoryUpdate) -> Optional[Category]:
@@ -131,24 +259,16 @@ def update_category(db: Session, category_id: str, category_update: CategoryUpda
     if "parent_id" in update_data and update_data["parent_id"] == "":
         update_data["parent_id"] = None
     
-    # Handle slug regeneration if name changed
-    if "name" in update_data:
-        base_slug = generate_slug(update_data["name"])
-        slug = base_slug
-        counter = 1
-        
-        while db.query(Category).filter(Category.slug == slug, Category.id != category_id).first():
-            slug = f"{base_slug}-{counter}"
-            counter += 1
-        
-        update_data["slug"] = slug
-    
     # Handle level recalculation if parent changed
+    moved = "parent_id" in update_data and update_data["parent_id"] != db_category.parent_id
+    toggled = "is_active" in update_data and update_data["is_active"] != db_category.is_active
     if "parent_id" in update_data:
         if update_data["parent_id"]:
             parent = db.query(Category).filter(Category.id == update_data["parent_id"]).first()
             if not parent:
                 raise ValueError("Parent category not found")
+            if update_data["parent_id"] in get_descendant_ids(db, category_id):
+                raise ValueError("Cannot move a category under itself or its descendants")
             update_data["level"] = parent.level + 1
         else:
             update_data["level"] = 1
@@ -156,8 +276,32 @@ def update_category(db: Session, category_id: str, category_update: CategoryUpda
     for field, value in update_data.items():
         setattr(db_category, field, value)
     
+    # Regenerate the slug if the name changed
+    if "name" in update_data:
+        save_with_unique_slug(
+            db, Category.slug, generate_slug(update_data["name"]),
+            lambda slug: setattr(db_category, "slug", slug),
+            exclude_id=category_id,
+            current=db_category.slug
+        )
+    
+    if moved:
+        db.flush()
+        _move_closure_rows(db, category_id, update_data["parent_id"])
+    
     db.commit()
     db.refresh(db_category)
+    invalidate_category_tree()
+    # Product listings only change when the category moves or is switched on or off
+    if moved or toggled:
+        invalidate_tags(CATEGORIES_TAG, PRODUCTS_TAG)
+    else:
+        invalidate_tags(CATEGORIES_TAG)
+    
+    # Moving a category changes which ancestor rates and attributes apply
+    if moved:
+        invalidate_commission_rules()
+        invalidate_attribute_schemas()
     
     return db_category
 
@@ -179,20 +323,29 @@ def delete_category(db: Session, category_id: str) -> bool:
     # Soft delete
     db_category.is_active = False
     db.commit()
+    invalidate_category_tree()
+    invalidate_tags(CATEGORIES_TAG)
     
     return True
 
 
 def get_category_path(db: Session, category_id: str) -> List[Category]:
     """Get full path from root to category"""
-    path = []
-    current = db.query(Category).filter(Category.id == category_id).first()
-    
-    while current:
-        path.insert(0, current)
-        if current.parent_id:
-            current = db.query(Category).filter(Category.id == current.parent_id).first()
-        else:
-            break
-    
-    return path 
\ No newline at end of file
+    return (
+        db.query(Category)
+        .join(CategoryClosure, CategoryClosure.ancestor_id == Category.id)
+        .filter(CategoryClosure.descendant_id == category_id)
+        .order_by(CategoryClosure.depth.desc())
+        .all()
+    )
+
+
+# Async variants for routers on AsyncSession
+create_category_async = async_service(create_category, CategoryResponse)
+get_category_async = async_service(get_category, CategoryResponse)
+get_category_by_slug_async = async_service(get_category_by_slug, CategoryResponse)
+get_categories_async = async_service(get_categories, CategoryResponse)
+get_category_tree_async = async_service(get_category_tree)
+update_category_async = async_service(update_category, CategoryResponse)
+delete_category_async = async_service(delete_category)
+get_category_path_async = async_service(get_category_path, CategoryResponse)
@@ -1,79 +1,201 @@
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple, NamedTuple
 from decimal import Decimal
 from datetime import datetime
+from bisect import bisect_left, bisect_right
+from ..core.config import settings
+from ..core.database import reads_cacheable, replica_router
 from ..models.commission import CommissionSetting, CommissionType
-from ..models.category import Category
+from ..models.category import Category, CategoryClosure
 from ..schemas.commission import CommissionSettingCreate, CommissionSettingUpdate, CommissionCalculation
 import uuid
+import time
 
 
-def get_commission_rate(db: Session, category_id: str, product_id: Optional[str] = None, seller_price: float = 0) -> float:
-    """Get applicable commission rate based on priority:
-    1. Product-specific commission
-    2. Category commission
-    3. Global commission
+class CommissionRule(NamedTuple):
+    rate: float
+    min_seller_price: float
+    max_seller_price: Optional[float]
+    effective_from: datetime
+    effective_until: Optional[datetime]
+
+
+class CommissionRuleTable:
+    """In-memory snapshot of active commission settings and the category tree.
+    
+    Rules are grouped by (type, entity_id) and sorted by min_seller_price, so
+    resolving a rate is a bisect per level of the category walk instead of a
+    query per level. Effective dates are checked at lookup time, so rules
+    that start or expire later need no rebuild.
     """
-    current_time = datetime.utcnow()
-    
-    # 1. Check for product-specific commission
-    if product_id:
-        product_commission = db.query(CommissionSetting).filter(
-            CommissionSetting.type == CommissionType.PRODUCT,
-            CommissionSetting.entity_id == product_id,
-            CommissionSetting.is_active == True,
-            CommissionSetting.effective_from <= current_time,
-            (CommissionSetting.effective_until.is_(None) | 
-             (CommissionSetting.effective_until >= current_time)),
-            CommissionSetting.min_seller_price <= seller_price,
-            (CommissionSetting.max_seller_price.is_(None) | 
-             (CommissionSetting.max_seller_price >= seller_price))
-        ).first()
+    
+    def __init__(self, commission_settings: List[CommissionSetting], category_parents: Dict[str, Optional[str]]):
+        groups: Dict[Tuple[CommissionType, Optional[str]], List[CommissionRule]] = {}
+        for setting in commission_settings:
+            # NULL bounds never satisfy the SQL comparisons these rules replace
+            if setting.effective_from is None or setting.min_seller_price is None:
+                continue
+            key = (setting.type, None if setting.type == CommissionType.GLOBAL else setting.entity_id)
+            groups.setdefault(key, []).append(CommissionRule(
+                rate=float(setting.commission_rate),
+                min_seller_price=float(setting.min_seller_price),
+                max_seller_price=None if setting.max_seller_price is None else float(setting.max_seller_price),
+                effective_from=setting.effective_from,
+                effective_until=setting.effective_until
+            ))
         
-        if product_commission:
-            return float(product_commission.commission_rate)
-    
-    # 2. Check for category commission (walk up the category tree)
-    category = db.query(Category).filter(Category.id == category_id).first()
-    while category:
-        category_commission = db.query(CommissionSetting).filter(
-            CommissionSetting.type == CommissionType.CATEGORY,
-            CommissionSetting.entity_id == category.id,
-            CommissionSetting.is_active == True,
-            CommissionSetting.effective_from <= current_time,
-            (CommissionSetting.effective_until.is_(None) | 
-             (CommissionSetting.effective_until >= current_time)),
-            CommissionSetting.min_seller_price <= seller_price,
-            (CommissionSetting.max_seller_price.is_(None) | 
-             (CommissionSetting.max_seller_price >= seller_price))
-        ).first()
+        self.rules = {key: sorted(group, key=lambda rule: rule.min_seller_price) for key, group in groups.items()}
+        self.min_prices = {key: [rule.min_seller_price for rule in group] for key, group in self.rules.items()}
+        self.category_parents = category_parents
+        # (category_id, product_id) -> sorted band bounds of the rules resolve() consults
+        self._bounds: Dict[Tuple[str, Optional[str]], Tuple[List[float], List[float]]] = {}
+        self.built_at = time.monotonic()
+    
+    @classmethod
+    def load(cls, db: Session) -> "CommissionRuleTable":
+        """Build a table from the database in two queries"""
+        settings = db.query(CommissionSetting).filter(CommissionSetting.is_active == True).all()
+        category_parents = dict(db.query(Category.id, Category.parent_id).all())
+        return cls(settings, category_parents)
+    
+    def has_rules(self, commission_type: CommissionType, entity_id: Optional[str]) -> bool:
+        """Whether any active rule targets this entity"""
+        return (commission_type, entity_id) in self.rules
+    
+    def match(self, commission_type: CommissionType, entity_id: Optional[str], seller_price: float, at: datetime) -> Optional[float]:
+        """Rate of the matching rule with the highest min_seller_price, if any"""
+        key = (commission_type, entity_id)
+        group = self.rules.get(key)
+        if not group:
+            return None
         
-        if category_commission:
-            return float(category_commission.commission_rate)
+        # Only rules whose band starts at or below the price can match
+        for i in range(bisect_right(self.min_prices[key], seller_price) - 1, -1, -1):
+            rule = group[i]
+            if rule.max_seller_price is not None and rule.max_seller_price < seller_price:
+                continue
+            if rule.effective_from > at:
+                continue
+            if rule.effective_until is not None and rule.effective_until < at:
+                continue
+            return rule.rate
         
-        # Move to parent category
-        if category.parent_id:
-            category = db.query(Category).filter(Category.id == category.parent_id).first()
+        return None
+    
+    def ensure_category(self, db: Session, category_id: str) -> bool:
+        """Load a category's ancestry if it is missing, returning whether the category exists.
+        
+        Categories created after the table was built (for example by another
+        worker) would otherwise end the ancestor walk early and fall through
+        to the global rate.
+        """
+        current = category_id
+        chain = set()
+        while current is not None and current not in chain:
+            if current not in self.category_parents:
+                break
+            chain.add(current)
+            current = self.category_parents[current]
         else:
-            break
+            return True
+        
+        rows = (
+            db.query(Category.id, Category.parent_id)
+            .join(CategoryClosure, CategoryClosure.ancestor_id == Category.id)
+            .filter(CategoryClosure.descendant_id == category_id)
+            .all()
+        )
+        self.category_parents.update({row.id: row.parent_id for row in rows})
+        # Bounds memoized while the chain was incomplete missed its rules
+        self._bounds = {}
+        return category_id in self.category_parents
     
-    # 3. Get global commission
-    global_commission = db.query(CommissionSetting).filter(
-        CommissionSetting.type == CommissionType.GLOBAL,
-        CommissionSetting.is_active == True,
-        CommissionSetting.effective_from <= current_time,
-        (CommissionSetting.effective_until.is_(None) | 
-         (CommissionSetting.effective_until >= current_time)),
-        CommissionSetting.min_seller_price <= seller_price,
-        (CommissionSetting.max_seller_price.is_(None) | 
-         (CommissionSetting.max_seller_price >= seller_price))
-    ).first()
+    def ancestors(self, category_id: str) -> List[str]:
+        """A category followed by its ancestors, nearest first"""
+        chain: List[str] = []
+        current = category_id if category_id in self.category_parents else None
+        while current and current not in chain:
+            chain.append(current)
+            current = self.category_parents.get(current)
+        return chain
+    
+    def price_band(self, category_id: str, product_id: Optional[str] = None, seller_price: float = 0) -> Tuple[int, int]:
+        """Position of a price among the bounds of every rule resolve() may consult.
+        
+        Prices in the same band satisfy the same rules, so for a given category,
+        product and date they resolve to the same rate.
+        """
+        key = (category_id, product_id)
+        bounds = self._bounds.get(key)
+        if bounds is None:
+            entities = [(CommissionType.PRODUCT, product_id)] if product_id else []
+            entities += [(CommissionType.CATEGORY, ancestor) for ancestor in self.ancestors(category_id)]
+            entities.append((CommissionType.GLOBAL, None))
+            rules = [rule for entity in entities for rule in self.rules.get(entity, ())]
+            bounds = self._bounds[key] = (
+                sorted(rule.min_seller_price for rule in rules),
+                sorted(rule.max_seller_price for rule in rules if rule.max_seller_price is not None)
+            )
+        seller_price = float(seller_price)
+        return bisect_right(bounds[0], seller_price), bisect_left(bounds[1], seller_price)
     
-    if global_commission:
-        return float(global_commission.commission_rate)
+    def resolve(self, category_id: str, product_id: Optional[str] = None, seller_price: float = 0, at: Optional[datetime] = None) -> float:
+        """Resolve the product, category-ancestry, global, default priority chain"""
+        at = at or datetime.utcnow()
+        seller_price = float(seller_price)
+        
+        if product_id:
+            rate = self.match(CommissionType.PRODUCT, product_id, seller_price, at)
+            if rate is not None:
+                return rate
+        
+        for ancestor in self.ancestors(category_id):
+            rate = self.match(CommissionType.CATEGORY, ancestor, seller_price, at)
+            if rate is not None:
+                return rate
+        
+        rate = self.match(CommissionType.GLOBAL, None, seller_price, at)
+        if rate is not None:
+            return rate
+        
+        # Default fallback
+        return 8.0  # 8% default
+
+
+_rule_table: Optional[CommissionRuleTable] = None
+
+
+def get_commission_rule_table(db: Session) -> CommissionRuleTable:
+    """Get the cached rule table, rebuilding it when invalidated or expired.
     
-    # Default fallback
-    return 8.0  # 8% default
+    The TTL bounds staleness across worker processes, which only see their
+    own invalidations.
+    """
+    global _rule_table
+    table = _rule_table
+    if table is None or time.monotonic() - table.built_at > settings.COMMISSION_RULES_TTL_SECONDS:
+        table = CommissionRuleTable.load(db)
+        if reads_cacheable(db):
+            _rule_table = table
+    return table
+
+
+def invalidate_commission_rules() -> None:
+    """Drop the cached rule table after commission settings or categories change"""
+    global _rule_table
+    _rule_table = None
+    replica_router.mark_invalidation()
+
+
+def get_commission_rate(db: Session, category_id: str, product_id: Optional[str] = None, seller_price: float = 0) -> float:
+    """Get applicable commission rate based on priority:
+    1. Product-specific commission
+    2. Category commission (walking up the category tree)
+    3. Global commission
+    """
+    table = get_commission_rule_table(db)
+    table.ensure_category(db, category_id)
+    return table.resolve(category_id, product_id, seller_price)
 
 
 def calculate_commission(seller_price: float, commission_rate: float) -> CommissionCalculation:
@@ -121,6 +243,7 @@ def create_commission_setting(db: Session, commission: CommissionSettingCreate)
     db.add(db_commission)
     db.commit()
     db.refresh(db_commission)
+    invalidate_commission_rules()
     
     return db_commission
 
@@ -166,6 +289,7 @@ def update_commission_setting(
     
     db.commit()
     db.refresh(db_commission)
+    invalidate_commission_rules()
     
     return db_commission
 
@@ -179,6 +303,7 @@ def delete_commission_setting(db: Session, commission_id: str) -> bool:
     # Soft delete
     db_commission.is_active = False
     db.commit()
+    invalidate_commission_rules()
     
     return True
 
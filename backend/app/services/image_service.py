@@ -0,0 +1,155 @@
+from fastapi import UploadFile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+from PIL import Image, ImageOps
+from ..core.config import settings
+import aiofiles
+import aiofiles.os
+import asyncio
+import os
+import threading
+import uuid
+
+
+# Bytes read from an upload per write
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# WebP renditions made for product images: name -> longest edge in pixels
+RENDITIONS = {
+    "thumbnail": 200,
+    "medium": 600,
+    "large": 1200,
+}
+
+WEBP_QUALITY = 80
+
+PRODUCT_IMAGE_DIR = "products"
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an upload goes past its size limit"""
+
+
+def upload_url(path: str) -> str:
+    """Public URL of a file stored under UPLOAD_DIR (served from /uploads)"""
+    relative = os.path.relpath(path, settings.UPLOAD_DIR)
+    return "/uploads/" + relative.replace(os.sep, "/")
+
+
+def stored_path(url: str) -> str:
+    """Inverse of upload_url"""
+    return os.path.join(settings.UPLOAD_DIR, *url[len("/uploads/"):].split("/"))
+
+
+def _extension(filename: Optional[str]) -> str:
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in settings.ALLOWED_IMAGE_TYPES:
+        raise ValueError(f"Unsupported image type; allowed: {', '.join(settings.ALLOWED_IMAGE_TYPES)}")
+    return extension
+
+
+async def stream_upload(upload: UploadFile, directory: str, max_bytes: int) -> str:
+    """Copy an upload to a new file under `directory` in chunks, returning its path.
+
+    The file is written through aiofiles, so the event loop is not blocked on
+    disk writes, and the copy stops as soon as more than `max_bytes` have
+    arrived instead of reading the whole upload first.
+    """
+    extension = _extension(upload.filename)
+    await aiofiles.os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{uuid.uuid4()}{extension}")
+    partial = path + ".part"
+
+    size = 0
+    try:
+        async with aiofiles.open(partial, "wb") as out:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageTooLargeError(f"File size must be less than {max_bytes // (1024 * 1024)}MB")
+                await out.write(chunk)
+        await aiofiles.os.replace(partial, path)
+    except BaseException:
+        if await aiofiles.os.path.exists(partial):
+            await aiofiles.os.remove(partial)
+        raise
+
+    return path
+
+
+def render_renditions(source: str) -> Dict[str, str]:
+    """Write WebP renditions of an image next to it, returning name -> path.
+
+    Runs in a worker process. Images are only ever scaled down, and EXIF
+    orientation is applied so phone photos are not sideways.
+    """
+    stem = os.path.splitext(source)[0]
+    paths: Dict[str, str] = {}
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+        for name, edge in RENDITIONS.items():
+            rendition = image.copy()
+            rendition.thumbnail((edge, edge), Image.LANCZOS)
+            path = f"{stem}_{name}.webp"
+            rendition.save(path, "WEBP", quality=WEBP_QUALITY, method=4)
+            paths[name] = path
+    return paths
+
+
+class ImageProcessor:
+    """Runs Pillow work on a process pool so resizing never holds the event loop or the GIL"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    async def renditions(self, source: str) -> Dict[str, str]:
+        """Make every rendition of a stored image"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), render_renditions, source)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+image_processor = ImageProcessor(settings.IMAGE_PROCESS_WORKERS)
+
+
+async def remove_files(*paths: Optional[str]) -> None:
+    """Delete stored files, ignoring ones that are already gone"""
+    for path in paths:
+        if path and await aiofiles.os.path.exists(path):
+            await aiofiles.os.remove(path)
+
+
+async def store_product_image(upload: UploadFile) -> Dict[str, str]:
+    """Save a product image upload and its renditions, returning their public URLs.
+
+    Uploads that Pillow cannot read are deleted and rejected with ValueError.
+    """
+    directory = os.path.join(settings.UPLOAD_DIR, PRODUCT_IMAGE_DIR)
+    path = await stream_upload(upload, directory, settings.MAX_FILE_SIZE)
+    try:
+        renditions = await image_processor.renditions(path)
+    except (OSError, Image.DecompressionBombError) as e:
+        await remove_files(path)
+        raise ValueError("File is not a readable image") from e
+
+    urls = {"image_url": upload_url(path)}
+    urls.update({f"{name}_url": upload_url(rendition) for name, rendition in renditions.items()})
+    return urls
@@ -0,0 +1,332 @@
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from ..core.cache import invalidate_tags, PRODUCTS_TAG
+from ..models.product import Product, ProductVariant, ProductImage, ProductVariantAttribute, ProductStatus
+from ..models.seller import Seller
+from ..schemas.product import ProductCreate
+from .commission_service import get_commission_rule_table, calculate_commission
+from .slug_service import generate_slug, SlugAllocator
+from . import search_service
+from datetime import datetime
+import csv
+import json
+import uuid
+
+
+# Rows validated and inserted per transaction
+IMPORT_CHUNK_SIZE = 500
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+# CSV columns holding nested values: images as "|"-separated URLs and
+# variants as a JSON array of ProductVariantCreate objects
+CSV_LIST_SEPARATOR = "|"
+
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    """Guess the import format from a file name"""
+    if not filename:
+        return None
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension == "csv":
+        return "csv"
+    return None
+
+
+def _csv_record(row: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """Turn a flat CSV row into a ProductCreate-shaped dict"""
+    # Older csv modules reject NUL bytes themselves; text columns cannot hold them either way
+    if any(isinstance(value, str) and "\0" in value for value in row.values()):
+        raise ValueError("Row contains a NUL byte")
+    record: Dict[str, Any] = {
+        key.strip(): value.strip()
+        for key, value in row.items()
+        if key and value is not None and value.strip() != ""
+    }
+    images = record.pop("images", None)
+    if images:
+        record["images"] = [
+            {"image_url": url.strip(), "sort_order": position}
+            for position, url in enumerate(images.split(CSV_LIST_SEPARATOR))
+            if url.strip()
+        ]
+    variants = record.pop("variants", None)
+    if variants:
+        record["variants"] = json.loads(variants)
+    return record
+
+
+def _read(items: Iterator[Any]) -> Iterator[Any]:
+    """Items of an iterator over the upload, with read errors yielded in their place.
+
+    A malformed CSV row is reported and skipped. Input that stops decoding is
+    reported once and ends the file, since nothing after it can be trusted.
+    """
+    while True:
+        try:
+            yield next(items)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield ValueError(f"Malformed CSV row: {e}")
+        except UnicodeDecodeError as e:
+            yield ValueError(f"File is not valid UTF-8 from this row on: {e.reason}")
+            return
+
+
+def iter_records(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Parse an import file lazily into (row number, record) pairs.
+
+    Rows are numbered from 1 after the CSV header. A record that cannot be
+    read or parsed is yielded as the exception so the caller can report it
+    and move on.
+    """
+    if fmt == "csv":
+        for number, row in enumerate(_read(iter(csv.DictReader(lines))), start=1):
+            if isinstance(row, Exception):
+                yield number, row
+                continue
+            try:
+                yield number, _csv_record(row)
+            except ValueError as e:
+                yield number, e
+    elif fmt == "jsonl":
+        number = 0
+        for line in _read(iter(lines)):
+            if isinstance(line, Exception):
+                number += 1
+                yield number, line
+                continue
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                yield number, e
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+            for err in error.errors()
+        )
+    return str(error)
+
+
+def _insert_chunk(
+    db: Session,
+    seller_id: str,
+    chunk: List[Tuple[int, ProductCreate]],
+    slugs: SlugAllocator,
+    rates: Dict[tuple, float],
+    taken_skus: Set[str],
+    errors: List[dict]
+) -> int:
+    """Build and bulk insert one chunk of validated products, returning the count inserted.
+
+    Rows rejected here are appended to `errors`, and `taken_skus` gains the
+    SKUs of the rows inserted.
+    """
+    rules = get_commission_rule_table(db)
+    slugs.reserve({generate_slug(product.name) for _, product in chunk})
+
+    # Variant SKUs must be unique across the catalogue and within the file
+    supplied = {variant.sku for _, product in chunk for variant in product.variants if variant.sku}
+    if supplied:
+        existing = db.query(ProductVariant.sku).filter(ProductVariant.sku.in_(supplied)).all()
+        taken_skus.update(sku for sku, in existing)
+
+    now = datetime.utcnow()
+    product_rows: List[dict] = []
+    image_rows: List[dict] = []
+    variant_rows: List[dict] = []
+    attribute_rows: List[dict] = []
+
+    for number, product in chunk:
+        if not rules.ensure_category(db, product.category_id):
+            errors.append({"row": number, "error": "Category not found"})
+            continue
+        skus = [variant.sku for variant in product.variants if variant.sku]
+        duplicate = next((sku for sku in skus if sku in taken_skus), None)
+        if duplicate is None and len(set(skus)) != len(skus):
+            duplicate = next(sku for sku in skus if skus.count(sku) > 1)
+        if duplicate is not None:
+            errors.append({"row": number, "error": f"Variant SKU already exists: {duplicate}"})
+            continue
+        taken_skus.update(skus)
+
+        key = (product.category_id, float(product.seller_price))
+        if key not in rates:
+            rates[key] = rules.resolve(product.category_id, None, product.seller_price)
+        rate = rates[key]
+        calc = calculate_commission(product.seller_price, rate)
+
+        product_id = str(uuid.uuid4())
+        slug = slugs.allocate(generate_slug(product.name))
+        product_rows.append({
+            "id": product_id,
+            "name": product.name,
+            "slug": slug,
+            "description": product.description,
+            "category_id": product.category_id,
+            "seller_id": seller_id,
+            "seller_price": product.seller_price,
+            "commission_rate": calc.commission_rate,
+            "commission_amount": calc.commission_amount,
+            "customer_price": calc.customer_price,
+            "stock_quantity": product.stock_quantity,
+            "tags": product.tags,
+            "meta_title": product.meta_title,
+            "meta_description": product.meta_description,
+            "status": ProductStatus.PENDING,
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now
+        })
+
+        for image in product.images:
+            image_rows.append({
+                "id": str(uuid.uuid4()),
+                "product_id": product_id,
+                "image_url": image.image_url,
+                "alt_text": image.alt_text,
+                "is_primary": False,
+                "sort_order": image.sort_order,
+                "created_at": now
+            })
+
+        for variant in product.variants:
+            variant_id = str(uuid.uuid4())
+            variant_calc = calculate_commission(variant.seller_price, rate)
+            variant_rows.append({
+                "id": variant_id,
+                "product_id": product_id,
+                "variant_name": variant.variant_name,
+                "sku": variant.sku or f"{slug}-variant-{str(uuid.uuid4())[:8]}",
+                "seller_price": variant.seller_price,
+                "commission_rate": variant_calc.commission_rate,
+                "commission_amount": variant_calc.commission_amount,
+                "customer_price": variant_calc.customer_price,
+                "stock_quantity": variant.stock_quantity,
+                "is_active": True,
+                "created_at": now,
+                "updated_at": now
+            })
+            for attribute in variant.attributes:
+                attribute_rows.append({
+                    "id": str(uuid.uuid4()),
+                    "variant_id": variant_id,
+                    "attribute_id": attribute.attribute_id,
+                    "attribute_value_id": attribute.attribute_value_id,
+                    "created_at": now
+                })
+
+    if not product_rows:
+        return 0
+
+    # Parents first, so the rows satisfy foreign keys on databases that check them
+    db.execute(insert(Product), product_rows)
+    if image_rows:
+        db.execute(insert(ProductImage), image_rows)
+    if variant_rows:
+        db.execute(insert(ProductVariant), variant_rows)
+    if attribute_rows:
+        db.execute(insert(ProductVariantAttribute), attribute_rows)
+    search_service.get_backend(db.connection()).insert_rows(db.connection(), [
+        {
+            "product_id": row["id"],
+            "name": row["name"] or "",
+            "description": row["description"] or "",
+            "tags": row["tags"] or "",
+        }
+        for row in product_rows
+    ])
+    db.commit()
+    return len(product_rows)
+
+
+def import_products(
+    db: Session,
+    lines: Iterable[str],
+    fmt: str,
+    seller_id: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE
+) -> dict:
+    """Bulk import products for a seller from CSV or JSONL lines.
+
+    The input is parsed and validated against ProductCreate as it streams,
+    and valid rows are inserted with executemany INSERTs one chunk per
+    transaction. Commission rates and categories come from the cached rule
+    table, and slugs and variant SKUs are allocated per chunk instead of
+    probed per product. Rows that fail are reported and skipped. A chunk that
+    hits a unique constraint is retried once with fresh slug lookups, and one
+    that still fails is rolled back and reported row by row.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+    if not db.query(Seller.id).filter(Seller.id == seller_id).first():
+        raise ValueError("Seller not found")
+
+    report = {"total_rows": 0, "imported": 0, "failed": 0, "errors": []}
+    slugs = SlugAllocator(db, Product.slug)
+    rates: Dict[tuple, float] = {}
+    taken_skus: Set[str] = set()
+    chunk: List[Tuple[int, ProductCreate]] = []
+
+    def flush():
+        nonlocal slugs, taken_skus
+        failure = None
+        # A second attempt covers slugs or SKUs taken by a concurrent writer
+        for attempt in range(2):
+            errors: List[dict] = []
+            chunk_skus = set(taken_skus)
+            try:
+                report["imported"] += _insert_chunk(db, seller_id, chunk, slugs, rates, chunk_skus, errors)
+            except IntegrityError as e:
+                db.rollback()
+                slugs = SlugAllocator(db, Product.slug)
+                failure = e
+                continue
+            except SQLAlchemyError as e:
+                db.rollback()
+                failure = e
+                break
+            report["errors"].extend(errors)
+            taken_skus = chunk_skus
+            failure = None
+            break
+        if failure is not None:
+            report["errors"].extend(
+                {"row": number, "error": f"Insert failed: {failure.__class__.__name__}"} for number, _ in chunk
+            )
+        chunk.clear()
+
+    for number, record in iter_records(lines, fmt):
+        report["total_rows"] += 1
+        try:
+            if isinstance(record, Exception):
+                raise record
+            chunk.append((number, ProductCreate.model_validate(record)))
+        except (ValueError, TypeError) as e:
+            report["errors"].append({"row": number, "error": _error_message(e)})
+            continue
+        if len(chunk) >= chunk_size:
+            flush()
+
+    if chunk:
+        flush()
+
+    report["failed"] = len(report["errors"])
+    report["errors"].sort(key=lambda error: error["row"])
+    if report["imported"]:
+        invalidate_tags(PRODUCTS_TAG)
+    return report
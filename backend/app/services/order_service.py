@@ -1,13 +1,44 @@
+from sqlalchemy import case
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Dict
 from ..models.order import Order, OrderItem, OrderStatus, PaymentStatus
 from ..models.product import Product, ProductVariant
 from ..models.user import User
-from ..schemas.order import OrderCreate, OrderStatusUpdate, PaymentStatusUpdate
+from ..core.cache import invalidate_tags, product_tag
+from ..core.database import async_service
+from ..schemas.order import OrderCreate, OrderStatusUpdate, PaymentStatusUpdate, OrderResponse, OrderListResponse
+from .stats_service import invalidate_stats, ORDER_STATS
 import uuid
+from decimal import Decimal
 from datetime import datetime
 
 
+def generate_order_number() -> str:
+    """Generate a unique, human-readable order number"""
+    return f"ORD-{datetime.utcnow().strftime('%Y%m%d')}-{uuid.uuid4().hex[:8].upper()}"
+
+
+def _decrement_stock(db: Session, model, quantities: Dict[str, int]) -> bool:
+    """Atomically take stock for several rows of one table in a single UPDATE.
+    
+    The stock condition is part of the WHERE clause, so a concurrent checkout
+    that got there first makes the row drop out instead of going negative.
+    Returns False unless every row was decremented.
+    """
+    if not quantities:
+        return True
+    
+    wanted = case(quantities, value=model.id)
+    updated = db.query(model).filter(
+        model.id.in_(list(quantities)),
+        model.stock_quantity >= wanted
+    ).update(
+        {model.stock_quantity: model.stock_quantity - wanted},
+        synchronize_session=False
+    )
+    return updated == len(quantities)
+
+
 def create_order(db: Session, order: OrderCreate, customer_id: str) -> Order:
     """Create a new order"""
     # Validate customer exists
@@ -15,31 +46,62 @@ def create_order(db: Session, order: OrderCreate, customer_id: str) -> Order:
     if not customer:
         raise ValueError("Customer not found")
     
+    # Load every referenced variant and product up front, one IN query each.
+    # Rows are locked in id order (FOR UPDATE is a no-op on SQLite) so prices
+    # and status cannot change underneath the order and lock order is stable.
+    variant_ids = {item.product_variant_id for item in order.items if item.product_variant_id}
+    variants = {}
+    if variant_ids:
+        variants = {
+            variant.id: variant
+            for variant in db.query(ProductVariant)
+            .filter(ProductVariant.id.in_(variant_ids))
+            .order_by(ProductVariant.id)
+            .with_for_update()
+            .all()
+        }
+    
+    product_ids = {item.product_id for item in order.items if not item.product_variant_id}
+    product_ids.update(variant.product_id for variant in variants.values())
+    products = {}
+    if product_ids:
+        products = {
+            product.id: product
+            for product in db.query(Product)
+            .filter(Product.id.in_(product_ids))
+            .order_by(Product.id)
+            .with_for_update()
+            .all()
+        }
+    
     # Validate and calculate totals
-    total_customer_amount = 0.0
-    total_seller_amount = 0.0
-    total_commission_amount = 0.0
+    total_customer_amount = Decimal("0")
+    total_seller_amount = Decimal("0")
+    total_commission_amount = Decimal("0")
     order_items_data = []
+    product_quantities: Dict[str, int] = {}
+    variant_quantities: Dict[str, int] = {}
     
     for item_data in order.items:
         # Get product or variant
         if item_data.product_variant_id:
-            variant = db.query(ProductVariant).filter(ProductVariant.id == item_data.product_variant_id).first()
+            variant = variants.get(item_data.product_variant_id)
             if not variant:
                 raise ValueError(f"Product variant {item_data.product_variant_id} not found")
             
-            product = variant.product
+            product = products.get(variant.product_id)
             seller_unit_price = variant.seller_price
             customer_unit_price = variant.customer_price
             commission_unit_rate = variant.commission_rate
             commission_unit_amount = variant.commission_amount
             
-            # Check stock
-            if variant.stock_quantity < item_data.quantity:
+            # Check stock, counting earlier lines for the same variant
+            variant_quantities[variant.id] = variant_quantities.get(variant.id, 0) + item_data.quantity
+            if variant.stock_quantity < variant_quantities[variant.id]:
                 raise ValueError(f"Insufficient stock for variant {variant.id}")
             
         else:
-            product = db.query(Product).filter(Product.id == item_data.product_id).first()
+            product = products.get(item_data.product_id)
             if not product:
                 raise ValueError(f"Product {item_data.product_id} not found")
             
@@ -48,8 +110,9 @@ def create_order(db: Session, order: OrderCreate, customer_id: str) -> Order:
             commission_unit_rate = product.commission_rate
             commission_unit_amount = product.commission_amount
             
-            # Check stock
-            if product.stock_quantity < item_data.quantity:
+            # Check stock, counting earlier lines for the same product
+            product_quantities[product.id] = product_quantities.get(product.id, 0) + item_data.quantity
+            if product.stock_quantity < product_quantities[product.id]:
                 raise ValueError(f"Insufficient stock for product {product.id}")
         
         # Check if product is approved
@@ -79,9 +142,16 @@ def create_order(db: Session, order: OrderCreate, customer_id: str) -> Order:
             'product_name': product.name
         })
     
+    # Take stock with one conditional UPDATE per table before writing the order
+    if not (_decrement_stock(db, ProductVariant, variant_quantities)
+            and _decrement_stock(db, Product, product_quantities)):
+        db.rollback()
+        raise ValueError("Insufficient stock for one or more items")
+    
     # Create order
     db_order = Order(
         id=str(uuid.uuid4()),
+        order_number=generate_order_number(),
         customer_id=customer_id,
         total_customer_amount=total_customer_amount,
         total_seller_amount=total_seller_amount,
@@ -97,7 +167,6 @@ def create_order(db: Session, order: OrderCreate, customer_id: str) -> Order:
     )
     
     db.add(db_order)
-    db.flush()  # Get the ID
     
     # Create order items
     for item_data in order_items_data:
@@ -108,17 +177,11 @@ def create_order(db: Session, order: OrderCreate, customer_id: str) -> Order:
         )
         db.add(order_item)
     
-    # Update stock quantities
-    for item_data in order.items:
-        if item_data.product_variant_id:
-            variant = db.query(ProductVariant).filter(ProductVariant.id == item_data.product_variant_id).first()
-            variant.stock_quantity -= item_data.quantity
-        else:
-            product = db.query(Product).filter(Product.id == item_data.product_id).first()
-            product.stock_quantity -= item_data.quantity
-    
     db.commit()
     db.refresh(db_order)
+    invalidate_stats(ORDER_STATS)
+    # Stock levels changed; listing pages are tagged with the products they show
+    invalidate_tags(*(product_tag(item["product_id"]) for item in order_items_data))
     
     return db_order
 
@@ -164,6 +227,7 @@ def update_order_status(db: Session, order_id: str, status_update: OrderStatusUp
     
     db.commit()
     db.refresh(db_order)
+    invalidate_stats(ORDER_STATS)
     
     return db_order
 
@@ -181,6 +245,7 @@ def update_payment_status(db: Session, order_id: str, payment_update: PaymentSta
     
     db.commit()
     db.refresh(db_order)
+    invalidate_stats(ORDER_STATS)
     
     return db_order
 
@@ -192,50 +257,6 @@ def get_pending_orders(db: Session, skip: int = 0, limit: int = 100) -> List[Ord
     ).order_by(Order.created_at.asc()).offset(skip).limit(limit).all()
 
 
-def get_order_stats(db: Session) -> dict:
-    """Get order statistics (Admin only)"""
-    try:
-        total_orders = db.query(Order).count()
-        pending_orders = db.query(Order).filter(Order.status == OrderStatus.PENDING).count()
-        processing_orders = db.query(Order).filter(Order.status == OrderStatus.PROCESSING).count()
-        shipped_orders = db.query(Order).filter(Order.status == OrderStatus.SHIPPED).count()
-        delivered_orders = db.query(Order).filter(Order.status == OrderStatus.DELIVERED).count()
-        cancelled_orders = db.query(Order).filter(Order.status == OrderStatus.CANCELLED).count()
-        
-        # Calculate revenue
-        revenue_result = db.query(
-            db.func.sum(Order.total_customer_amount),
-            db.func.sum(Order.total_commission_amount)
-        ).filter(Order.status.in_([OrderStatus.DELIVERED, OrderStatus.SHIPPED])).first()
-        
-        total_revenue = float(revenue_result[0] or 0)
-        total_commission = float(revenue_result[1] or 0)
-        
-        return {
-            "total_orders": total_orders,
-            "pending_orders": pending_orders,
-            "processing_orders": processing_orders,
-            "shipped_orders": shipped_orders,
-            "delivered_orders": delivered_orders,
-            "cancelled_orders": cancelled_orders,
-            "total_revenue": total_revenue,
-            "total_commission": total_commission
-        }
-    except Exception as e:
-        print(f"Error in get_order_stats: {e}")
-        # Return default values if there's an error
-        return {
-            "total_orders": 0,
-            "pending_orders": 0,
-            "processing_orders": 0,
-            "shipped_orders": 0,
-            "delivered_orders": 0,
-            "cancelled_orders": 0,
-            "total_revenue": 0.0,
-            "total_commission": 0.0
-        }
-
-
 def cancel_order(db: Session, order_id: str, admin_notes: Optional[str] = None) -> Optional[Order]:
     """Cancel order and restore stock (Admin only)"""
     db_order = db.query(Order).filter(Order.id == order_id).first()
@@ -265,5 +286,17 @@ def cancel_order(db: Session, order_id: str, admin_notes: Optional[str] = None)
     
     db.commit()
     db.refresh(db_order)
+    invalidate_stats(ORDER_STATS)
+    invalidate_tags(*(product_tag(item.product_id) for item in db_order.items))
     
-    return db_order 
\ No newline at end of file
+    return db_order 
+
+
+# Async variants for routers on AsyncSession
+create_order_async = async_service(create_order, OrderResponse)
+get_order_async = async_service(get_order, OrderResponse)
+get_orders_async = async_service(get_orders, OrderListResponse)
+update_order_status_async = async_service(update_order_status, OrderResponse)
+update_payment_status_async = async_service(update_payment_status, OrderResponse)
+get_pending_orders_async = async_service(get_pending_orders, OrderListResponse)
+cancel_order_async = async_service(cancel_order, OrderResponse)
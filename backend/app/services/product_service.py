@@ -1,20 +1,66 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.orm import Session, Query, joinedload, selectinload
+from sqlalchemy import and_, func, or_
+from typing import List, Optional, Dict, Any
 from ..models.product import Product, ProductVariant, ProductImage, ProductVariantAttribute, ProductStatus
-from ..models.category import Category
+from ..models.category import Category, CategoryClosure
 from ..models.seller import Seller
-from ..schemas.product import ProductCreate, ProductUpdate, ProductApprovalUpdate
+from ..core.cache import invalidate_tags, PRODUCTS_TAG, product_tag
+from ..core.database import async_service
+from ..schemas.product import (
+    ProductCreate, ProductUpdate, ProductApprovalUpdate, ProductResponse, ProductListResponse, ProductImageResponse
+)
 from .commission_service import get_commission_rate, calculate_commission
+from .slug_service import generate_slug, save_with_unique_slug
+from . import search_service
 import uuid
-import re
+import json
+import base64
+from decimal import Decimal
 from datetime import datetime
 
+# Sortable listing columns, keyed by the public sort_by name
+SORT_COLUMNS = {
+    "created_at": Product.created_at,
+    "price": Product.customer_price,
+    "name": Product.name,
+}
 
-def generate_slug(name: str) -> str:
-    """Generate URL-friendly slug from product name"""
-    slug = re.sub(r'[^a-zA-Z0-9\s-]', '', name.lower())
-    slug = re.sub(r'[-\s]+', '-', slug)
-    return slug.strip('-')
+# Listing row keys holding each sort column's value
+SORT_ROW_KEYS = {
+    "created_at": "created_at",
+    "price": "customer_price",
+    "name": "name",
+}
+
+# Product fields that decide which cached listing pages show a product and in
+# what order: customer listings filter on status, category and price, sort on
+# price and name, and search name, description and tags
+LISTING_FIELDS = {"status", "category_id", "seller_price", "customer_price", "name", "description", "tags"}
+
+# Search-only sort: full-text rank first, newest first among equal ranks
+RELEVANCE_SORT = "relevance"
+
+
+def _listing_fields_changed(product: Product, values: Dict[str, Any]) -> bool:
+    """Whether applying values to a product would change any listing field"""
+    for field in LISTING_FIELDS & values.keys():
+        current, new = getattr(product, field), values[field]
+        if isinstance(current, Decimal) and new is not None:
+            # Prices are stored to the cent; computed ones arrive as floats
+            if round(current, 2) != round(Decimal(str(new)), 2):
+                return True
+        elif current != new:
+            return True
+    return False
+
+
+def _invalidate_product(product_id: str, listing_changed: bool) -> None:
+    """Purge a product's cached responses, and every cached listing page when
+    the product may have joined, left or moved within them"""
+    if listing_changed:
+        invalidate_tags(PRODUCTS_TAG, product_tag(product_id))
+    else:
+        invalidate_tags(product_tag(product_id))
 
 
 def create_product(db: Session, product: ProductCreate, seller_id: str) -> Product:
@@ -29,15 +75,6 @@ def create_product(db: Session, product: ProductCreate, seller_id: str) -> Produ
     if not seller:
         raise ValueError("Seller not found")
     
-    # Generate unique slug
-    base_slug = generate_slug(product.name)
-    slug = base_slug
-    counter = 1
-    
-    while db.query(Product).filter(Product.slug == slug).first():
-        slug = f"{base_slug}-{counter}"
-        counter += 1
-    
     # Calculate commission
     commission_rate = get_commission_rate(db, product.category_id, seller_price=product.seller_price)
     commission_calc = calculate_commission(product.seller_price, commission_rate)
@@ -46,7 +83,6 @@ def create_product(db: Session, product: ProductCreate, seller_id: str) -> Produ
     db_product = Product(
         id=str(uuid.uuid4()),
         name=product.name,
-        slug=slug,
         description=product.description,
         category_id=product.category_id,
         seller_id=seller_id,
@@ -61,8 +97,12 @@ def create_product(db: Session, product: ProductCreate, seller_id: str) -> Produ
         status=ProductStatus.PENDING
     )
     
-    db.add(db_product)
-    db.flush()  # Get the ID
+    # Claim a unique slug with the insert itself, retrying if another writer takes it
+    def claim_slug(slug: str):
+        db_product.slug = slug
+        db.add(db_product)
+    
+    save_with_unique_slug(db, Product.slug, generate_slug(product.name), claim_slug)
     
     # Add images
     for img_data in product.images:
@@ -107,8 +147,12 @@ def create_product(db: Session, product: ProductCreate, seller_id: str) -> Produ
             )
             db.add(variant_attr)
     
+    search_service.index_product(db, db_product)
+    
     db.commit()
     db.refresh(db_product)
+    # New products await approval, so no cached customer listing shows them yet
+    _invalidate_product(db_product.id, db_product.status == ProductStatus.APPROVED)
     
     return db_product
 
@@ -123,24 +167,33 @@ def get_product_by_slug(db: Session, slug: str) -> Optional[Product]:
     return db.query(Product).filter(Product.slug == slug).first()
 
 
-def get_products(
-    db: Session, 
-    skip: int = 0, 
-    limit: int = 100,
+def _filter_products(
+    query: Query,
     category_id: Optional[str] = None,
     seller_id: Optional[str] = None,
     status: Optional[ProductStatus] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
-    search: Optional[str] = None
-) -> List[Product]:
-    """Get products with filtering"""
-    query = db.query(Product)
-    
-    if category_id:
+    search: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    include_descendants: bool = False,
+    order_by_rank: bool = False
+) -> Query:
+    """Apply the common product listing filters to a query.
+    
+    With order_by_rank, full-text matches are ordered best match first;
+    callers add their own ordering after it as the tie-breaker.
+    """
+    if category_id and include_descendants:
+        # Match the whole subtree through the closure table's primary key
+        subtree = query.session.query(CategoryClosure.descendant_id).filter(
+            CategoryClosure.ancestor_id == category_id
+        )
+        query = query.filter(Product.category_id.in_(subtree))
+    elif category_id:
         query = query.filter(Product.category_id == category_id)
     
-    if seller_id:
+    if seller_id is not None:
         query = query.filter(Product.seller_id == seller_id)
     
     if status:
@@ -153,13 +206,215 @@ def get_products(
         query = query.filter(Product.customer_price <= max_price)
     
     if search:
-        query = query.filter(
-            Product.name.contains(search) | 
-            Product.description.contains(search) |
-            Product.tags.contains(search)
+        # Join the full-text index; fall back to substring scans without one
+        matches = search_service.match_subquery(query.session, search)
+        if matches is not None:
+            query = query.join(matches, matches.c.product_id == Product.id)
+            if order_by_rank:
+                query = query.order_by(matches.c.rank)
+        else:
+            query = query.filter(
+                Product.name.contains(search) | 
+                Product.description.contains(search) |
+                Product.tags.contains(search)
+            )
+    
+    if created_after:
+        query = query.filter(Product.created_at >= created_after)
+    
+    return query
+
+
+def encode_product_cursor(row: Dict[str, Any], sort_by: str = "created_at") -> str:
+    """Build an opaque keyset cursor pointing just past a listing row"""
+    value = row[SORT_ROW_KEYS[sort_by]]
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif sort_by == "price":
+        value = str(value)
+    payload = json.dumps([sort_by, value, row["id"]])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_product_cursor(cursor: str, sort_by: str = "created_at") -> tuple:
+    """Decode a keyset cursor into (sort value, product id)"""
+    try:
+        cursor_sort_by, value, product_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
         )
+        if sort_by == "created_at":
+            value = datetime.fromisoformat(value)
+        elif sort_by == "price":
+            value = Decimal(value)
+    except (ValueError, TypeError, ArithmeticError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    
+    if cursor_sort_by != sort_by:
+        raise ValueError("Cursor does not match the requested sort order")
+    
+    return value, product_id
+
+
+def resolve_sort(sort_by: Optional[str], search: Optional[str] = None) -> str:
+    """Pick the listing sort: relevance when searching without an explicit
+    sort, newest first otherwise"""
+    if sort_by:
+        return sort_by
+    return RELEVANCE_SORT if search else "created_at"
+
+
+def _order_products(
+    query: Query,
+    sort_by: str = "created_at",
+    sort_order: str = "desc",
+    cursor: Optional[str] = None
+) -> Query:
+    """Order a product query in SQL, optionally resuming after a keyset cursor.
+    
+    Product.id breaks ties so the ordering is total and cursors never skip or
+    repeat rows that share a sort value. Relevance order has no keyset cursor;
+    it pages with skip instead.
+    """
+    if sort_by == RELEVANCE_SORT:
+        if cursor:
+            raise ValueError("Cursors are not supported when sorting by relevance")
+        return query.order_by(Product.created_at.desc(), Product.id.desc())
+    
+    if sort_by not in SORT_COLUMNS:
+        raise ValueError(f"Invalid sort field: {sort_by}")
+    
+    column = SORT_COLUMNS[sort_by]
+    descending = sort_order == "desc"
+    
+    if cursor:
+        value, product_id = decode_product_cursor(cursor, sort_by)
+        if descending:
+            query = query.filter(or_(
+                column < value,
+                and_(column == value, Product.id < product_id)
+            ))
+        else:
+            query = query.filter(or_(
+                column > value,
+                and_(column == value, Product.id > product_id)
+            ))
+    
+    if descending:
+        return query.order_by(column.desc(), Product.id.desc())
+    return query.order_by(column.asc(), Product.id.asc())
+
+
+def get_products(
+    db: Session, 
+    skip: int = 0, 
+    limit: int = 100,
+    category_id: Optional[str] = None,
+    seller_id: Optional[str] = None,
+    status: Optional[ProductStatus] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    search: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    sort_by: Optional[str] = None,
+    sort_order: str = "desc",
+    cursor: Optional[str] = None,
+    include_descendants: bool = False
+) -> List[Product]:
+    """Get products with filtering, SQL-side sorting and optional keyset cursor.
+    
+    With include_descendants, category_id matches products in that category
+    and every category below it. Searches without a sort_by come back best
+    match first.
+    """
+    sort_by = resolve_sort(sort_by, search)
+    query = _filter_products(
+        db.query(Product),
+        category_id=category_id, seller_id=seller_id, status=status,
+        min_price=min_price, max_price=max_price, search=search,
+        created_after=created_after, include_descendants=include_descendants,
+        order_by_rank=sort_by == RELEVANCE_SORT
+    )
+    query = _order_products(query, sort_by, sort_order, cursor)
     
-    return query.order_by(Product.created_at.desc()).offset(skip).limit(limit).all()
+    return query.offset(skip).limit(limit).all()
+
+
+def count_products(db: Session, **filters) -> int:
+    """Count products matching the get_products filters, without loading them"""
+    return _filter_products(db.query(func.count(Product.id)), **filters).scalar()
+
+
+def _listing_row(product: Product) -> Dict[str, Any]:
+    """Serialize an eagerly loaded product into a ProductListResponse-shaped dict"""
+    seller_name = "Unknown Seller"
+    seller_email = "unknown@example.com"
+    
+    if product.seller and product.seller.user:
+        seller_name = f"{product.seller.user.first_name} {product.seller.user.last_name}"
+        seller_email = product.seller.user.email
+    
+    # Primary image first, then the seller's chosen order
+    images = sorted(product.images, key=lambda img: (not img.is_primary, img.sort_order or 0))
+    
+    return {
+        "id": product.id,
+        "name": product.name,
+        "slug": product.slug,
+        "seller_id": product.seller_id,
+        "category_id": product.category_id,
+        "seller_price": float(product.seller_price),
+        "customer_price": float(product.customer_price),
+        "commission_rate": float(product.commission_rate),
+        "stock_quantity": product.stock_quantity,
+        "status": product.status,
+        "created_at": product.created_at,
+        # Listings show thumbnails where an upload has them
+        "images": [
+            {
+                "id": img.id,
+                "image_url": img.thumbnail_url or img.image_url,
+                "thumbnail_url": img.thumbnail_url,
+                "alt_text": img.alt_text,
+                "sort_order": img.sort_order or 0
+            }
+            for img in images
+        ],
+        "seller_name": seller_name,
+        "seller_email": seller_email,
+        "average_rating": product.average_rating,
+        "total_reviews": product.total_reviews
+    }
+
+
+def get_product_listing(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    sort_by: Optional[str] = None,
+    sort_order: str = "desc",
+    cursor: Optional[str] = None,
+    **filters
+) -> List[Dict[str, Any]]:
+    """Get ready-to-serialize product listing rows.
+    
+    Sellers, their users and rating summaries are joined into the product
+    query and images are loaded with one extra IN query, so a page costs two
+    queries regardless of its size. Accepts the same filters, sorting and
+    cursor as get_products.
+    """
+    sort_by = resolve_sort(sort_by, filters.get("search"))
+    query = _filter_products(
+        db.query(Product), order_by_rank=sort_by == RELEVANCE_SORT, **filters
+    ).options(
+        joinedload(Product.seller).joinedload(Seller.user),
+        joinedload(Product.rating_summary),
+        selectinload(Product.images)
+    )
+    
+    query = _order_products(query, sort_by, sort_order, cursor)
+    
+    products = query.offset(skip).limit(limit).all()
+    return [_listing_row(product) for product in products]
 
 
 def update_product(db: Session, product_id: str, product_update: ProductUpdate, seller_id: Optional[str] = None) -> Optional[Product]:
@@ -169,23 +424,11 @@ def update_product(db: Session, product_id: str, product_update: ProductUpdate,
         return None
     
     # If seller_id is provided, ensure the seller owns the product
-    if seller_id and db_product.seller_id != seller_id:
+    if seller_id is not None and db_product.seller_id != seller_id:
         raise ValueError("Not authorized to update this product")
     
     update_data = product_update.dict(exclude_unset=True)
     
-    # Handle slug regeneration if name changed
-    if "name" in update_data:
-        base_slug = generate_slug(update_data["name"])
-        slug = base_slug
-        counter = 1
-        
-        while db.query(Product).filter(Product.slug == slug, Product.id != product_id).first():
-            slug = f"{base_slug}-{counter}"
-            counter += 1
-        
-        update_data["slug"] = slug
-    
     # Recalculate commission if price or category changed
     if "seller_price" in update_data or "category_id" in update_data:
         category_id = update_data.get("category_id", db_product.category_id)
@@ -199,16 +442,29 @@ def update_product(db: Session, product_id: str, product_update: ProductUpdate,
         update_data["customer_price"] = commission_calc.customer_price
     
     # Reset status to pending if product details changed (except for admin updates)
-    if seller_id and any(key in update_data for key in ["name", "description", "category_id", "seller_price"]):
+    if seller_id is not None and any(key in update_data for key in ["name", "description", "category_id", "seller_price"]):
         update_data["status"] = ProductStatus.PENDING
     
     update_data["updated_at"] = datetime.utcnow()
+    listing_changed = _listing_fields_changed(db_product, update_data)
     
     for field, value in update_data.items():
         setattr(db_product, field, value)
     
+    # Regenerate the slug if the name changed
+    if "name" in update_data:
+        save_with_unique_slug(
+            db, Product.slug, generate_slug(update_data["name"]),
+            lambda slug: setattr(db_product, "slug", slug),
+            exclude_id=product_id,
+            current=db_product.slug
+        )
+    
+    search_service.index_product(db, db_product)
+    
     db.commit()
     db.refresh(db_product)
+    _invalidate_product(db_product.id, listing_changed)
     
     return db_product
 
@@ -219,6 +475,7 @@ def approve_product(db: Session, product_id: str, approval: ProductApprovalUpdat
     if not db_product:
         return None
     
+    listing_changed = db_product.status != approval.status
     db_product.status = approval.status
     db_product.rejection_reason = approval.admin_notes
     db_product.updated_at = datetime.utcnow()
@@ -232,11 +489,17 @@ def approve_product(db: Session, product_id: str, approval: ProductApprovalUpdat
             db_product.seller_price, 
             approval.commission_rate
         )
+        listing_changed = listing_changed or _listing_fields_changed(
+            db_product, {"customer_price": commission_calc.customer_price}
+        )
         db_product.commission_amount = commission_calc.commission_amount
         db_product.customer_price = commission_calc.customer_price
     
+    search_service.index_product(db, db_product)
+    
     db.commit()
     db.refresh(db_product)
+    _invalidate_product(db_product.id, listing_changed)
     
     return db_product
 
@@ -248,24 +511,68 @@ def delete_product(db: Session, product_id: str, seller_id: Optional[str] = None
         return False
     
     # If seller_id is provided, ensure the seller owns the product
-    if seller_id and db_product.seller_id != seller_id:
+    if seller_id is not None and db_product.seller_id != seller_id:
         raise ValueError("Not authorized to delete this product")
     
     # Check if product has orders (implement when order model is ready)
     
     # Soft delete
+    listing_changed = db_product.status != ProductStatus.HIDDEN
     db_product.status = ProductStatus.HIDDEN
     db_product.updated_at = datetime.utcnow()
     db.commit()
+    _invalidate_product(product_id, listing_changed)
     
     return True
 
 
-def get_pending_products(db: Session, skip: int = 0, limit: int = 100) -> List[Product]:
-    """Get products pending approval (Admin only)"""
-    return db.query(Product).filter(
-        Product.status == ProductStatus.PENDING
-    ).order_by(Product.created_at.asc()).offset(skip).limit(limit).all()
+def add_product_image(
+    db: Session,
+    product_id: str,
+    urls: Dict[str, str],
+    alt_text: Optional[str] = None,
+    sort_order: int = 0,
+    is_primary: bool = False,
+    seller_id: Optional[str] = None
+) -> Optional[ProductImage]:
+    """Record a stored image and its rendition URLs on a product"""
+    db_product = db.query(Product).filter(Product.id == product_id).first()
+    if not db_product:
+        return None
+    
+    # If seller_id is provided, ensure the seller owns the product
+    if seller_id is not None and db_product.seller_id != seller_id:
+        raise ValueError("Not authorized to update this product")
+    
+    if is_primary:
+        db.query(ProductImage).filter(ProductImage.product_id == product_id).update(
+            {ProductImage.is_primary: False}, synchronize_session=False
+        )
+    
+    image = ProductImage(
+        id=str(uuid.uuid4()),
+        product_id=product_id,
+        image_url=urls["image_url"],
+        thumbnail_url=urls.get("thumbnail_url"),
+        medium_url=urls.get("medium_url"),
+        large_url=urls.get("large_url"),
+        alt_text=alt_text,
+        is_primary=is_primary,
+        sort_order=sort_order
+    )
+    db.add(image)
+    db.commit()
+    db.refresh(image)
+    _invalidate_product(product_id, False)
+    
+    return image
+
+
+def get_pending_products(db: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    """Get products pending approval, oldest first, as listing rows (Admin only)"""
+    return get_product_listing(
+        db, skip=skip, limit=limit, sort_by="created_at", sort_order="asc", status=ProductStatus.PENDING
+    )
 
 
 def recalculate_product_commission(db: Session, product_id: str) -> Optional[Product]:
@@ -277,6 +584,7 @@ def recalculate_product_commission(db: Session, product_id: str) -> Optional[Pro
     # Recalculate main product commission
     commission_rate = get_commission_rate(db, db_product.category_id, product_id, db_product.seller_price)
     commission_calc = calculate_commission(db_product.seller_price, commission_rate)
+    listing_changed = _listing_fields_changed(db_product, {"customer_price": commission_calc.customer_price})
     
     db_product.commission_rate = commission_calc.commission_rate
     db_product.commission_amount = commission_calc.commission_amount
@@ -292,5 +600,21 @@ def recalculate_product_commission(db: Session, product_id: str) -> Optional[Pro
     
     db.commit()
     db.refresh(db_product)
+    _invalidate_product(product_id, listing_changed)
     
-    return db_product 
\ No newline at end of file
+    return db_product
+
+
+# Async variants for routers on AsyncSession
+create_product_async = async_service(create_product, ProductResponse)
+get_product_async = async_service(get_product, ProductResponse)
+get_product_by_slug_async = async_service(get_product_by_slug, ProductResponse)
+get_products_async = async_service(get_products, ProductListResponse)
+count_products_async = async_service(count_products)
+get_product_listing_async = async_service(get_product_listing)
+update_product_async = async_service(update_product, ProductResponse)
+approve_product_async = async_service(approve_product, ProductResponse)
+delete_product_async = async_service(delete_product)
+add_product_image_async = async_service(add_product_image, ProductImageResponse)
+get_pending_products_async = async_service(get_pending_products, ProductListResponse)
+recalculate_product_commission_async = async_service(recalculate_product_commission, ProductResponse)
@@ -1,10 +1,13 @@
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
+from ..core.config import settings
 from ..models.user import User
-from ..core.security import verify_password, get_password_hash
+from ..core.security import verify_password_async, hash_password_async
 from ..schemas.profile import ProfileUpdate, PasswordUpdate
+from .image_service import stream_upload
 import os
-import uuid
 from datetime import datetime
 
 
@@ -37,47 +40,32 @@ def update_profile(db: Session, user_id: str, profile_data: ProfileUpdate) -> Op
         raise e
 
 
-def update_password(db: Session, user_id: str, password_data: PasswordUpdate) -> bool:
-    """Update user password"""
-    user = db.query(User).filter(User.id == user_id).first()
+async def update_password(db: AsyncSession, user_id: str, password_data: PasswordUpdate) -> bool:
+    """Update user password, hashing on the shared hashing pool"""
+    user = await db.get(User, user_id)
     if not user:
         return False
     
     # Verify current password
-    if not verify_password(password_data.current_password, user.password_hash):
+    valid, _ = await verify_password_async(password_data.current_password, user.password_hash)
+    if not valid:
         raise ValueError("Current password is incorrect")
     
     # Update password
-    user.password_hash = get_password_hash(password_data.new_password)
+    user.password_hash = await hash_password_async(password_data.new_password)
     user.updated_at = datetime.utcnow()
     
     try:
-        db.commit()
+        await db.commit()
         return True
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise e
 
 
-def save_profile_image(file_content: bytes, filename: str) -> str:
+async def save_profile_image(upload: UploadFile) -> str:
     """Save profile image and return the file path"""
-    from ..core.config import settings
-    
-    # Create uploads directory if it doesn't exist
-    upload_dir = settings.UPLOAD_DIR
-    if not os.path.exists(upload_dir):
-        os.makedirs(upload_dir)
-    
-    # Generate unique filename
-    file_extension = os.path.splitext(filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(upload_dir, unique_filename)
-    
-    # Save file
-    with open(file_path, "wb") as f:
-        f.write(file_content)
-    
-    return file_path
+    return await stream_upload(upload, settings.UPLOAD_DIR, settings.PROFILE_IMAGE_MAX_SIZE)
 
 
 def delete_profile_image(file_path: str) -> bool:
@@ -0,0 +1,245 @@
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+from typing import Callable, Dict, List, Optional, Set
+from ..core.cache import invalidate_tags, PRODUCTS_TAG, product_tag
+from ..core.database import SessionLocal
+from ..models.product import Product, ProductVariant
+from ..models.commission import CommissionType
+from .commission_service import get_commission_rule_table, calculate_commission
+from datetime import datetime
+import threading
+import uuid
+
+
+# Products read, priced and written per transaction
+RECALCULATION_CHUNK_SIZE = 500
+
+# Times a chunk is re-read when sellers change prices while it is being repriced
+RECALCULATION_CHUNK_ATTEMPTS = 3
+
+# Most recent jobs kept for status lookups
+MAX_TRACKED_JOBS = 20
+
+_jobs: Dict[str, dict] = {}
+_jobs_lock = threading.Lock()
+
+
+def _changed(stored, new_value: float) -> bool:
+    """Whether a stored DECIMAL(·, 2) column differs from a computed value"""
+    return stored is None or round(float(stored), 2) != round(new_value, 2)
+
+
+def _write_prices(db: Session, model, rows: List[dict]) -> Set[str]:
+    """Write computed prices with one executemany UPDATE, returning the IDs written.
+
+    Each row is matched on its ID and the seller_price it was priced from,
+    so a row whose price a seller changed in the meantime is left alone.
+    Drivers do not reliably report executemany row counts, so the written
+    rows are found by re-reading their seller prices in the same transaction.
+    """
+    if not rows:
+        return set()
+    table = model.__table__
+    statement = update(table).where(
+        table.c.id == bindparam("b_id"),
+        table.c.seller_price == bindparam("b_seller_price", type_=table.c.seller_price.type)
+    )
+    db.execute(statement, rows)
+
+    priced_from = {row["b_id"]: row["b_seller_price"] for row in rows}
+    current = db.execute(
+        select(table.c.id, table.c.seller_price).where(table.c.id.in_(list(priced_from)))
+    ).all()
+    return {row.id for row in current if row.seller_price == priced_from[row.id]}
+
+
+def _price_row(row, calc, now: datetime) -> dict:
+    return {
+        "b_id": row.id,
+        "b_seller_price": row.seller_price,
+        "commission_rate": calc.commission_rate,
+        "commission_amount": calc.commission_amount,
+        "customer_price": calc.customer_price,
+        "updated_at": now
+    }
+
+
+def recalculate_all_commissions(
+    db: Session,
+    chunk_size: int = RECALCULATION_CHUNK_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> dict:
+    """Recalculate stored commission and customer prices for every product and variant.
+
+    Products are streamed in primary-key order, one chunk per transaction.
+    Rates are resolved once per (category, product override, price band)
+    from the cached rule table, and only rows whose stored prices changed are
+    written, with one executemany UPDATE per table per chunk. A chunk in
+    which a seller changed a price after it was read is re-read and repriced.
+    """
+    rules = get_commission_rule_table(db)
+    at = datetime.utcnow()
+    rates: Dict[tuple, float] = {}
+    total = db.query(Product).count()
+    processed = 0
+    updated_products = 0
+    updated_variants = 0
+    last_id = ""
+    attempt = 1
+
+    while True:
+        products = (
+            db.query(
+                Product.id, Product.category_id, Product.seller_price,
+                Product.commission_rate, Product.customer_price
+            )
+            .filter(Product.id > last_id)
+            .order_by(Product.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not products:
+            break
+
+        now = datetime.utcnow()
+        product_rates: Dict[str, float] = {}
+        product_rows: List[dict] = []
+        for product in products:
+            rules.ensure_category(db, product.category_id)
+            # Only products with their own rule need a per-product resolution
+            override = product.id if rules.has_rules(CommissionType.PRODUCT, product.id) else None
+            key = (product.category_id, override, rules.price_band(product.category_id, override, product.seller_price))
+            if key not in rates:
+                rates[key] = rules.resolve(product.category_id, override, product.seller_price, at)
+            rate = rates[key]
+            product_rates[product.id] = rate
+
+            calc = calculate_commission(product.seller_price, rate)
+            if _changed(product.commission_rate, calc.commission_rate) or _changed(product.customer_price, calc.customer_price):
+                product_rows.append(_price_row(product, calc, now))
+
+        # Variants follow their product's rate, as in recalculate_product_commission
+        variants = (
+            db.query(
+                ProductVariant.id, ProductVariant.product_id, ProductVariant.seller_price,
+                ProductVariant.commission_rate, ProductVariant.customer_price
+            )
+            .filter(ProductVariant.product_id.in_(list(product_rates)))
+            .all()
+        )
+        variant_rows: List[dict] = []
+        for variant in variants:
+            calc = calculate_commission(variant.seller_price, product_rates[variant.product_id])
+            if _changed(variant.commission_rate, calc.commission_rate) or _changed(variant.customer_price, calc.customer_price):
+                variant_rows.append(_price_row(variant, calc, now))
+
+        written_products = _write_prices(db, Product, product_rows)
+        written_variants = _write_prices(db, ProductVariant, variant_rows)
+        db.commit()
+        if written_products or written_variants:
+            changed_products = written_products | {
+                variant.product_id for variant in variants if variant.id in written_variants
+            }
+            invalidate_tags(PRODUCTS_TAG, *(product_tag(product_id) for product_id in changed_products))
+
+        updated_products += len(written_products)
+        updated_variants += len(written_variants)
+        stale = len(written_products) < len(product_rows) or len(written_variants) < len(variant_rows)
+        if stale and attempt < RECALCULATION_CHUNK_ATTEMPTS:
+            # Rows already written now compare unchanged, so only the repriced ones are rewritten
+            attempt += 1
+            continue
+
+        attempt = 1
+        processed += len(products)
+        last_id = products[-1].id
+        if progress:
+            progress(processed, total)
+
+    return {
+        "total_products": total,
+        "processed_products": processed,
+        "updated_products": updated_products,
+        "updated_variants": updated_variants
+    }
+
+
+def create_recalculation_job(reason: str) -> dict:
+    """Register a queued recalculation job, reusing one that has not started yet"""
+    with _jobs_lock:
+        for job in _jobs.values():
+            if job["status"] == "queued":
+                return dict(job)
+
+        job = {
+            "id": str(uuid.uuid4()),
+            "status": "queued",
+            "reason": reason,
+            "total_products": 0,
+            "processed_products": 0,
+            "updated_products": 0,
+            "updated_variants": 0,
+            "error": None,
+            "created_at": datetime.utcnow(),
+            "started_at": None,
+            "finished_at": None
+        }
+        _jobs[job["id"]] = job
+
+        # Forget the oldest finished jobs
+        while len(_jobs) > MAX_TRACKED_JOBS:
+            oldest = next(
+                (job_id for job_id, tracked in _jobs.items() if tracked["status"] in ("completed", "failed")),
+                None
+            )
+            if oldest is None:
+                break
+            del _jobs[oldest]
+
+        return dict(job)
+
+
+def run_recalculation_job(job_id: str) -> None:
+    """Run a queued job in its own session (used as a background task)"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None or job["status"] != "queued":
+            return
+        job["status"] = "running"
+        job["started_at"] = datetime.utcnow()
+
+    def report(processed: int, total: int):
+        with _jobs_lock:
+            job["processed_products"] = processed
+            job["total_products"] = total
+
+    db = SessionLocal()
+    try:
+        result = recalculate_all_commissions(db, progress=report)
+        with _jobs_lock:
+            job.update(result)
+            job["status"] = "completed"
+    except Exception as e:
+        db.rollback()
+        with _jobs_lock:
+            job["status"] = "failed"
+            job["error"] = str(e)
+        print(f"Commission recalculation job {job_id} failed: {e}")
+    finally:
+        with _jobs_lock:
+            job["finished_at"] = datetime.utcnow()
+        db.close()
+
+
+def get_recalculation_job(job_id: str) -> Optional[dict]:
+    """Get a snapshot of a recalculation job by ID"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+
+def get_recalculation_jobs() -> List[dict]:
+    """Get snapshots of tracked recalculation jobs, newest first"""
+    with _jobs_lock:
+        jobs = [dict(job) for job in _jobs.values()]
+    return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
@@ -0,0 +1,204 @@
+from sqlalchemy import case, func, update, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional
+from ..core.cache import invalidate_tags, product_tag
+from ..models.product import Product
+from ..models.review import ProductReview, ProductRatingSummary
+from ..schemas.review import ReviewCreate, ReviewUpdate
+
+
+def _empty_breakdown() -> dict:
+    return {star: 0 for star in range(1, 6)}
+
+
+def _adjust_summary(db: Session, product_id: str, rating: int, delta: int) -> None:
+    """Add (delta=1) or remove (delta=-1) one approved rating from a product's totals.
+
+    The counters are bumped with a single UPDATE relative to their stored
+    values, so concurrent reviews of the same product cannot lose updates.
+    """
+    star = f"rating_{rating}"
+    statement = (
+        update(ProductRatingSummary)
+        .where(ProductRatingSummary.product_id == product_id)
+        .values({
+            ProductRatingSummary.review_count: ProductRatingSummary.review_count + delta,
+            ProductRatingSummary.rating_sum: ProductRatingSummary.rating_sum + delta * rating,
+            getattr(ProductRatingSummary, star): getattr(ProductRatingSummary, star) + delta,
+            ProductRatingSummary.updated_at: func.now()
+        })
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(statement).rowcount or delta < 0:
+        return
+
+    # First approved review of this product
+    try:
+        with db.begin_nested():
+            db.execute(insert(ProductRatingSummary).values({
+                "product_id": product_id,
+                "review_count": 1,
+                "rating_sum": rating,
+                **{f"rating_{other}": int(other == rating) for other in range(1, 6)}
+            }))
+    except IntegrityError:
+        # Another request created the row first
+        db.execute(statement)
+
+
+def _record_change(db: Session, product_id: str, old_rating: Optional[int], new_rating: Optional[int]) -> None:
+    """Move a review's contribution from old_rating to new_rating (None = not counted)"""
+    if old_rating == new_rating:
+        return
+    if old_rating is not None:
+        _adjust_summary(db, product_id, old_rating, -1)
+    if new_rating is not None:
+        _adjust_summary(db, product_id, new_rating, 1)
+
+
+def _counted_rating(review: ProductReview) -> Optional[int]:
+    """The rating a review contributes to its product's totals"""
+    return review.rating if review.is_approved else None
+
+
+def _invalidate_product(product_id: str) -> None:
+    # Ratings never decide which listing pages show a product, and the pages
+    # that show its rating carry its tag
+    invalidate_tags(product_tag(product_id))
+
+
+def create_review(db: Session, review: ReviewCreate, customer_id: str) -> ProductReview:
+    """Create a review and count it towards the product's rating"""
+    db_review = ProductReview(
+        product_id=review.product_id,
+        customer_id=customer_id,
+        rating=review.rating,
+        comment=review.comment,
+        is_approved=True
+    )
+    db.add(db_review)
+    db.flush()
+    _record_change(db, db_review.product_id, None, _counted_rating(db_review))
+    db.commit()
+    db.refresh(db_review)
+    _invalidate_product(db_review.product_id)
+    return db_review
+
+
+def update_review(db: Session, review: ProductReview, review_update: ReviewUpdate) -> ProductReview:
+    """Update a review's rating or comment, adjusting the product's rating"""
+    old_rating = _counted_rating(review)
+    if review_update.rating is not None:
+        review.rating = review_update.rating
+    if review_update.comment is not None:
+        review.comment = review_update.comment
+
+    _record_change(db, review.product_id, old_rating, _counted_rating(review))
+    db.commit()
+    db.refresh(review)
+    _invalidate_product(review.product_id)
+    return review
+
+
+def delete_review(db: Session, review: ProductReview) -> None:
+    """Delete a review and remove it from the product's rating"""
+    product_id = review.product_id
+    _record_change(db, product_id, _counted_rating(review), None)
+    db.delete(review)
+    db.commit()
+    _invalidate_product(product_id)
+
+
+def set_review_approval(db: Session, review_id: str, is_approved: bool) -> Optional[ProductReview]:
+    """Approve or hide a review; only approved reviews count towards ratings (Admin only)"""
+    review = db.query(ProductReview).filter(ProductReview.id == review_id).first()
+    if not review:
+        return None
+
+    old_rating = _counted_rating(review)
+    review.is_approved = is_approved
+    _record_change(db, review.product_id, old_rating, _counted_rating(review))
+    db.commit()
+    db.refresh(review)
+    _invalidate_product(review.product_id)
+    return review
+
+
+def get_rating_stats(db: Session, product_id: str) -> Optional[dict]:
+    """Get a product's rating summary with one primary-key lookup (None if no product)"""
+    row = (
+        db.query(Product.id, ProductRatingSummary)
+        .outerjoin(ProductRatingSummary, ProductRatingSummary.product_id == Product.id)
+        .filter(Product.id == product_id)
+        .first()
+    )
+    if row is None:
+        return None
+
+    summary = row.ProductRatingSummary
+    if summary is None or not summary.review_count:
+        return {"average_rating": 0.0, "total_reviews": 0, "rating_breakdown": _empty_breakdown()}
+    return {
+        "average_rating": summary.average_rating,
+        "total_reviews": summary.review_count,
+        "rating_breakdown": summary.rating_breakdown
+    }
+
+
+def get_product_reviews(db: Session, product_id: str, skip: int = 0, limit: int = 50) -> List[ProductReview]:
+    """Get a product's approved reviews with their authors, newest first"""
+    return (
+        db.query(ProductReview)
+        .options(joinedload(ProductReview.customer))
+        .filter(ProductReview.product_id == product_id, ProductReview.is_approved == True)
+        .order_by(ProductReview.created_at.desc())
+        .offset(skip).limit(limit).all()
+    )
+
+
+def get_customer_reviews(db: Session, customer_id: str, skip: int = 0, limit: int = 50) -> List[ProductReview]:
+    """Get a customer's reviews, newest first"""
+    return (
+        db.query(ProductReview)
+        .filter(ProductReview.customer_id == customer_id)
+        .order_by(ProductReview.created_at.desc())
+        .offset(skip).limit(limit).all()
+    )
+
+
+def rebuild_rating_summaries(db: Session) -> int:
+    """Recompute every product's rating totals from approved reviews, returning the product count"""
+    rows = (
+        db.query(
+            ProductReview.product_id,
+            func.count(ProductReview.id).label("review_count"),
+            func.sum(ProductReview.rating).label("rating_sum"),
+            *(
+                func.sum(case((ProductReview.rating == star, 1), else_=0)).label(f"rating_{star}")
+                for star in range(1, 6)
+            )
+        )
+        .filter(ProductReview.is_approved == True)
+        .group_by(ProductReview.product_id)
+        .all()
+    )
+
+    # Products losing their summary need purging as well as those gaining one
+    affected = {product_id for product_id, in db.query(ProductRatingSummary.product_id)}
+    affected.update(row.product_id for row in rows)
+
+    db.query(ProductRatingSummary).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(ProductRatingSummary), [dict(row._mapping) for row in rows])
+    db.commit()
+    invalidate_tags(*(product_tag(product_id) for product_id in affected))
+    return len(rows)
+
+
+def ensure_rating_summaries(db: Session) -> None:
+    """Backfill rating totals for reviews written before they were tracked"""
+    approved = db.query(func.count(ProductReview.id)).filter(ProductReview.is_approved == True).scalar()
+    counted = db.query(func.coalesce(func.sum(ProductRatingSummary.review_count), 0)).scalar()
+    if approved != counted:
+        rebuild_rating_summaries(db)
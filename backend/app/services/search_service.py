@@ -0,0 +1,313 @@
+from sqlalchemy import text, String, Float
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from typing import List, Dict
+from ..models.product import Product
+import re
+
+
+# Products indexed per INSERT statement during a rebuild
+REBUILD_BATCH_SIZE = 500
+
+
+def tokenize(search: str) -> List[str]:
+    """Split a search string into lowercase word tokens"""
+    return re.findall(r"\w+", search.lower())
+
+
+class SearchBackend:
+    """Full-text index over product name, description and tags.
+
+    Backends keep a side table keyed by product id. `matches` returns a
+    (product_id, rank) subquery that listing queries join against, with lower
+    rank meaning a better match.
+    """
+    name = "like"
+
+    def create(self, connection: Connection) -> bool:
+        """Create the index structures, returning True if they were new"""
+        return False
+
+    def index_product(self, db: Session, product: Product) -> None:
+        """Insert or replace one product's index entry"""
+
+    def remove_product(self, db: Session, product_id: str) -> None:
+        """Drop one product's index entry"""
+
+    def clear(self, connection: Connection) -> None:
+        """Remove every index entry"""
+
+    def insert_rows(self, connection: Connection, rows: List[Dict[str, str]]) -> None:
+        """Bulk insert index entries for a rebuild"""
+
+    def matches(self, terms: List[str]):
+        """Subquery of (product_id, rank) for products matching every term,
+        or None when the backend has no index and callers should fall back
+        to substring filters."""
+        return None
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """SQLite FTS5 virtual table ranked with bm25.
+
+    FTS5 can only look rows up by rowid, so product ids live in an ordinary
+    product_search_ids table whose integer key doubles as the FTS rowid.
+    Updates and deletes then hit the index by rowid instead of scanning it.
+    """
+    name = "fts5"
+
+    def create(self, connection: Connection) -> bool:
+        exists = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_search_ids'"
+        )).first()
+        if exists:
+            return False
+        # Replace any index built before rows were keyed through the id table
+        connection.execute(text("DROP TABLE IF EXISTS product_search"))
+        connection.execute(text(
+            "CREATE TABLE product_search_ids ("
+            "rowid INTEGER PRIMARY KEY, product_id VARCHAR NOT NULL UNIQUE)"
+        ))
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE product_search USING fts5("
+            "name, description, tags, tokenize = 'unicode61')"
+        ))
+        return True
+
+    def _rowid(self, db: Session, product_id: str):
+        return db.execute(
+            text("SELECT rowid FROM product_search_ids WHERE product_id = :product_id"),
+            {"product_id": product_id}
+        ).scalar()
+
+    def index_product(self, db: Session, product: Product) -> None:
+        rowid = self._rowid(db, product.id)
+        if rowid is None:
+            rowid = db.execute(
+                text("INSERT INTO product_search_ids (product_id) VALUES (:product_id)"),
+                {"product_id": product.id}
+            ).lastrowid
+        else:
+            db.execute(text("DELETE FROM product_search WHERE rowid = :rowid"), {"rowid": rowid})
+        db.execute(
+            text(
+                "INSERT INTO product_search (rowid, name, description, tags) "
+                "VALUES (:rowid, :name, :description, :tags)"
+            ),
+            {**_document(product), "rowid": rowid}
+        )
+
+    def remove_product(self, db: Session, product_id: str) -> None:
+        rowid = self._rowid(db, product_id)
+        if rowid is None:
+            return
+        db.execute(text("DELETE FROM product_search WHERE rowid = :rowid"), {"rowid": rowid})
+        db.execute(text("DELETE FROM product_search_ids WHERE rowid = :rowid"), {"rowid": rowid})
+
+    def clear(self, connection: Connection) -> None:
+        connection.execute(text("DELETE FROM product_search"))
+        connection.execute(text("DELETE FROM product_search_ids"))
+
+    def insert_rows(self, connection: Connection, rows: List[Dict[str, str]]) -> None:
+        connection.execute(
+            text("INSERT INTO product_search_ids (product_id) VALUES (:product_id)"),
+            rows
+        )
+        connection.execute(
+            text(
+                "INSERT INTO product_search (rowid, name, description, tags) "
+                "SELECT rowid, :name, :description, :tags "
+                "FROM product_search_ids WHERE product_id = :product_id"
+            ),
+            rows
+        )
+
+    def matches(self, terms: List[str]):
+        # Quote each token so user input cannot inject FTS5 query syntax, and
+        # prefix-match it so partial words keep matching as they did with LIKE
+        match = " ".join(f'"{term}"*' for term in terms)
+        return (
+            text(
+                "SELECT ids.product_id AS product_id, bm25(product_search) AS rank "
+                "FROM product_search "
+                "JOIN product_search_ids AS ids ON ids.rowid = product_search.rowid "
+                "WHERE product_search MATCH :match"
+            )
+            .bindparams(match=match)
+            .columns(product_id=String, rank=Float)
+            .subquery("search_matches")
+        )
+
+
+class PostgresTSVectorBackend(SearchBackend):
+    """Postgres tsvector table with a GIN index, ranked with ts_rank"""
+    name = "tsvector"
+
+    _document_sql = (
+        "setweight(to_tsvector('simple', coalesce(:name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(:tags, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(:description, '')), 'C')"
+    )
+
+    def create(self, connection: Connection) -> bool:
+        exists = connection.execute(text("SELECT to_regclass('product_search')")).scalar()
+        if exists:
+            return False
+        connection.execute(text(
+            "CREATE TABLE product_search ("
+            "product_id VARCHAR PRIMARY KEY, document TSVECTOR NOT NULL)"
+        ))
+        connection.execute(text(
+            "CREATE INDEX ix_product_search_document ON product_search USING GIN (document)"
+        ))
+        return True
+
+    def index_product(self, db: Session, product: Product) -> None:
+        db.execute(
+            text(
+                f"INSERT INTO product_search (product_id, document) "
+                f"VALUES (:product_id, {self._document_sql}) "
+                f"ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document"
+            ),
+            _document(product)
+        )
+
+    def remove_product(self, db: Session, product_id: str) -> None:
+        db.execute(
+            text("DELETE FROM product_search WHERE product_id = :product_id"),
+            {"product_id": product_id}
+        )
+
+    def clear(self, connection: Connection) -> None:
+        connection.execute(text("TRUNCATE product_search"))
+
+    def insert_rows(self, connection: Connection, rows: List[Dict[str, str]]) -> None:
+        connection.execute(
+            text(
+                f"INSERT INTO product_search (product_id, document) "
+                f"VALUES (:product_id, {self._document_sql})"
+            ),
+            rows
+        )
+
+    def matches(self, terms: List[str]):
+        query = " & ".join(f"{term}:*" for term in terms)
+        return (
+            text(
+                "SELECT product_id, -ts_rank(document, to_tsquery('simple', :query)) AS rank "
+                "FROM product_search WHERE document @@ to_tsquery('simple', :query)"
+            )
+            .bindparams(query=query)
+            .columns(product_id=String, rank=Float)
+            .subquery("search_matches")
+        )
+
+
+def _document(product: Product) -> Dict[str, str]:
+    """Searchable fields of a product as bind parameters"""
+    return {
+        "product_id": product.id,
+        "name": product.name or "",
+        "description": product.description or "",
+        "tags": product.tags or "",
+    }
+
+
+# Resolved backends, keyed by engine URL
+_backends: Dict[str, SearchBackend] = {}
+
+
+def _backend_for_dialect(dialect_name: str) -> SearchBackend:
+    if dialect_name == "sqlite":
+        return SQLiteFTS5Backend()
+    if dialect_name == "postgresql":
+        return PostgresTSVectorBackend()
+    return SearchBackend()
+
+
+def get_backend(connection: Connection) -> SearchBackend:
+    """Get the search backend for a connection's database, creating its index
+    on first use.
+
+    A freshly created index is populated from the existing products. If the
+    database cannot build the index (for example SQLite without FTS5) the
+    LIKE fallback is used instead.
+    """
+    key = str(connection.engine.url)
+    backend = _backends.get(key)
+    if backend is not None:
+        return backend
+
+    backend = _backend_for_dialect(connection.dialect.name)
+    try:
+        if backend.create(connection):
+            _populate(connection, backend)
+    except OperationalError as e:
+        print(f"Full-text search unavailable, falling back to LIKE: {e}")
+        backend = SearchBackend()
+
+    _backends[key] = backend
+    return backend
+
+
+def _populate(connection: Connection, backend: SearchBackend) -> int:
+    """Index every product in id order, one batch at a time"""
+    total = 0
+    last_id = ""
+    while True:
+        batch = connection.execute(
+            text(
+                "SELECT id, name, description, tags FROM products "
+                "WHERE id > :last_id ORDER BY id LIMIT :batch_size"
+            ),
+            {"last_id": last_id, "batch_size": REBUILD_BATCH_SIZE}
+        ).all()
+        if not batch:
+            break
+        backend.insert_rows(connection, [
+            {
+                "product_id": row.id,
+                "name": row.name or "",
+                "description": row.description or "",
+                "tags": row.tags or "",
+            }
+            for row in batch
+        ])
+        total += len(batch)
+        last_id = batch[-1].id
+    return total
+
+
+def ensure_index(bind: Engine) -> SearchBackend:
+    """Create (and if new, populate) the search index"""
+    with bind.begin() as connection:
+        return get_backend(connection)
+
+
+def rebuild_index(bind: Engine) -> int:
+    """Rebuild the search index from the products table, returning the row count"""
+    with bind.begin() as connection:
+        backend = get_backend(connection)
+        backend.clear(connection)
+        return _populate(connection, backend)
+
+
+def index_product(db: Session, product: Product) -> None:
+    """Refresh a product's index entry in the caller's transaction"""
+    get_backend(db.connection()).index_product(db, product)
+
+
+def remove_product(db: Session, product_id: str) -> None:
+    """Drop a product's index entry in the caller's transaction"""
+    get_backend(db.connection()).remove_product(db, product_id)
+
+
+def match_subquery(db: Session, search: str):
+    """Subquery of (product_id, rank) matching a search string, or None
+    when substring filtering should be used instead"""
+    terms = tokenize(search)
+    if not terms:
+        return None
+    return get_backend(db.connection()).matches(terms)
+
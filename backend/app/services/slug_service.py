@@ -0,0 +1,127 @@
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Callable, Dict, Iterable, Optional, Set
+import re
+
+
+# Attempts at saving a row before a slug collision is given up on
+SLUG_ALLOCATION_ATTEMPTS = 5
+
+# Base slugs matched per lookup query when reserving a batch
+RESERVE_BATCH_SIZE = 100
+
+
+def generate_slug(name: str) -> str:
+    """Generate URL-friendly slug from a name"""
+    slug = re.sub(r'[^a-zA-Z0-9\s-]', '', name.lower())
+    slug = re.sub(r'[-\s]+', '-', slug)
+    return slug.strip('-')
+
+
+def _suffix(slug: str, base: str) -> Optional[int]:
+    """The number in "<base>-<n>", 0 for the base itself, or None for other slugs"""
+    if slug == base:
+        return 0
+    tail = slug[len(base) + 1:]
+    if slug.startswith(f"{base}-") and tail.isdigit():
+        return int(tail)
+    return None
+
+
+class SlugAllocator:
+    """Hands out unique slugs for one model's slug column.
+
+    Existing slugs for a base ("t-shirt", "t-shirt-1", ...) are read with a
+    single prefix query, and the next free slug is the base itself or one past
+    the highest numbered suffix, so no probe loop is needed. Bases can be
+    reserved in bulk, which lets an import allocate a whole batch of slugs
+    with a handful of queries.
+    """
+
+    def __init__(self, db: Session, column, exclude_id: Optional[str] = None):
+        self.db = db
+        self.column = column
+        self.model = column.class_
+        self.exclude_id = exclude_id
+        self.taken: Dict[str, Set[str]] = {}
+        self.next_suffix: Dict[str, int] = {}
+
+    def reserve(self, bases: Iterable[str]) -> None:
+        """Load the slugs already used by any of these bases"""
+        new_bases = sorted({base for base in bases if base not in self.taken})
+        for start in range(0, len(new_bases), RESERVE_BATCH_SIZE):
+            group = new_bases[start:start + RESERVE_BATCH_SIZE]
+            # "<base>-..." as a range ('.' sorts right after '-') so the slug
+            # index is used; LIKE is case-insensitive on SQLite and scans
+            query = self.db.query(self.column).filter(or_(
+                *(
+                    or_(self.column == base, and_(self.column >= f"{base}-", self.column < f"{base}."))
+                    for base in group
+                )
+            ))
+            if self.exclude_id is not None:
+                query = query.filter(self.model.id != self.exclude_id)
+            existing = [slug for slug, in query]
+
+            for base in group:
+                self.taken[base] = set()
+                self.next_suffix[base] = 1
+            for slug in existing:
+                for base in group:
+                    number = _suffix(slug, base)
+                    if number is None:
+                        continue
+                    self.taken[base].add(slug)
+                    self.next_suffix[base] = max(self.next_suffix[base], number + 1)
+
+    def allocate(self, base: str, current: Optional[str] = None) -> str:
+        """Claim the next free slug for a base.
+
+        `current` is the row's existing slug; it is kept when it already
+        belongs to this base and no other row holds it, so renaming a row to
+        the same name leaves its URL alone.
+        """
+        self.reserve([base])
+        taken = self.taken[base]
+        if current is not None and _suffix(current, base) is not None and current not in taken:
+            taken.add(current)
+            return current
+        slug = base
+        if slug in taken:
+            slug = f"{base}-{self.next_suffix[base]}"
+            self.next_suffix[base] += 1
+        taken.add(slug)
+        return slug
+
+
+def save_with_unique_slug(
+    db: Session,
+    column,
+    base: str,
+    assign: Callable[[str], None],
+    exclude_id: Optional[str] = None,
+    current: Optional[str] = None
+) -> str:
+    """Assign a free slug and flush, retrying with a fresh lookup on collisions.
+
+    `assign` stores the slug on the row (and adds it to the session if new).
+    Each attempt flushes inside a savepoint, so a unique-constraint error
+    from a concurrent writer that took the same slug only rolls back that
+    attempt. An update passes the row's `current` slug, which is kept when
+    it still fits the base.
+    """
+    attempt = 1
+    while True:
+        slug = SlugAllocator(db, column, exclude_id).allocate(base, current)
+        if slug == current:
+            return slug
+        try:
+            with db.begin_nested():
+                assign(slug)
+                db.flush()
+            return slug
+        except IntegrityError:
+            if attempt >= SLUG_ALLOCATION_ATTEMPTS:
+                raise
+            attempt += 1
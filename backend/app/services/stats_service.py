@@ -0,0 +1,102 @@
+from sqlalchemy import func, case
+from sqlalchemy.orm import Session
+from typing import Callable, Dict, Tuple
+from ..core.config import settings
+from ..models.order import Order, OrderStatus
+from ..models.user import User, UserRole
+from ..models.seller import Seller
+import threading
+import time
+
+
+# Cached results keyed by stats name: (expires_at, value)
+_cache: Dict[str, Tuple[float, dict]] = {}
+_cache_lock = threading.Lock()
+
+ORDER_STATS = "orders"
+USER_STATS = "users"
+
+
+def _cached(key: str, compute: Callable[[], dict]) -> dict:
+    """Return a cached stats dict, recomputing it once the TTL has passed"""
+    now = time.monotonic()
+    entry = _cache.get(key)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    value = compute()
+    with _cache_lock:
+        _cache[key] = (now + settings.STATS_CACHE_TTL_SECONDS, value)
+    return value
+
+
+def invalidate_stats(*keys: str) -> None:
+    """Drop cached stats after writes (all stats when no keys are given)"""
+    with _cache_lock:
+        if not keys:
+            _cache.clear()
+        for key in keys:
+            _cache.pop(key, None)
+
+
+def _count_where(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _sum_where(condition, column):
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+
+def compute_order_stats(db: Session) -> dict:
+    """Order counts by status and revenue in a single aggregate query"""
+    earning = Order.status.in_([OrderStatus.DELIVERED, OrderStatus.SHIPPED])
+    row = db.query(
+        func.count(Order.id).label("total_orders"),
+        _count_where(Order.status == OrderStatus.PENDING).label("pending_orders"),
+        _count_where(Order.status == OrderStatus.PROCESSING).label("processing_orders"),
+        _count_where(Order.status == OrderStatus.SHIPPED).label("shipped_orders"),
+        _count_where(Order.status == OrderStatus.DELIVERED).label("delivered_orders"),
+        _count_where(Order.status == OrderStatus.CANCELLED).label("cancelled_orders"),
+        _sum_where(earning, Order.total_customer_amount).label("total_revenue"),
+        _sum_where(earning, Order.total_commission_amount).label("total_commission")
+    ).one()
+
+    return {
+        "total_orders": row.total_orders,
+        "pending_orders": int(row.pending_orders),
+        "processing_orders": int(row.processing_orders),
+        "shipped_orders": int(row.shipped_orders),
+        "delivered_orders": int(row.delivered_orders),
+        "cancelled_orders": int(row.cancelled_orders),
+        "total_revenue": float(row.total_revenue),
+        "total_commission": float(row.total_commission)
+    }
+
+
+def compute_user_stats(db: Session) -> dict:
+    """User counts by role and state in a single aggregate query"""
+    is_seller = User.role == UserRole.SELLER
+    is_customer = User.role == UserRole.CUSTOMER
+    row = db.query(
+        func.count(User.id).label("total_users"),
+        _count_where(User.is_active == True).label("active_users"),
+        _count_where(User.is_verified == True).label("verified_users"),
+        _count_where(is_seller).label("total_sellers"),
+        _count_where(is_seller & (User.is_active == True)).label("active_sellers"),
+        # Verified sellers are those whose Seller profile is approved
+        _count_where(is_seller & (Seller.is_approved == True)).label("verified_sellers"),
+        _count_where(is_customer).label("total_customers"),
+        _count_where(is_customer & (User.is_active == True)).label("active_customers")
+    ).outerjoin(Seller, Seller.user_id == User.id).one()
+
+    return {key: int(value) for key, value in row._mapping.items()}
+
+
+def get_order_stats(db: Session) -> dict:
+    """Get order statistics, cached for STATS_CACHE_TTL_SECONDS (Admin only)"""
+    return _cached(ORDER_STATS, lambda: compute_order_stats(db))
+
+
+def get_user_stats(db: Session) -> dict:
+    """Get user statistics, cached for STATS_CACHE_TTL_SECONDS (Admin only)"""
+    return _cached(USER_STATS, lambda: compute_user_stats(db))
@@ -0,0 +1,50 @@
+from ..core.database import SessionLocal
+from ..models.seller import Seller
+from ..models.user import User
+from ..services import import_service
+import argparse
+import time
+
+
+def import_products(seller: str, path: str, fmt: str = None, chunk_size: int = import_service.IMPORT_CHUNK_SIZE):
+    """Bulk import a CSV or JSONL product file for a seller (by seller ID or email)"""
+    fmt = fmt or import_service.detect_format(path)
+    if fmt is None:
+        print("Could not tell the file format; pass --format csv or --format jsonl")
+        return
+
+    db = SessionLocal()
+    try:
+        seller_row = (
+            db.query(Seller.id)
+            .outerjoin(User, User.id == Seller.user_id)
+            .filter((Seller.id == seller) | (User.email == seller))
+            .first()
+        )
+        if seller_row is None:
+            print(f"Seller not found: {seller}")
+            return
+
+        started = time.perf_counter()
+        with open(path, encoding="utf-8-sig", newline="") as lines:
+            report = import_service.import_products(db, lines, fmt, seller_row.id, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - started
+
+        print(f"Imported {report['imported']} of {report['total_rows']} rows in {elapsed:.2f}s")
+        for error in report["errors"]:
+            print(f"  row {error['row']}: {error['error']}")
+    except Exception as e:
+        print(f"Error importing products: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import products for a seller")
+    parser.add_argument("seller", help="Seller ID or the seller's account email")
+    parser.add_argument("path", help="CSV or JSONL file")
+    parser.add_argument("--format", choices=import_service.IMPORT_FORMATS)
+    parser.add_argument("--chunk-size", type=int, default=import_service.IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    import_products(args.seller, args.path, args.format, args.chunk_size)
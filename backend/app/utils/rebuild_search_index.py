@@ -0,0 +1,16 @@
+from ..core.database import engine
+from ..services import search_service
+
+
+def rebuild_search_index():
+    """Rebuild the product full-text search index from existing products"""
+    try:
+        count = search_service.rebuild_index(engine)
+        backend = search_service.ensure_index(engine)
+        print(f"Indexed {count} products ({backend.name})")
+    except Exception as e:
+        print(f"Error rebuilding search index: {e}")
+
+
+if __name__ == "__main__":
+    rebuild_search_index()
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Service-layer microbenchmarks with JSON baselines
+
+Seeds a throwaway SQLite database with a realistic catalogue (a five level
+category tree with commission rules, sellers, customers, products with
+variants, and reviews) and times the hot service functions directly, one
+fresh session per call, without HTTP or request instrumentation.
+
+Run from the backend directory:
+
+    python benchmarks/service_benchmarks.py                 # run and print timings
+    python benchmarks/service_benchmarks.py --save          # also write the baseline
+    python benchmarks/service_benchmarks.py --compare       # exit 1 on regressions
+
+Baselines are machine-specific, so record one on the machine that compares
+against it. A benchmark regresses when its median is more than --tolerance
+above the baseline median and slower by at least --floor-ms, and stays so
+across --retries re-runs (which filter out noise from a busy machine).
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Point the app at a scratch database before its engine is created
+_scratch_dir = tempfile.mkdtemp(prefix="marketplace-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_scratch_dir, 'bench.db')}"
+os.environ["SQL_INSTRUMENTATION_ENABLED"] = "false"
+os.environ["SLOW_QUERY_LOG_ENABLED"] = "false"
+
+from app.core.database import create_database, engine, SessionLocal
+from app.core.security import get_password_hash
+from app.models.attribute import Attribute, AttributeValue, AttributeType
+from app.models.commission import CommissionType
+from app.models.product import Product, ProductStatus
+from app.models.review import ProductReview
+from app.models.seller import Seller
+from app.models.user import User, UserRole
+from app.schemas.category import CategoryCreate
+from app.schemas.commission import CommissionSettingCreate
+from app.schemas.order import OrderCreate, OrderItemCreate
+from app.schemas.product import ProductCreate, ProductVariantCreate, ProductVariantAttributeCreate
+from app.services import (
+    category_service, commission_service, import_service, order_service, product_service,
+    review_service, search_service
+)
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from typing import Callable, Dict, List, Optional
+import argparse
+import itertools
+import json
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import time
+import uuid
+
+
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, "benchmarks", "baselines", "baseline.json")
+
+# Dataset shape; recorded in baselines so mismatched comparisons are flagged
+SCALE = {
+    "root_categories": 4,
+    "category_branching": 2,
+    "category_depth": 5,
+    "sellers": 20,
+    "customers": 100,
+    "products": 4000,
+    "reviewed_share": 0.3,
+}
+
+WORDS = [
+    "cotton", "linen", "steel", "ceramic", "bamboo", "leather", "organic", "classic",
+    "compact", "deluxe", "wireless", "handmade", "vintage", "premium", "travel", "kitchen",
+]
+
+
+class Dataset:
+    """IDs of the seeded rows that benchmarks pick their arguments from"""
+
+    def __init__(self):
+        self.categories_by_depth: Dict[int, List[str]] = {}
+        self.seller_ids: List[str] = []
+        self.customer_ids: List[str] = []
+        self.product_ids: List[str] = []
+        self.reviewed_product_ids: List[str] = []
+        self.attribute_id: Optional[str] = None
+        self.attribute_value_ids: List[str] = []
+
+
+def seed(rng: random.Random) -> Dataset:
+    """Fill the scratch database through the services where they exist, in bulk where not"""
+    data = Dataset()
+    create_database()
+    search_service.ensure_index(engine)
+    db = SessionLocal()
+    try:
+        commission_service.create_commission_setting(db, CommissionSettingCreate(
+            type=CommissionType.GLOBAL, commission_rate=8.0
+        ))
+
+        # Category tree, with rules on the roots and on every other depth-3 node
+        level = [None] * SCALE["root_categories"]
+        for depth in range(1, SCALE["category_depth"] + 1):
+            created = []
+            for position, parent_id in enumerate(level):
+                for _ in range(1 if parent_id is None else SCALE["category_branching"]):
+                    category = category_service.create_category(db, CategoryCreate(
+                        name=f"Category {depth}-{len(created)}", parent_id=parent_id, sort_order=position
+                    ))
+                    created.append(category.id)
+            data.categories_by_depth[depth] = created
+            level = created
+        for category_id in data.categories_by_depth[1] + data.categories_by_depth[3][::2]:
+            commission_service.create_commission_setting(db, CommissionSettingCreate(
+                type=CommissionType.CATEGORY, entity_id=category_id, commission_rate=rng.choice([6.0, 10.0, 12.0])
+            ))
+
+        attribute = Attribute(id=str(uuid.uuid4()), name="Size", type=AttributeType.SELECT)
+        db.add(attribute)
+        for position, value in enumerate(["S", "M", "L", "XL"]):
+            db.add(AttributeValue(id=str(uuid.uuid4()), attribute_id=attribute.id, value=value, sort_order=position))
+        db.commit()
+        data.attribute_id = attribute.id
+        data.attribute_value_ids = [value.id for value in attribute.attribute_values]
+
+        # Accounts share one hash; bcrypt would otherwise dominate seeding
+        password_hash = get_password_hash("benchmark")
+        users, sellers = [], []
+        for number in range(SCALE["sellers"]):
+            user_id, seller_id = str(uuid.uuid4()), str(uuid.uuid4())
+            users.append({"id": user_id, "email": f"seller{number}@bench.local", "password_hash": password_hash,
+                          "first_name": "Seller", "last_name": str(number), "role": UserRole.SELLER})
+            sellers.append({"id": seller_id, "user_id": user_id, "business_name": f"Shop {number}",
+                            "address": "1 Bench Street", "is_approved": True})
+            data.seller_ids.append(seller_id)
+        for number in range(SCALE["customers"]):
+            user_id = str(uuid.uuid4())
+            users.append({"id": user_id, "email": f"customer{number}@bench.local", "password_hash": password_hash,
+                          "first_name": "Customer", "last_name": str(number), "role": UserRole.CUSTOMER})
+            data.customer_ids.append(user_id)
+        db.execute(insert(User), users)
+        db.execute(insert(Seller), sellers)
+        db.commit()
+
+        # Products across every depth, a quarter of them with variants
+        all_categories = [category for ids in data.categories_by_depth.values() for category in ids]
+        per_seller = SCALE["products"] // SCALE["sellers"]
+        for seller_number, seller_id in enumerate(data.seller_ids):
+            records = []
+            for number in range(per_seller):
+                name = " ".join(rng.sample(WORDS, 2)) + f" item {seller_number}-{number}"
+                record = {
+                    "name": name,
+                    "description": f"A {name} for benchmarking",
+                    "category_id": rng.choice(all_categories),
+                    "seller_price": round(rng.uniform(50, 5000), 2),
+                    "stock_quantity": 1_000_000,
+                    "tags": ",".join(rng.sample(WORDS, 3)),
+                    "images": [{"image_url": f"/uploads/bench/{seller_number}-{number}.webp"}],
+                }
+                if number % 4 == 0:
+                    record["variants"] = [
+                        {"variant_name": size, "seller_price": record["seller_price"], "stock_quantity": 1_000_000,
+                         "attributes": [{"attribute_id": attribute.id, "attribute_value_id": value_id}]}
+                        for size, value_id in zip(["S", "M"], data.attribute_value_ids)
+                    ]
+                records.append(json.dumps(record))
+            import_service.import_products(db, records, "jsonl", seller_id)
+
+        db.query(Product).update({Product.status: ProductStatus.APPROVED}, synchronize_session=False)
+        db.commit()
+        data.product_ids = [product_id for product_id, in db.query(Product.id).order_by(Product.id)]
+
+        # Reviews, then the rating summaries built from them
+        reviews = []
+        now = datetime.utcnow()
+        data.reviewed_product_ids = rng.sample(data.product_ids, int(len(data.product_ids) * SCALE["reviewed_share"]))
+        for product_id in data.reviewed_product_ids:
+            for customer_id in rng.sample(data.customer_ids, rng.randint(1, 8)):
+                reviews.append({"id": str(uuid.uuid4()), "product_id": product_id, "customer_id": customer_id,
+                                "rating": rng.randint(1, 5), "comment": "Benchmark review", "is_approved": True,
+                                "created_at": now, "updated_at": now})
+        db.execute(insert(ProductReview), reviews)
+        db.commit()
+        review_service.rebuild_rating_summaries(db)
+    finally:
+        db.close()
+
+    # Start every run from the same on-disk state: planner statistics
+    # gathered and the write-ahead log folded back into the database
+    with engine.connect() as connection:
+        connection.exec_driver_sql("ANALYZE")
+        connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        connection.commit()
+    return data
+
+
+class Benchmark:
+    """A service call to time; `setup` runs untimed before every call"""
+
+    def __init__(self, name: str, run: Callable, setup: Optional[Callable] = None, iterations: Optional[int] = None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.iterations = iterations
+
+
+def build_benchmarks(data: Dataset, rng: random.Random) -> List[Benchmark]:
+    root = data.categories_by_depth[1][0]
+    mid = data.categories_by_depth[2][0]
+    seller = data.seller_ids[0]
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    approved = {"status": ProductStatus.APPROVED}
+
+    def products(**filters):
+        return lambda db: product_service.get_products(db, limit=50, **filters)
+
+    benchmarks = [
+        Benchmark("product_service.get_products[approved]", products(**approved)),
+        Benchmark("product_service.get_products[category]", products(category_id=mid, **approved)),
+        Benchmark("product_service.get_products[category+descendants]",
+                  products(category_id=root, include_descendants=True, **approved)),
+        Benchmark("product_service.get_products[seller]", products(seller_id=seller)),
+        Benchmark("product_service.get_products[price_range]", products(min_price=500, max_price=1500, **approved)),
+        Benchmark("product_service.get_products[search]", products(search="cotton", **approved)),
+        Benchmark("product_service.get_products[created_after]", products(created_after=week_ago, **approved)),
+        Benchmark("product_service.get_products[sort=price_asc]",
+                  products(sort_by="price", sort_order="asc", **approved)),
+        Benchmark("product_service.get_products[sort=name]", products(sort_by="name", sort_order="asc", **approved)),
+        Benchmark("product_service.get_product_listing[approved]",
+                  lambda db: product_service.get_product_listing(db, limit=50, **approved)),
+    ]
+
+    counter = itertools.count()
+
+    def create_product(db):
+        number = next(counter)
+        product_service.create_product(db, ProductCreate(
+            name=f"Benchmark product {number}",
+            description="Created by the benchmark",
+            category_id=data.categories_by_depth[3][number % len(data.categories_by_depth[3])],
+            seller_price=499.0,
+            stock_quantity=10,
+            variants=[
+                ProductVariantCreate(
+                    variant_name=f"Size {value_number}", seller_price=499.0 + value_number, stock_quantity=5,
+                    attributes=[ProductVariantAttributeCreate(attribute_id=data.attribute_id, attribute_value_id=value_id)]
+                )
+                for value_number, value_id in enumerate(data.attribute_value_ids[:3])
+            ]
+        ), seller)
+
+    benchmarks.append(Benchmark("product_service.create_product[3 variants]", create_product))
+
+    for depth, categories in sorted(data.categories_by_depth.items()):
+        benchmarks.append(Benchmark(
+            f"commission_service.get_commission_rate[depth={depth}]",
+            lambda db, category_id=categories[-1]: commission_service.get_commission_rate(db, category_id, None, 999.0)
+        ))
+    deepest = data.categories_by_depth[max(data.categories_by_depth)][-1]
+    benchmarks.append(Benchmark(
+        "commission_service.get_commission_rate[cold]",
+        lambda db: commission_service.get_commission_rate(db, deepest, None, 999.0),
+        setup=commission_service.invalidate_commission_rules
+    ))
+
+    for size in (1, 10, 50):
+        def create_order(db, size=size):
+            items = [OrderItemCreate(product_id=product_id, quantity=1) for product_id in rng.sample(data.product_ids, size)]
+            order_service.create_order(db, OrderCreate(
+                delivery_address="1 Bench Street", delivery_city="Bench", delivery_state="Bench",
+                delivery_pincode="000000", phone="0000000000", items=items
+            ), rng.choice(data.customer_ids))
+        benchmarks.append(Benchmark(f"order_service.create_order[items={size}]", create_order))
+
+    benchmarks += [
+        Benchmark("category_service.get_category_tree[cached]", lambda db: category_service.get_category_tree(db)),
+        Benchmark("category_service.get_category_tree[cold]", lambda db: category_service.get_category_tree(db),
+                  setup=category_service.invalidate_category_tree),
+        Benchmark("review_service.get_rating_stats",
+                  lambda db: review_service.get_rating_stats(db, rng.choice(data.reviewed_product_ids))),
+        Benchmark("review_service.rebuild_rating_summaries", review_service.rebuild_rating_summaries, iterations=10),
+    ]
+    return benchmarks
+
+
+def measure(benchmark: Benchmark, iterations: int, warmup: int) -> dict:
+    """Time a benchmark with a fresh session per call, returning millisecond statistics"""
+    samples = []
+    count = benchmark.iterations or iterations
+    for attempt in range(warmup + count):
+        if benchmark.setup:
+            benchmark.setup()
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            benchmark.run(db)
+            elapsed = time.perf_counter() - started
+        finally:
+            db.close()
+        if attempt >= warmup:
+            samples.append(elapsed * 1000)
+
+    samples.sort()
+    return {
+        "iterations": count,
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        "min_ms": round(samples[0], 4),
+    }
+
+
+def compare(results: Dict[str, dict], baseline: dict, tolerance: float, floor_ms: float) -> List[str]:
+    """Print each benchmark against the baseline and return the names that regressed"""
+    if baseline.get("scale") != SCALE:
+        print("⚠️ Baseline was recorded with a different dataset scale; comparisons may be off")
+
+    regressions = []
+    for name, current in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            print(f"   {name}: {current['median_ms']:.3f} ms (new, no baseline)")
+            continue
+        ratio = current["median_ms"] / previous["median_ms"] if previous["median_ms"] else float("inf")
+        regressed = (
+            current["median_ms"] > previous["median_ms"] * (1 + tolerance)
+            and current["median_ms"] - previous["median_ms"] >= floor_ms
+        )
+        marker = "❌" if regressed else "✅"
+        print(f"{marker} {name}: {previous['median_ms']:.3f} -> {current['median_ms']:.3f} ms ({ratio:.2f}x)")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def run_benchmarks(benchmarks: List[Benchmark], iterations: int, warmup: int) -> Dict[str, dict]:
+    results = {}
+    for benchmark in benchmarks:
+        results[benchmark.name] = measure(benchmark, iterations, warmup)
+        stats = results[benchmark.name]
+        print(f"  {benchmark.name}: median {stats['median_ms']:.3f} ms, p95 {stats['p95_ms']:.3f} ms")
+    return results
+
+
+def benchmark_services(args) -> int:
+    """Seed, time every selected benchmark, then save and/or compare; returns the exit code"""
+    rng = random.Random(20240601)
+    started = time.perf_counter()
+    data = seed(rng)
+    print(f"Seeded {len(data.product_ids)} products in {time.perf_counter() - started:.1f}s")
+
+    benchmarks = [
+        benchmark for benchmark in build_benchmarks(data, rng)
+        if not args.only or args.only in benchmark.name
+    ]
+    results = run_benchmarks(benchmarks, args.iterations, args.warmup)
+
+    exit_code = 0
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"❌ No baseline at {args.baseline}; record one with --save")
+            return 1
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, args.tolerance, args.floor_ms)
+
+        # A slow run on a busy machine is not a regression unless it reproduces
+        for _ in range(args.retries):
+            if not regressions:
+                break
+            print(f"Re-running {len(regressions)} slower benchmark(s) to rule out noise")
+            rerun = run_benchmarks([b for b in benchmarks if b.name in regressions], args.iterations, args.warmup)
+            for name, stats in rerun.items():
+                if stats["median_ms"] < results[name]["median_ms"]:
+                    results[name] = stats
+            regressions = compare({name: results[name] for name in regressions}, baseline, args.tolerance, args.floor_ms)
+
+        if regressions:
+            print(f"❌ {len(regressions)} benchmark(s) regressed more than {args.tolerance:.0%}")
+            exit_code = 1
+        else:
+            print("✅ No regressions")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump({
+                "recorded_at": datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "scale": SCALE,
+                "results": results,
+            }, baseline_file, indent=2)
+        print(f"✅ Baseline written to {args.baseline}")
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the hot service functions against a seeded database")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed calls per benchmark")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed calls before timing")
+    parser.add_argument("--only", help="Run only benchmarks whose name contains this text")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="Write the results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Fail if any benchmark regressed against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown of the median (0.25 = 25%%)")
+    parser.add_argument("--floor-ms", type=float, default=0.1, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--retries", type=int, default=2, help="Re-runs of a regressed benchmark before failing")
+    args = parser.parse_args()
+
+    try:
+        exit_code = benchmark_services(args)
+    finally:
+        engine.dispose()
+        shutil.rmtree(_scratch_dir, ignore_errors=True)
+    sys.exit(exit_code)
@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+# Point the app at a scratch database before anything imports its settings
+_SCRATCH = tempfile.mkdtemp(prefix="marketplace-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_SCRATCH, 'test.db')}"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["SLOW_QUERY_LOG_PATH"] = os.path.join(_SCRATCH, "slow_queries.jsonl")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import models  # noqa: E402,F401
+from app.core import instrumentation  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import SessionLocal, create_database, engine  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.models.seller import Seller  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.schemas.category import CategoryCreate  # noqa: E402
+from app.services import category_service, search_service  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    create_database()
+    search_service.ensure_index(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def query_budgets(monkeypatch):
+    """Fail the test if any request it makes runs past its route's query budget"""
+    monkeypatch.setattr(settings, "SQL_INSTRUMENTATION_ENABLED", True)
+    monkeypatch.setattr(settings, "SQL_STRICT_MODE", True)
+    instrumentation.take_strict_violations()
+    yield
+    violations = instrumentation.take_strict_violations()
+    assert not violations, f"Query budget exceeded: {violations}"
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def customer_headers(db):
+    user = User(
+        email=f"customer-{uuid.uuid4().hex[:8]}@example.com",
+        password_hash="not-a-real-hash",
+        role=UserRole.CUSTOMER
+    )
+    db.add(user)
+    db.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.id})}"}
+
+
+@pytest.fixture
+def seller(db):
+    user = User(
+        email=f"seller-{uuid.uuid4().hex[:8]}@example.com",
+        password_hash="not-a-real-hash",
+        role=UserRole.SELLER
+    )
+    db.add(user)
+    db.flush()
+    seller = Seller(user_id=user.id, business_name="Test Seller", address="1 Test Street", is_approved=True)
+    db.add(seller)
+    db.commit()
+    return seller
+
+
+@pytest.fixture
+def category(db):
+    category = category_service.create_category(db, CategoryCreate(name=f"Category {uuid.uuid4().hex[:8]}"))
+    db.commit()
+    return category
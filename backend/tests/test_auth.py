@@ -0,0 +1,48 @@
+import uuid
+
+
+def _register_seller(client):
+    email = f"seller-{uuid.uuid4().hex[:8]}@example.com"
+    response = client.post("/api/v1/auth/register/seller", json={
+        "email": email, "password": "first-secret", "first_name": "Sam", "last_name": "Seller",
+        "business_name": "Sam's Shop", "address": "2 Market Road"
+    })
+    assert response.status_code == 200, response.text
+    return email
+
+
+def _login(client, email, password):
+    return client.post("/api/v1/auth/login", json={"email": email, "password": password})
+
+
+def test_register_login_and_load_current_user(client):
+    email = _register_seller(client)
+    assert client.post("/api/v1/auth/register/customer", json={
+        "email": email, "password": "x", "role": "customer"
+    }).status_code == 400
+
+    response = _login(client, email, "first-secret")
+    assert response.status_code == 200, response.text
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    me = client.get("/api/v1/auth/me", headers=headers)
+    assert me.status_code == 200
+    assert me.json()["email"] == email
+    assert client.get("/api/v1/seller/profile/", headers=headers).json()["email"] == email
+
+
+def test_seller_password_change(client):
+    email = _register_seller(client)
+    headers = {"Authorization": f"Bearer {_login(client, email, 'first-secret').json()['access_token']}"}
+
+    wrong = client.put("/api/v1/seller/profile/password", headers=headers, json={
+        "current_password": "not-it", "new_password": "second-secret"
+    })
+    assert wrong.status_code == 400
+
+    changed = client.put("/api/v1/seller/profile/password", headers=headers, json={
+        "current_password": "first-secret", "new_password": "second-secret"
+    })
+    assert changed.status_code == 200, changed.text
+    assert _login(client, email, "first-secret").status_code == 401
+    assert _login(client, email, "second-secret").status_code == 200
@@ -0,0 +1,57 @@
+import uuid
+
+import pytest
+
+from app.core.cache import (
+    CacheBackend, CachedResponse, MemoryCacheBackend, CATEGORIES_TAG, PRODUCTS_TAG, listing_tags, product_tag
+)
+from app.schemas.category import CategoryUpdate
+from app.schemas.product import ProductCreate, ProductUpdate
+from app.services import category_service, product_service
+
+
+def _entry(body: bytes) -> CachedResponse:
+    return CachedResponse(body=body, etag='"x"', headers={})
+
+
+def test_product_change_purges_only_pages_showing_it():
+    backend = MemoryCacheBackend(max_entries=10)
+    backend.set("page-1", _entry(b"1"), listing_tags([{"id": "a"}, {"id": "b"}]), ttl=60)
+    backend.set("page-2", _entry(b"2"), listing_tags([{"id": "c"}]), ttl=60)
+
+    backend.invalidate_tags([product_tag("a")])
+    assert backend.get("page-1") is None
+    assert backend.get("page-2") is not None
+
+    backend.invalidate_tags([PRODUCTS_TAG])
+    assert backend.get("page-2") is None
+
+
+def test_backends_must_implement_storage_methods():
+    class Partial(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_only_listing_changes_purge_every_page(db, seller, category, monkeypatch):
+    product = product_service.create_product(
+        db, ProductCreate(name=f"Mug {uuid.uuid4().hex[:6]}", category_id=category.id, seller_price=10), seller.id
+    )
+    purged = []
+    monkeypatch.setattr(product_service, "invalidate_tags", lambda *tags: purged.append(set(tags)))
+    monkeypatch.setattr(category_service, "invalidate_tags", lambda *tags: purged.append(set(tags)))
+
+    product_service.update_product(db, product.id, ProductUpdate(stock_quantity=7, seller_price=10))
+    product_service.update_product(db, product.id, ProductUpdate(seller_price=12))
+    category_service.update_category(db, category.id, CategoryUpdate(description="Renamed aisle"))
+    category_service.update_category(db, category.id, CategoryUpdate(is_active=False))
+
+    assert purged == [
+        {product_tag(product.id)},
+        {PRODUCTS_TAG, product_tag(product.id)},
+        {CATEGORIES_TAG},
+        {CATEGORIES_TAG, PRODUCTS_TAG},
+    ]
@@ -0,0 +1,39 @@
+import csv
+import io
+
+from app.models.product import Product
+from app.services import import_service
+
+
+def _upload(data: bytes):
+    return io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", newline="")
+
+
+def test_malformed_csv_rows_are_reported(db, seller, category):
+    oversized = "x" * (csv.field_size_limit() + 1)
+    data = (
+        "name,category_id,seller_price\n"
+        f"Good vase,{category.id},20\n"
+        f"\"{oversized}\",{category.id},20\n"
+        f"Null\0 vase,{category.id},20\n"
+        f"Other vase,{category.id},30\n"
+    ).encode("utf-8")
+
+    report = import_service.import_products(db, _upload(data), "csv", seller.id)
+
+    assert report["imported"] == 2
+    assert [error["row"] for error in report["errors"]] == [2, 3]
+    assert "Malformed CSV row" in report["errors"][0]["error"]
+
+
+def test_undecodable_input_keeps_earlier_chunks(db, seller, category):
+    # Enough rows that the bad byte lands past the wrapper's first decoded block
+    rows = "".join(f"Bowl {number},{category.id},20\n" for number in range(400))
+    data = ("name,category_id,seller_price\n" + rows).encode("utf-8") + b"\xff\xfe broken,row,1\n"
+
+    report = import_service.import_products(db, _upload(data), "csv", seller.id, chunk_size=50)
+
+    assert 0 < report["imported"] < 400
+    assert report["failed"] == 1
+    assert "not valid UTF-8" in report["errors"][0]["error"]
+    assert db.query(Product).filter(Product.seller_id == seller.id).count() == report["imported"]
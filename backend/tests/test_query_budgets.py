@@ -0,0 +1,55 @@
+from app.core import instrumentation
+from app.core.config import settings
+from app.models.product import ProductStatus
+from app.schemas.product import ProductCreate
+from app.services import product_service
+import uuid
+
+
+def test_catalogue_routes_stay_within_budget(client, query_budgets, customer_headers, db, seller, category):
+    products = [
+        product_service.create_product(
+            db, ProductCreate(name=f"Vase {uuid.uuid4().hex[:6]}", category_id=category.id, seller_price=40), seller.id
+        )
+        for _ in range(8)
+    ]
+    for product in products:
+        product.status = ProductStatus.APPROVED
+    db.commit()
+
+    for path in (
+        "/api/v1/customer/products/",
+        f"/api/v1/customer/products/category/{category.id}",
+        f"/api/v1/customer/products/{products[0].id}",
+    ):
+        assert client.get(path, headers=customer_headers).status_code == 200
+
+
+def test_overrun_is_recorded_not_turned_into_an_error(monkeypatch):
+    monkeypatch.setattr(settings, "SQL_STRICT_MODE", True)
+    instrumentation.take_strict_violations()
+    stats = instrumentation.RequestQueryStats(budget=1)
+    for _ in range(3):
+        stats.record("SELECT 1", 0.0)
+
+    problems = instrumentation.report("GET", "/example", stats)
+
+    assert problems["query_budget"] == {"budget": 1, "queries": 3}
+    assert instrumentation.take_strict_violations() == [
+        {"method": "GET", "path": "/example", "budget": 1, "queries": 3}
+    ]
+
+
+def test_pending_products_load_in_two_queries(db, seller, category):
+    for _ in range(6):
+        product_service.create_product(
+            db, ProductCreate(name=f"Rug {uuid.uuid4().hex[:6]}", category_id=category.id, seller_price=60), seller.id
+        )
+    db.commit()
+    db.expire_all()
+
+    stats = instrumentation.start_request()
+    products = product_service.get_pending_products(db)
+    assert len(products) >= 6
+    assert all(product["seller_email"] for product in products)
+    assert stats.count == 2
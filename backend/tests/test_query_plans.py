@@ -0,0 +1,78 @@
+"""EXPLAIN the statements behind the hot service queries and fail on full scans or sorts.
+
+SQLite only; on other databases the checks are skipped.
+"""
+from sqlalchemy import event
+from typing import Callable, List, Tuple
+import re
+
+import pytest
+
+from app.core.database import engine
+from app.models.order import OrderItem, OrderStatus
+from app.models.product import ProductImage, ProductStatus, ProductVariant, ProductVariantAttribute
+from app.services import commission_service, order_service, product_service, review_service
+
+
+# Placeholder ID; plans do not depend on whether rows match
+PROBE_ID = "00000000-0000-0000-0000-000000000000"
+
+# Plan steps that mean a query is not served by an index
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+SORT_STEP = "USE TEMP B-TREE FOR ORDER BY"
+
+# Hot service queries: (name, call)
+PROBES: List[Tuple[str, Callable]] = [
+    ("product listing: approved, newest first", lambda db: product_service.get_product_listing(
+        db, status=ProductStatus.APPROVED)),
+    ("product listing: approved by category, cheapest first", lambda db: product_service.get_product_listing(
+        db, status=ProductStatus.APPROVED, category_id=PROBE_ID, sort_by="price", sort_order="asc")),
+    ("product listing: approved by category, by name", lambda db: product_service.get_product_listing(
+        db, status=ProductStatus.APPROVED, category_id=PROBE_ID, sort_by="name", sort_order="asc")),
+    ("seller products, newest first", lambda db: product_service.get_products(db, seller_id=PROBE_ID)),
+    ("products pending approval", lambda db: product_service.get_pending_products(db)),
+    ("product by slug", lambda db: product_service.get_product_by_slug(db, PROBE_ID)),
+    ("product variants", lambda db: db.query(ProductVariant).filter(ProductVariant.product_id == PROBE_ID).all()),
+    ("product images", lambda db: db.query(ProductImage).filter(ProductImage.product_id == PROBE_ID).all()),
+    ("variant attributes", lambda db: db.query(ProductVariantAttribute).filter(
+        ProductVariantAttribute.variant_id == PROBE_ID).all()),
+    ("customer orders, newest first", lambda db: order_service.get_orders(db, customer_id=PROBE_ID)),
+    ("orders by status, newest first", lambda db: order_service.get_orders(db, status=OrderStatus.PROCESSING)),
+    ("pending orders, oldest first", lambda db: order_service.get_pending_orders(db)),
+    ("order items", lambda db: db.query(OrderItem).filter(OrderItem.order_id == PROBE_ID).all()),
+    ("product reviews, newest first", lambda db: review_service.get_product_reviews(db, PROBE_ID)),
+    ("customer reviews, newest first", lambda db: review_service.get_customer_reviews(db, PROBE_ID)),
+    ("product rating stats", lambda db: review_service.get_rating_stats(db, PROBE_ID)),
+    ("global commission rate", lambda db: commission_service.get_global_commission_rate(db)),
+]
+
+
+def plan_problems(db, statement: str, parameters) -> List[str]:
+    """Full table scans and sorts in a statement's SQLite query plan"""
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        steps = [str(row[-1]) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+    return [step for step in steps if FULL_SCAN.match(step) or step.startswith(SORT_STEP)]
+
+
+@pytest.mark.skipif(engine.dialect.name != "sqlite", reason="plans are checked on SQLite only")
+@pytest.mark.parametrize("probe", [probe for _, probe in PROBES], ids=[name for name, _ in PROBES])
+def test_hot_query_uses_indexes(db, probe):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        probe(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+        db.rollback()
+
+    assert statements
+    problems = [problem for statement, parameters in statements for problem in plan_problems(db, statement, parameters)]
+    assert not problems, "; ".join(problems)
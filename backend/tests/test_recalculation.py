@@ -0,0 +1,87 @@
+from app.models.commission import CommissionSetting, CommissionType
+from app.models.product import Product
+from app.schemas.category import CategoryCreate
+from app.schemas.product import ProductCreate
+from app.services import category_service, commission_service, product_service, recalculation_service
+from app.services.commission_service import calculate_commission
+from datetime import datetime
+import uuid
+
+
+def _product(db, seller, category, price):
+    product = product_service.create_product(
+        db, ProductCreate(name=f"Lamp {uuid.uuid4().hex[:6]}", category_id=category.id, seller_price=price), seller.id
+    )
+    db.commit()
+    return product
+
+
+def test_recalculation_applies_new_category_rate(db, seller, category):
+    product = _product(db, seller, category, 100)
+    db.add(CommissionSetting(
+        type=CommissionType.CATEGORY, entity_id=category.id, commission_rate=20,
+        min_seller_price=0, effective_from=datetime(2000, 1, 1), is_active=True
+    ))
+    db.commit()
+    commission_service.invalidate_commission_rules()
+
+    result = recalculation_service.recalculate_all_commissions(db)
+
+    assert result["updated_products"] >= 1
+    db.refresh(product)
+    assert float(product.commission_rate) == 20
+    assert float(product.customer_price) == calculate_commission(100, 20).customer_price
+
+
+def test_write_skips_rows_repriced_since_they_were_read(db, seller, category):
+    product = _product(db, seller, category, 100)
+    stale = db.query(Product.id, Product.seller_price).filter(Product.id == product.id).one()
+
+    # A seller changes the price between the read and the write
+    db.query(Product).filter(Product.id == product.id).update({"seller_price": 150})
+    db.commit()
+
+    calc = calculate_commission(stale.seller_price, 50)
+    written = recalculation_service._write_prices(
+        db, Product, [recalculation_service._price_row(stale, calc, datetime.utcnow())]
+    )
+    db.commit()
+
+    db.refresh(product)
+    assert written == set()
+    assert float(product.commission_rate) != 50
+
+
+def test_price_band_groups_prices_by_rule_bounds(db, category):
+    table = commission_service.CommissionRuleTable([
+        CommissionSetting(
+            type=CommissionType.GLOBAL, commission_rate=10, min_seller_price=0, max_seller_price=99.99,
+            effective_from=datetime(2000, 1, 1)
+        ),
+        CommissionSetting(
+            type=CommissionType.GLOBAL, commission_rate=5, min_seller_price=100,
+            effective_from=datetime(2000, 1, 1)
+        ),
+    ], {category.id: None})
+
+    assert table.price_band(category.id, None, 10) == table.price_band(category.id, None, 50)
+    assert table.price_band(category.id, None, 99.99) != table.price_band(category.id, None, 100)
+    assert table.price_band(category.id, None, 100) == table.price_band(category.id, None, 5000)
+
+
+def test_rate_lookup_loads_categories_created_after_the_table(db, category):
+    db.add(CommissionSetting(
+        type=CommissionType.CATEGORY, entity_id=category.id, commission_rate=17,
+        min_seller_price=0, effective_from=datetime(2000, 1, 1), is_active=True
+    ))
+    db.commit()
+    commission_service.invalidate_commission_rules()
+    table = commission_service.get_commission_rule_table(db)
+
+    # Created after the table was built, without invalidating it
+    child = category_service.create_category(db, CategoryCreate(name=f"Child {uuid.uuid4().hex[:6]}", parent_id=category.id))
+    db.commit()
+    commission_service._rule_table = table
+    assert child.id not in table.category_parents
+
+    assert commission_service.get_commission_rate(db, child.id, seller_price=50) == 17
@@ -0,0 +1,33 @@
+from app.core.database import replica_router
+from app.services import category_service, commission_service
+
+
+def test_replica_reads_are_not_cached_right_after_invalidation(db, monkeypatch):
+    monkeypatch.setattr(replica_router, "replicas", [object()])
+    monkeypatch.setattr(replica_router, "_invalidated_until", 0.0)
+    category_service.invalidate_category_tree()
+    commission_service.invalidate_commission_rules()
+
+    db.info["replica"] = True
+    category_service.get_category_hierarchy(db)
+    commission_service.get_commission_rule_table(db)
+    assert category_service._hierarchy is None
+    assert commission_service._rule_table is None
+
+    # Primary reads still refill the caches
+    db.info.pop("replica")
+    hierarchy = category_service.get_category_hierarchy(db)
+    table = commission_service.get_commission_rule_table(db)
+    assert category_service._hierarchy is hierarchy
+    assert commission_service._rule_table is table
+
+
+def test_replica_reads_are_cached_once_replicas_catch_up(db, monkeypatch):
+    monkeypatch.setattr(replica_router, "replicas", [object()])
+    monkeypatch.setattr(replica_router, "_invalidated_until", 0.0)
+    category_service.invalidate_category_tree()
+    monkeypatch.setattr(replica_router, "_invalidated_until", 0.0)
+
+    db.info["replica"] = True
+    hierarchy = category_service.get_category_hierarchy(db)
+    assert category_service._hierarchy is hierarchy
@@ -0,0 +1,60 @@
+import uuid
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.schemas.product import ProductCreate, ProductUpdate
+from app.services import product_service, search_service
+
+
+def _word():
+    return f"zq{uuid.uuid4().hex[:8]}"
+
+
+def _create(db, seller, category, name, description=""):
+    product = product_service.create_product(
+        db, ProductCreate(name=name, description=description, category_id=category.id, seller_price=50), seller.id
+    )
+    db.commit()
+    return product
+
+
+def _search_ids(db, search, **kwargs):
+    return [row["id"] for row in product_service.get_product_listing(db, search=search, **kwargs)]
+
+
+def test_search_uses_index_and_orders_by_rank(db, seller, category):
+    word = _word()
+    strong = _create(db, seller, category, f"{word} desk", f"Solid {word} top")
+    weak = _create(db, seller, category, "Side table", f"Legs finished to match a {word} range of other furniture")
+    _create(db, seller, category, "Unrelated lamp")
+
+    assert search_service.get_backend(db.connection()).name == "fts5"
+    # The weaker match is newer, so only rank puts the stronger one first
+    assert _search_ids(db, word, seller_id=seller.id) == [strong.id, weak.id]
+    assert _search_ids(db, word, seller_id=seller.id, sort_by="created_at") == [weak.id, strong.id]
+
+
+def test_search_falls_back_to_substring_filter(db, seller, category, monkeypatch):
+    word = _word()
+    product = _create(db, seller, category, f"{word} chair")
+    monkeypatch.setitem(search_service._backends, str(engine.url), search_service.SearchBackend())
+
+    assert search_service.match_subquery(db, word) is None
+    # Substring matching finds a fragment the token index would not
+    assert _search_ids(db, word[3:], seller_id=seller.id) == [product.id]
+
+
+def test_update_reindexes_product(db, seller, category):
+    old_word, new_word = _word(), _word()
+    product = _create(db, seller, category, f"{old_word} shelf")
+
+    product_service.update_product(db, product.id, ProductUpdate(name=f"{new_word} shelf"))
+
+    assert _search_ids(db, new_word) == [product.id]
+    assert _search_ids(db, old_word) == []
+    entries = db.execute(
+        text("SELECT COUNT(*) FROM product_search_ids WHERE product_id = :product_id"),
+        {"product_id": product.id}
+    ).scalar()
+    assert entries == 1
@@ -0,0 +1,63 @@
+import uuid
+
+from app.core.config import settings
+from app.core.dependencies import invalidate_principal
+from app.core.security import create_access_token
+from app.models.user import User, UserRole
+from app.schemas.product import ProductCreate, ProductUpdate
+from app.services import product_service
+
+import pytest
+
+
+def _other_sellers_product(db, seller, category):
+    product = product_service.create_product(
+        db, ProductCreate(name=f"Chair {uuid.uuid4().hex[:6]}", category_id=category.id, seller_price=80), seller.id
+    )
+    db.commit()
+    return product
+
+
+def test_seller_without_profile_is_rejected(client, db, seller, category):
+    product = _other_sellers_product(db, seller, category)
+    user = User(email=f"orphan-{uuid.uuid4().hex[:8]}@example.com", password_hash="x", role=UserRole.SELLER)
+    db.add(user)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user.id, 'role': 'seller'})}"}
+
+    assert client.get("/api/v1/seller/products/", headers=headers).status_code == 403
+    assert client.delete(f"/api/v1/seller/products/{product.id}", headers=headers).status_code == 403
+
+
+def test_trusted_seller_claims_require_seller_id(client, db, seller, category, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_TRUST_TOKEN_CLAIMS", True)
+    product = _other_sellers_product(db, seller, category)
+    invalidate_principal()
+
+    # A token without the seller_id claim falls back to the user's own seller row
+    token = create_access_token({"sub": seller.user_id, "role": "seller"})
+    listed = client.get("/api/v1/seller/products/", headers={"Authorization": f"Bearer {token}"})
+    assert listed.status_code == 200
+    assert {row["seller_id"] for row in listed.json()} == {seller.id}
+    assert product.id in {row["id"] for row in listed.json()}
+
+
+def test_ownership_checks_reject_other_sellers(db, seller, category):
+    product = _other_sellers_product(db, seller, category)
+    with pytest.raises(ValueError):
+        product_service.update_product(db, product.id, ProductUpdate(name="Taken"), seller_id="someone-else")
+    db.rollback()
+    with pytest.raises(ValueError):
+        product_service.delete_product(db, product.id, seller_id="someone-else")
+
+
+def test_count_endpoints_count_own_products(client, db, seller, category, query_budgets):
+    for _ in range(3):
+        _other_sellers_product(db, seller, category)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': seller.user_id})}"}
+
+    pending = client.get("/api/v1/seller/products/pending/count", headers=headers)
+    approved = client.get("/api/v1/seller/products/approved/count", headers=headers)
+
+    assert pending.json() == {"count": 3}
+    assert approved.json() == {"count": 0}
@@ -0,0 +1,23 @@
+import uuid
+
+import pytest
+
+from app.core.slow_query import explain
+from app.models.user import User, UserRole
+
+
+def test_failed_explain_keeps_caller_transaction(db):
+    email = f"explain-{uuid.uuid4().hex[:8]}@example.com"
+    db.add(User(email=email, password_hash="x", role=UserRole.CUSTOMER))
+    db.flush()
+    conn = db.connection()
+
+    assert explain(conn, "SELECT * FROM users WHERE email = ?", (email,))
+    with pytest.raises(Exception):
+        explain(conn, "SELECT * FROM no_such_table", ())
+
+    # The uncommitted row survives and the transaction still accepts work
+    assert db.query(User).filter(User.email == email).count() == 1
+    db.commit()
+    db.query(User).filter(User.email == email).delete()
+    db.commit()
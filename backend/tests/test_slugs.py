@@ -0,0 +1,58 @@
+import uuid
+
+from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.schemas.product import ProductCreate, ProductUpdate
+from app.services import category_service, product_service
+
+
+def _create_products(db, seller, category, name, count):
+    products = [
+        product_service.create_product(
+            db, ProductCreate(name=name, category_id=category.id, seller_price=100), seller.id
+        )
+        for _ in range(count)
+    ]
+    db.commit()
+    return products
+
+
+def test_new_products_get_suffixed_slugs(db, seller, category):
+    name = f"Shirt {uuid.uuid4().hex[:6]}"
+    products = _create_products(db, seller, category, name, 3)
+    base = products[0].slug
+    assert [product.slug for product in products] == [base, f"{base}-1", f"{base}-2"]
+
+
+def test_update_with_same_name_keeps_slug(db, seller, category):
+    name = f"Shirt {uuid.uuid4().hex[:6]}"
+    products = _create_products(db, seller, category, name, 5)
+    middle = products[2]
+    slug = middle.slug
+
+    updated = product_service.update_product(db, middle.id, ProductUpdate(name=name, seller_price=120))
+    db.commit()
+
+    assert updated.slug == slug
+
+
+def test_rename_allocates_new_slug(db, seller, category):
+    first, second = _create_products(db, seller, category, f"Shirt {uuid.uuid4().hex[:6]}", 2)
+    name = f"Jacket {uuid.uuid4().hex[:6]}"
+
+    renamed = product_service.update_product(db, second.id, ProductUpdate(name=name))
+    db.commit()
+
+    assert renamed.slug.startswith(name.lower().replace(" ", "-"))
+    assert first.slug != renamed.slug
+
+
+def test_category_update_with_same_name_keeps_slug(db):
+    name = f"Outdoor {uuid.uuid4().hex[:6]}"
+    categories = [category_service.create_category(db, CategoryCreate(name=name)) for _ in range(3)]
+    db.commit()
+    slug = categories[1].slug
+
+    updated = category_service.update_category(db, categories[1].id, CategoryUpdate(name=name, sort_order=4))
+    db.commit()
+
+    assert updated.slug == slug